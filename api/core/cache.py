@@ -1,56 +1,285 @@
 # api/core/cache.py
 from functools import wraps
-from cachetools import TTLCache
+import asyncio
+import copy
+import logging
+import time
 from api.core.config import settings
-from typing import Optional, Callable, Any
+from api.core.cache_backends import create_cache_backend, MISSING
+from api.core.metrics import CollectedMetric
+from api.core.metadata_config import CACHE_CONFIG, FILTER_NAME_MAPPING, CACHE_KEY_DEFAULTS
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import date, datetime
+from typing import Optional, Callable, Any, Dict
 import hashlib
+import inspect
 import json
 
-# Create cache instances with different TTLs
+def _fresh_ttl(name: str) -> int:
+    """Seconds an entry of the tier is served as fresh (the soft TTL)"""
+    return settings.CACHE_CONFIG.get(f'{name}_ttl', settings.CACHE_CONFIG['default_ttl'])
+
+def _stale_ttl(name: str) -> int:
+    """Extra seconds an entry may be served stale while it is refreshed in the background"""
+    return settings.CACHE_CONFIG.get(f'{name}_stale_ttl', 0)
+
+# Create cache instances on the backend selected by CACHE_CONFIG['backend'].
+# Entries are dropped after the hard TTL, i.e. the fresh TTL plus the stale window.
 caches = {
-    'default': TTLCache(maxsize=settings.CACHE_CONFIG['max_size'], ttl=settings.CACHE_CONFIG['default_ttl']),
-    'short': TTLCache(maxsize=settings.CACHE_CONFIG['max_size'], ttl=settings.CACHE_CONFIG['short_ttl']),
-    'medium': TTLCache(maxsize=settings.CACHE_CONFIG['max_size'], ttl=settings.CACHE_CONFIG['medium_ttl']),
-    'long': TTLCache(maxsize=settings.CACHE_CONFIG['max_size'], ttl=settings.CACHE_CONFIG['long_ttl'])
+    name: create_cache_backend(name, _fresh_ttl(name) + _stale_ttl(name), settings.CACHE_CONFIG)
+    for name in ('default', 'short', 'medium', 'long', 'count')
+}
+
+logger = logging.getLogger(__name__)
+
+# Hit/miss counters per cache type; 'coalesced' counts misses that awaited an
+# in-flight computation instead of running their own query, 'stale_hits' counts
+# hits served past the fresh TTL
+cache_stats = {
+    name: {
+        'hits': 0, 'misses': 0, 'coalesced': 0, 'coalesce_timeouts': 0,
+        'stale_hits': 0, 'refreshes': 0, 'refresh_errors': 0
+    }
+    for name in caches
 }
 
-def cache_response(cache_type: str = 'default', cache_key: Optional[str] = None):
+# In-flight computations per (cache type, key), used to coalesce concurrent misses
+_inflight: Dict[tuple, asyncio.Future] = {}
+
+# Background refresh tasks and the last refresh attempt per (cache type, key)
+_refresh_tasks: set = set()
+_last_refresh: Dict[tuple, float] = {}
+
+def get_cache_stats() -> Dict[str, Dict[str, Optional[int]]]:
+    """Return hit/miss counters, evictions and current size for every cache"""
+    return {
+        name: {**cache_stats[name], 'evictions': cache.evictions, 'size': cache.size()}
+        for name, cache in caches.items()
+    }
+
+# Prometheus counters per tier, read from cache_stats and the backends when scraped
+for _stat in cache_stats['default']:
+    CollectedMetric(
+        f"cache_{_stat}_total", "counter", f"cache_response {_stat.replace('_', ' ')} per cache tier", ("tier",),
+        lambda stat=_stat: (((name,), stats[stat]) for name, stats in cache_stats.items())
+    )
+CollectedMetric(
+    "cache_evictions_total", "counter", "Entries dropped to stay within the tier's max_size", ("tier",),
+    lambda: (((name,), cache.evictions) for name, cache in caches.items())
+)
+CollectedMetric(
+    "cache_entries", "gauge", "Entries currently held per cache tier", ("tier",),
+    lambda: (((name,), cache.size()) for name, cache in caches.items())
+)
+
+async def close_caches() -> None:
+    """Cancel background refreshes and close connections held by the cache backends"""
+    for task in list(_refresh_tasks):
+        task.cancel()
+    await asyncio.gather(*_refresh_tasks, return_exceptions=True)
+    for cache in caches.values():
+        await cache.close()
+
+def _normalize_value(key: str, value: Any) -> Any:
+    """Normalize a single argument so equivalent requests share a cache key"""
+    if isinstance(value, type):
+        return f"{value.__module__}.{value.__qualname__}"
+    if key in ('start_date', 'end_date') and isinstance(value, str):
+        try:
+            return datetime.strptime(value, "%Y-%m-%d").strftime("%Y-%m-%d")
+        except ValueError:
+            return value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (list, tuple, set, frozenset)):
+        items = {_normalize_value(key, item) for item in value}
+        return sorted(items, key=str)
+    if isinstance(value, dict):
+        return {k: _normalize_value(k, v) for k, v in sorted(value.items())}
+    return value
+
+def build_cache_key(func: Callable, args: tuple, kwargs: dict) -> str:
+    """
+    Build a canonical cache key for a call to func.
+
+    Arguments are bound to the function signature so positional and keyword
+    calls match. `self`, database sessions, None values and default values are
+    dropped, plural filter names are folded onto their singular form, id lists
+    are sorted and date windows are normalized. The key is versioned by
+    metadata_config.CACHE_CONFIG['version'].
+    """
+    try:
+        bound = inspect.signature(func).bind(*args, **kwargs)
+        bound.apply_defaults()
+        arguments = dict(bound.arguments)
+    except TypeError:
+        arguments = {f"arg{i}": arg for i, arg in enumerate(args)}
+        arguments.update(kwargs)
+
+    # Flatten **kwargs into the named arguments
+    for name, param in inspect.signature(func).parameters.items():
+        if param.kind is inspect.Parameter.VAR_KEYWORD and name in arguments:
+            arguments.update(arguments.pop(name))
+
+    normalized = {}
+    for name, value in arguments.items():
+        if name in ('self', 'cls') or isinstance(value, AsyncSession):
+            continue
+        if value is None or CACHE_KEY_DEFAULTS.get(name, object()) == value:
+            continue
+        name = FILTER_NAME_MAPPING.get(name, name)
+        value = _normalize_value(name, value)
+        if name in normalized:
+            merged = normalized[name] if isinstance(normalized[name], list) else [normalized[name]]
+            merged += value if isinstance(value, list) else [value]
+            value = _normalize_value(name, merged)
+        normalized[name] = value
+
+    key_string = json.dumps(normalized, sort_keys=True, default=str)
+    return f"{CACHE_CONFIG['version']}:{func.__module__}.{func.__qualname__}:{hashlib.md5(key_string.encode()).hexdigest()}"
+
+async def _compute_once(name: str, key: str, compute: Callable[[], Any]) -> Any:
+    """
+    Run compute for a cache miss, or await the identical computation already in flight.
+
+    Only the leader runs the query; concurrent callers for the same key await
+    its result, and its exception is raised in every caller. A follower that
+    waits longer than CACHE_CONFIG['coalesce_timeout'], or whose leader was
+    cancelled, runs the computation itself.
+    """
+    flight_key = (name, key)
+    pending = _inflight.get(flight_key)
+    if pending is not None:
+        try:
+            result = await asyncio.wait_for(
+                asyncio.shield(pending),
+                settings.CACHE_CONFIG.get('coalesce_timeout', 30)
+            )
+            cache_stats[name]['coalesced'] += 1
+            return result
+        except asyncio.TimeoutError:
+            cache_stats[name]['coalesce_timeouts'] += 1
+            logger.warning(f"Timed out waiting for in-flight computation of {key}, computing it again")
+        except asyncio.CancelledError:
+            if not pending.cancelled():
+                raise
+        return await compute()
+
+    future = asyncio.get_running_loop().create_future()
+    _inflight[flight_key] = future
+    try:
+        result = await compute()
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except Exception as e:
+        future.set_exception(e)
+        # Mark the exception as retrieved when nobody is waiting on it
+        future.exception()
+        raise
+    else:
+        future.set_result(result)
+        return result
+    finally:
+        if _inflight.get(flight_key) is future:
+            del _inflight[flight_key]
+
+def _rebind_session(values: list, session: AsyncSession) -> list:
+    """Swap request-scoped sessions, held directly or on a service's `db`, for session"""
+    rebound = []
+    for value in values:
+        if isinstance(value, AsyncSession):
+            value = session
+        elif isinstance(getattr(value, 'db', None), AsyncSession):
+            value = copy.copy(value)
+            value.db = session
+        rebound.append(value)
+    return rebound
+
+def _schedule_refresh(name: str, key: str, func: Callable, args: tuple, kwargs: dict, store: Callable) -> None:
+    """
+    Refresh a stale entry in a background task.
+
+    At most one refresh per entry runs every CACHE_CONFIG['refresh_interval']
+    seconds, and none starts while the key is already being computed. The
+    request's session is closed once the response is sent, so the refresh
+    runs on a session of its own.
+    """
+    flight_key = (name, key)
+    now = time.monotonic()
+    if flight_key in _inflight or now - _last_refresh.get(flight_key, float('-inf')) < settings.CACHE_CONFIG.get('refresh_interval', 30):
+        return
+    _last_refresh[flight_key] = now
+
+    async def refresh() -> None:
+        from util.database import read_session
+
+        try:
+            async with read_session() as session:
+                refresh_args = _rebind_session(list(args), session)
+                refresh_kwargs = dict(zip(kwargs, _rebind_session(list(kwargs.values()), session)))
+                await _compute_once(name, key, lambda: store(func(*refresh_args, **refresh_kwargs)))
+            cache_stats[name]['refreshes'] += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            cache_stats[name]['refresh_errors'] += 1
+            logger.warning(f"Background refresh of {key} failed: {str(e)}")
+        finally:
+            if len(_last_refresh) > settings.CACHE_CONFIG.get('max_size', 1000):
+                _last_refresh.clear()
+
+    task = asyncio.create_task(refresh())
+    _refresh_tasks.add(task)
+    task.add_done_callback(_refresh_tasks.discard)
+
+def cache_response(
+    cache_type: str = 'default',
+    cache_key: Optional[str] = None,
+    cache_if: Optional[Callable[[Any], bool]] = None
+):
     """
     Cache decorator for API responses
-    
+
     Args:
         cache_type: Type of cache to use ('default', 'short', 'medium', 'long')
         cache_key: Optional custom cache key
+        cache_if: Optional predicate; results for which it returns False are not cached
+
+    Entries are fresh for CACHE_CONFIG['<cache_type>_ttl'] seconds. When the tier
+    has a '<cache_type>_stale_ttl', a stale entry keeps being served for that
+    long while it is refreshed in the background (stale-while-revalidate).
     """
     def decorator(func: Callable) -> Callable:
         @wraps(func)
         async def wrapper(*args, **kwargs) -> Any:
             # Get the appropriate cache
-            cache = caches.get(cache_type, caches['default'])
-            
+            name = cache_type if cache_type in caches else 'default'
+            cache = caches[name]
+
             # Generate cache key if not provided
-            if cache_key:
-                key = cache_key
-            else:
-                # Create a deterministic key from function name and arguments
-                key_parts = [func.__name__]
-                if args:
-                    key_parts.extend([str(arg) for arg in args])
-                if kwargs:
-                    # Sort kwargs to ensure consistent key generation
-                    sorted_kwargs = sorted(kwargs.items())
-                    key_parts.extend([f"{k}={v}" for k, v in sorted_kwargs])
-                
-                key_string = ":".join(key_parts)
-                key = hashlib.md5(key_string.encode()).hexdigest()
-            
+            key = cache_key or build_cache_key(func, args, kwargs)
+
+            async def store(pending) -> Any:
+                result = await pending
+                if cache_if is None or cache_if(result):
+                    await cache.set(key, {'value': result, 'stored_at': time.time()})
+                return result
+
             # Check cache
-            if key in cache:
-                return cache[key]
-            
-            # Execute function and cache result
-            result = await func(*args, **kwargs)
-            cache[key] = result
-            return result
+            cached = await cache.get(key)
+            if cached is not MISSING:
+                if time.time() - cached['stored_at'] < _fresh_ttl(name):
+                    cache_stats[name]['hits'] += 1
+                    return cached['value']
+                if _stale_ttl(name) > 0:
+                    cache_stats[name]['hits'] += 1
+                    cache_stats[name]['stale_hits'] += 1
+                    _schedule_refresh(name, key, func, args, kwargs, store)
+                    return cached['value']
+
+            # Execute function once for all concurrent misses and cache result
+            cache_stats[name]['misses'] += 1
+            return await _compute_once(name, key, lambda: store(func(*args, **kwargs)))
         return wrapper
-    return decorator
\ No newline at end of file
+    return decorator
@@ -0,0 +1,346 @@
+# api/core/cache_backends.py
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Optional
+from urllib.parse import urlparse
+from cachetools import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# Returned by CacheBackend.get when a key is absent or expired
+MISSING = object()
+
+def _dumps(value: Any) -> str:
+    """Serialize a cached value for shared backends"""
+    return json.dumps(value, default=str)
+
+def _loads(raw: Any) -> Any:
+    """Deserialize a cached value from a shared backend"""
+    if isinstance(raw, bytes):
+        raw = raw.decode()
+    return json.loads(raw)
+
+class CacheBackend:
+    """Interface for a single cache tier with a fixed TTL"""
+
+    def __init__(self, namespace: str, ttl: int, max_size: int):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.max_size = max_size
+        # Entries dropped to stay within max_size; None when the backend evicts on its own
+        self.evictions: Optional[int] = 0
+
+    async def get(self, key: str) -> Any:
+        """Return the cached value or MISSING"""
+        raise NotImplementedError
+
+    async def set(self, key: str, value: Any) -> None:
+        """Store a value for the tier's TTL"""
+        raise NotImplementedError
+
+    async def delete(self, key: str) -> None:
+        """Remove a single key"""
+        raise NotImplementedError
+
+    async def clear(self) -> None:
+        """Remove every key of this tier"""
+        raise NotImplementedError
+
+    def size(self) -> Optional[int]:
+        """Number of entries, or None when the backend cannot tell cheaply"""
+        return None
+
+    async def close(self) -> None:
+        """Release connections held by the backend"""
+
+class _EvictionCountingTTLCache(TTLCache):
+    """TTLCache that tells its backend when it drops an entry to make room"""
+
+    def __init__(self, backend: CacheBackend, maxsize: int, ttl: int):
+        super().__init__(maxsize=maxsize, ttl=ttl)
+        self._backend = backend
+
+    def popitem(self):
+        # Only called on a full cache, after the expired entries are gone
+        item = super().popitem()
+        self._backend.evictions += 1
+        return item
+
+class MemoryBackend(CacheBackend):
+    """In-process TTLCache, private to each worker"""
+
+    def __init__(self, namespace: str, ttl: int, max_size: int):
+        super().__init__(namespace, ttl, max_size)
+        self._cache = _EvictionCountingTTLCache(self, max_size, ttl)
+
+    async def get(self, key: str) -> Any:
+        return self._cache.get(key, MISSING)
+
+    async def set(self, key: str, value: Any) -> None:
+        self._cache[key] = value
+
+    async def delete(self, key: str) -> None:
+        self._cache.pop(key, None)
+
+    async def clear(self) -> None:
+        self._cache.clear()
+
+    def size(self) -> Optional[int]:
+        return len(self._cache)
+
+class SQLiteBackend(CacheBackend):
+    """
+    Shared cache stored in a SQLite file on the host.
+
+    Every worker on the host opens the same file, so an entry computed by one
+    worker is a hit for all of them. WAL mode keeps readers from blocking the
+    writer; lookups are primary-key reads and take microseconds. Statements
+    run in a worker thread, one at a time on the shared connection, so a
+    write lock held by another process never stalls the event loop.
+    """
+
+    # Expired rows are purged every PURGE_INTERVAL writes
+    PURGE_INTERVAL = 100
+
+    def __init__(self, namespace: str, ttl: int, max_size: int, path: str):
+        super().__init__(namespace, ttl, max_size)
+        self.path = path
+        self._writes = 0
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=1.0, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache_entries ("
+            "namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, expires_at REAL NOT NULL, "
+            "PRIMARY KEY (namespace, key))"
+        )
+
+    def _fetch(self, key: str) -> Optional[tuple]:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT value, expires_at FROM cache_entries WHERE namespace = ? AND key = ?",
+                (self.namespace, key)
+            ).fetchone()
+
+    def _store(self, key: str, raw: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache_entries (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)",
+                (self.namespace, key, raw, time.time() + self.ttl)
+            )
+            self._writes += 1
+            if self._writes % self.PURGE_INTERVAL == 0:
+                self._purge()
+
+    def _purge(self) -> None:
+        """Drop expired rows and trim the tier to max_size, oldest first; call with the lock held"""
+        self._conn.execute(
+            "DELETE FROM cache_entries WHERE namespace = ? AND expires_at < ?",
+            (self.namespace, time.time())
+        )
+        trimmed = self._conn.execute(
+            "DELETE FROM cache_entries WHERE namespace = ? AND key IN ("
+            "SELECT key FROM cache_entries WHERE namespace = ? ORDER BY expires_at DESC LIMIT -1 OFFSET ?)",
+            (self.namespace, self.namespace, self.max_size)
+        )
+        self.evictions += max(0, trimmed.rowcount)
+
+    def _remove(self, key: Optional[str] = None) -> None:
+        with self._lock:
+            if key is None:
+                self._conn.execute("DELETE FROM cache_entries WHERE namespace = ?", (self.namespace,))
+            else:
+                self._conn.execute("DELETE FROM cache_entries WHERE namespace = ? AND key = ?", (self.namespace, key))
+
+    async def get(self, key: str) -> Any:
+        try:
+            row = await asyncio.to_thread(self._fetch, key)
+        except sqlite3.Error as e:
+            logger.warning(f"SQLite cache read failed: {str(e)}")
+            return MISSING
+        if row is None or row[1] < time.time():
+            return MISSING
+        return _loads(row[0])
+
+    async def set(self, key: str, value: Any) -> None:
+        try:
+            await asyncio.to_thread(self._store, key, _dumps(value))
+        except sqlite3.Error as e:
+            logger.warning(f"SQLite cache write failed: {str(e)}")
+
+    async def delete(self, key: str) -> None:
+        try:
+            await asyncio.to_thread(self._remove, key)
+        except sqlite3.Error as e:
+            logger.warning(f"SQLite cache delete failed: {str(e)}")
+
+    async def clear(self) -> None:
+        try:
+            await asyncio.to_thread(self._remove)
+        except sqlite3.Error as e:
+            logger.warning(f"SQLite cache clear failed: {str(e)}")
+
+    def size(self) -> Optional[int]:
+        # Called on the event loop: give up rather than wait for a statement in flight
+        if not self._lock.acquire(blocking=False):
+            return None
+        try:
+            return self._conn.execute(
+                "SELECT count(*) FROM cache_entries WHERE namespace = ? AND expires_at >= ?",
+                (self.namespace, time.time())
+            ).fetchone()[0]
+        except sqlite3.Error:
+            return None
+        finally:
+            self._lock.release()
+
+    async def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+class RedisError(Exception):
+    """Error reply from a Redis-protocol server"""
+
+class RedisBackend(CacheBackend):
+    """
+    Shared cache on a Redis-protocol server (Redis, Valkey, KeyDB, ...).
+
+    Speaks RESP2 directly over asyncio streams with a single connection per
+    worker, so no client library is required. Connection failures are logged
+    and treated as cache misses.
+    """
+
+    def __init__(self, namespace: str, ttl: int, max_size: int, url: str, timeout: float = 0.5):
+        super().__init__(namespace, ttl, max_size)
+        # The server evicts under its own maxmemory-policy
+        self.evictions = None
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.password = parsed.password
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.timeout = timeout
+        self.prefix = f"insightwires:{namespace}:"
+        self._reader = None
+        self._writer = None
+        self._loop = None
+        self._lock = None
+
+    async def _connect(self) -> None:
+        self._reader, self._writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port), self.timeout
+        )
+        if self.password:
+            await self._send("AUTH", self.password)
+        if self.db:
+            await self._send("SELECT", self.db)
+
+    async def _send(self, *parts) -> Any:
+        payload = [f"*{len(parts)}\r\n".encode()]
+        for part in parts:
+            data = part if isinstance(part, bytes) else str(part).encode()
+            payload.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        self._writer.write(b"".join(payload))
+        await self._writer.drain()
+        return await asyncio.wait_for(self._read_reply(), self.timeout)
+
+    async def _read_reply(self) -> Any:
+        line = await self._reader.readline()
+        if not line:
+            raise ConnectionError("Connection closed by Redis server")
+        kind, body = line[:1], line[1:-2]
+        if kind == b"+":
+            return body.decode()
+        if kind == b"-":
+            raise RedisError(body.decode())
+        if kind == b":":
+            return int(body)
+        if kind == b"$":
+            length = int(body)
+            if length == -1:
+                return None
+            data = await self._reader.readexactly(length + 2)
+            return data[:-2]
+        if kind == b"*":
+            length = int(body)
+            if length == -1:
+                return None
+            return [await self._read_reply() for _ in range(length)]
+        raise RedisError(f"Unexpected reply: {line!r}")
+
+    async def execute(self, *parts) -> Any:
+        """Run one command, reconnecting when the connection or event loop changed"""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop, self._lock = loop, asyncio.Lock()
+            self._reader = self._writer = None
+        async with self._lock:
+            try:
+                if self._writer is None:
+                    await self._connect()
+                return await self._send(*parts)
+            except RedisError:
+                # The error reply was read in full, the connection is still in sync
+                raise
+            except BaseException:
+                # Also on cancellation: an unread reply would be taken for the next command's
+                self._drop_connection()
+                raise
+
+    def _drop_connection(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+        self._reader = self._writer = None
+
+    async def get(self, key: str) -> Any:
+        try:
+            raw = await self.execute("GET", self.prefix + key)
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, RedisError) as e:
+            logger.warning(f"Redis cache read failed: {str(e)}")
+            return MISSING
+        return MISSING if raw is None else _loads(raw)
+
+    async def set(self, key: str, value: Any) -> None:
+        try:
+            await self.execute("SET", self.prefix + key, _dumps(value), "PX", int(self.ttl * 1000))
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, RedisError) as e:
+            logger.warning(f"Redis cache write failed: {str(e)}")
+
+    async def delete(self, key: str) -> None:
+        await self.execute("DEL", self.prefix + key)
+
+    async def clear(self) -> None:
+        cursor = "0"
+        while True:
+            cursor, keys = await self.execute("SCAN", cursor, "MATCH", self.prefix + "*", "COUNT", 500)
+            cursor = cursor.decode() if isinstance(cursor, bytes) else str(cursor)
+            if keys:
+                await self.execute("DEL", *keys)
+            if cursor == "0":
+                break
+
+    async def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+        self._reader = self._writer = None
+
+def create_cache_backend(namespace: str, ttl: int, config: dict) -> CacheBackend:
+    """Create the backend selected by CACHE_CONFIG['backend'] ('memory', 'sqlite' or 'redis')"""
+    backend = config.get('backend', 'memory')
+    max_size = config.get('max_size', 1000)
+    if backend == 'memory':
+        return MemoryBackend(namespace, ttl, max_size)
+    if backend == 'sqlite':
+        return SQLiteBackend(namespace, ttl, max_size, config.get('sqlite_path', '/tmp/insightwires_cache.sqlite3'))
+    if backend == 'redis':
+        return RedisBackend(namespace, ttl, max_size, config.get('redis_url', 'redis://localhost:6379/0'))
+    raise ValueError(f"Unknown cache backend: {backend}. Valid backends are: memory, sqlite, redis")
@@ -1,7 +1,7 @@
 # api/core/config.py
 from pydantic_settings import BaseSettings
 from functools import lru_cache
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Any
 from pydantic import Field, field_validator, ValidationInfo
 
 class Settings(BaseSettings):
@@ -17,6 +17,22 @@ class Settings(BaseSettings):
     POSTGRES_DB: str
     DATABASE_URL: Optional[str] = None
 
+    # Connection pool, per worker process: at most DB_POOL_SIZE + DB_MAX_OVERFLOW connections
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: int = 30     # seconds a checkout waits for a free connection
+    DB_POOL_RECYCLE: int = 1800   # seconds before a connection is replaced
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_CACHE_SIZE: int = 500  # prepared statements per connection; 0 behind pgbouncer (transaction mode)
+    DB_ECHO: bool = False  # log every SQL statement
+
+    # Read replicas for read-only routes, comma-separated postgresql+asyncpg URLs;
+    # empty sends every query to the primary
+    DATABASE_REPLICA_URLS: str = ""
+    DB_REPLICA_STRATEGY: str = Field("round_robin", pattern="^(round_robin|least_connections)$")
+    DB_REPLICA_HEALTH_SECONDS: int = 5  # seconds between replica health checks
+    DB_REPLICA_MAX_LAG_SECONDS: float = 0  # replicas further behind the primary serve no reads; 0 disables the check
+
     # Security
     SECRET_KEY: str
     API_KEY: str
@@ -30,17 +46,39 @@ class Settings(BaseSettings):
     ALLOWED_ORIGINS: str = "http://localhost:3000"
     
     # Cache Configuration
-    CACHE_CONFIG: Dict[str, int] = Field(
+    CACHE_CONFIG: Dict[str, Any] = Field(
         default={
             'default_ttl': 300,  # 5 minutes
             'short_ttl': 60,     # 1 minute
             'medium_ttl': 300,   # 5 minutes
             'long_ttl': 3600,    # 1 hour
-            'max_size': 1000
+            'count_ttl': 600,    # 10 minutes, used by count=estimate
+            'medium_stale_ttl': 300,  # serve stale for up to 5 more minutes while refreshing
+            'long_stale_ttl': 3600,   # serve stale for up to 1 more hour while refreshing
+            'refresh_interval': 30,   # minimum seconds between refreshes of one entry
+            'max_size': 1000,
+            'coalesce_timeout': 30,  # seconds a request waits for an identical in-flight query
+            'backend': 'memory',  # memory, sqlite (shared per host) or redis (shared across hosts)
+            'sqlite_path': '/tmp/insightwires_cache.sqlite3',
+            'redis_url': 'redis://localhost:6379/0'
         },
         description="Cache configuration settings"
     )
     
+    # In-memory bitmap index for insight filters (requires pyroaring)
+    INSIGHT_INDEX_ENABLED: bool = False
+    INSIGHT_INDEX_REFRESH_SECONDS: int = 60
+    # Refreshes only add rows; a periodic rebuild drops deleted articles and mappings (0 never rebuilds)
+    INSIGHT_INDEX_REBUILD_SECONDS: int = 3600
+    # Refreshes re-read rows ingested this long before the previous refresh; longer than any ingest transaction
+    INSIGHT_INDEX_INGEST_OVERLAP_SECONDS: int = 600
+
+    # Filter sets of one POST /insight/batch run at the same time, each on its own pooled connection
+    INSIGHT_BATCH_CONCURRENCY: int = 4
+
+    # Seconds between checks of the taxonomy files for changes; 0 disables hot reload (taxonomies are still preloaded)
+    TAXONOMY_RELOAD_SECONDS: int = 10
+
     # Legacy cache TTL (will be converted to CACHE_CONFIG)
     CACHE_TTL: Optional[str] = None
 
@@ -50,7 +88,7 @@ class Settings(BaseSettings):
         extra = "ignore"  # Ignore extra fields in environment variables
 
     @field_validator('CACHE_CONFIG', mode='after')
-    def convert_cache_ttl(cls, v: Dict[str, int], info: ValidationInfo) -> Dict[str, int]:
+    def convert_cache_ttl(cls, v: Dict[str, Any], info: ValidationInfo) -> Dict[str, Any]:
         """Convert legacy CACHE_TTL to new CACHE_CONFIG format if present"""
         if hasattr(info.context, 'CACHE_TTL') and info.context.CACHE_TTL:
             try:
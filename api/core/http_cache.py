@@ -0,0 +1,143 @@
+# api/core/http_cache.py
+import asyncio
+import gzip
+import hashlib
+import json
+import threading
+from typing import Any, Callable, Dict, NamedTuple, Optional
+from fastapi import Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import Response
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli variants are optional
+    brotli = None
+
+# Seconds clients may reuse a response before revalidating it with If-None-Match
+TAXONOMY_MAX_AGE = 300
+INSIGHT_MAX_AGE = 60
+
+def render_json(payload: Any) -> bytes:
+    """Serialize a payload exactly like FastAPI's JSONResponse"""
+    return json.dumps(
+        jsonable_encoder(payload),
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+def strong_etag(body: bytes) -> str:
+    """Quoted strong ETag derived from a hash of the response body"""
+    return f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Whether the request's If-None-Match lists etag (weak comparison, as RFC 9110 requires)"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    candidates = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return etag.removeprefix("W/") in candidates
+
+def cached_json_response(
+    request: Request,
+    payload: Any = None,
+    etag: Optional[str] = None,
+    max_age: int = TAXONOMY_MAX_AGE
+) -> Response:
+    """
+    JSON response with ETag and Cache-Control headers, or an empty 304 when
+    the client already holds this version.
+
+    Pass etag when the version is known without rendering the payload (e.g. a
+    taxonomy version); otherwise it is a hash of the rendered body.
+    """
+    if etag is not None and etag_matches(request, etag):
+        return Response(status_code=304, headers=_cache_headers(etag, max_age))
+    body = render_json(payload)
+    etag = etag or strong_etag(body)
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=_cache_headers(etag, max_age))
+    return Response(body, media_type="application/json", headers=_cache_headers(etag, max_age))
+
+def _cache_headers(etag: str, max_age: int) -> dict:
+    # Responses depend on the API key, so only the client may store them
+    return {"ETag": etag, "Cache-Control": f"private, max-age={max_age}"}
+
+class RenderedPayload(NamedTuple):
+    """A JSON body rendered once, with its compressed variants keyed by content coding"""
+    etag: str
+    variants: Dict[str, bytes]
+
+# Content codings in order of preference; 'identity' is always available
+ENCODING_PREFERENCE = ("br", "gzip", "identity")
+
+# Rendered payloads per key, replaced when the key's ETag changes
+_rendered: Dict[str, RenderedPayload] = {}
+_render_lock = threading.Lock()
+
+def render_variants(payload: Any, etag: str) -> RenderedPayload:
+    """Render a payload to JSON bytes plus gzip and, when available, brotli variants"""
+    body = render_json(payload)
+    variants = {"identity": body, "gzip": gzip.compress(body, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants["br"] = brotli.compress(body, quality=11)
+    return RenderedPayload(etag, variants)
+
+def negotiate_encoding(request: Request, available) -> str:
+    """Pick the preferred content coding the client accepts (Accept-Encoding with q-values)"""
+    accepted: Dict[str, float] = {}
+    for item in request.headers.get("accept-encoding", "").split(","):
+        coding, _, params = item.strip().lower().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        if coding:
+            accepted[coding] = quality
+    for coding in ENCODING_PREFERENCE:
+        if coding in available and accepted.get(coding, accepted.get("*", 0.0)) > 0:
+            return coding
+    return "identity"
+
+def _render_once(key: str, etag: str, build_payload: Callable[[], Any]) -> RenderedPayload:
+    """Rendered payload of key at etag, rendering it unless another thread just did"""
+    with _render_lock:
+        rendered = _rendered.get(key)
+        if rendered is None or rendered.etag != etag:
+            rendered = _rendered[key] = render_variants(build_payload(), etag)
+        return rendered
+
+async def prerendered_response(
+    request: Request,
+    key: str,
+    etag: str,
+    build_payload: Callable[[], Any],
+    max_age: int = TAXONOMY_MAX_AGE
+) -> Response:
+    """
+    Serve a payload that only changes with its ETag from bytes rendered and
+    compressed once per version, picking the variant by Accept-Encoding.
+
+    Each encoding is its own representation with its own strong ETag. A new
+    version is rendered in a worker thread, since brotli at quality 11 takes
+    long enough to stall every other request on the event loop.
+    """
+    rendered = _rendered.get(key)
+    if rendered is None or rendered.etag != etag:
+        rendered = await asyncio.to_thread(_render_once, key, etag, build_payload)
+
+    encoding = negotiate_encoding(request, rendered.variants)
+    variant_etag = etag if encoding == "identity" else f'{etag[:-1]}-{encoding}"'
+    headers = _cache_headers(variant_etag, max_age)
+    headers["Vary"] = "Accept-Encoding"
+    if etag_matches(request, variant_etag):
+        return Response(status_code=304, headers=headers)
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    return Response(rendered.variants[encoding], media_type="application/json", headers=headers)
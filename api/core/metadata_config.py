@@ -31,20 +31,63 @@ VALID_FILTERS = {
     'location_id', 'location_ids',
     'source_type_id', 'source_type_ids',
     'sentiment_type_id', 'sentiment_type_ids',
-    'start_date', 'end_date',
-    'page', 'limit'
+    'start_date', 'end_date', 'q',
+    'page', 'limit', 'cursor', 'count', 'match', 'fields'
 }
 
-# Pagination parameters
-PAGINATION_PARAMS = {'page', 'limit'}
+# Pagination and query option parameters (not filters)
+PAGINATION_PARAMS = {'page', 'limit', 'cursor', 'count', 'match', 'fields'}
+
+# Maximum number of ids accepted for a single multi-value filter
+MAX_FILTER_IDS = 100
+
+# Text search configuration of insightwire.search_vector and of q= queries
+SEARCH_CONFIG = 'english'
+
+# Maximum length of a q= search
+MAX_SEARCH_LENGTH = 256
+
+# Maximum number of filter sets accepted by POST /insight/batch
+MAX_BATCH_QUERIES = 50
+
+# Facets returned by /insight/facets and the mapping id column counted for each
+FACET_DIMENSIONS = {
+    'industries': 'industry_type_id',
+    'business_activities': 'business_activity_id',
+    'sentiments': 'sentiment_type_id',
+    'source_types': 'source_type_id',
+    'locations': 'location_id'
+}
 
 # Cache configuration
 CACHE_CONFIG = {
     'ttl': 3600,  # 1 hour
-    'version': '1.0',
+    'version': '1.1',
     'max_size': 1000
 }
 
+# Parameter defaults left out of cache keys, so explicit and implicit defaults share entries
+CACHE_KEY_DEFAULTS = {
+    'page': 1,
+    'limit': 20,
+    'count': 'exact',
+    'match': 'any'
+}
+
+# Rows fetched from the server-side cursor and written per chunk by /insight/export
+EXPORT_CHUNK_SIZE = 500
+
+# Columns of /insight/export, in the order of the list responses
+EXPORT_FIELDS = [
+    'story_id', 'title', 'lead_paragraph', 'story', 'published_date', 'news_url',
+    'image_url', 'type_of_content', 'type_of_source', 'sources', 'business_activities',
+    'industries', 'locations', 'content_languages', 'sentiment'
+]
+
+# Fields of /insight without a fields= projection; the full story is only
+# loaded and returned when requested (fields=* or a list naming story)
+DEFAULT_INSIGHT_FIELDS = [field for field in EXPORT_FIELDS if field != 'story']
+
 # Response schema fields
 RESPONSE_SCHEMA_FIELDS = [
     'uuid',
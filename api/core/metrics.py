@@ -0,0 +1,129 @@
+# api/core/metrics.py
+"""
+Metrics of this worker process in the Prometheus text exposition format.
+
+Counters, gauges and histograms are plain dicts of label tuples, so recording
+a sample is a dict lookup and an addition. Values owned by other components
+(cache counters, pool occupancy) are read only when /metrics is scraped.
+Each worker exports its own series; scrape every worker or aggregate them.
+"""
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Request and query latencies, in seconds
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Response sizes, in bytes
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+# Rows per statement
+ROW_BUCKETS = (0, 1, 10, 100, 1000, 10000, 100000)
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: Sequence[str], values: Sequence) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+def _format_value(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Metric:
+    """Series of one metric family, keyed by their label values in labelnames order"""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.values: Dict[tuple, float] = {}
+        REGISTRY.append(self)
+
+    def samples(self) -> Iterable[Tuple[str, Sequence[str], tuple, float]]:
+        """(name suffix, extra label names, label values, value) of every series"""
+        for labels, value in list(self.values.items()):
+            yield "", (), labels, value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for suffix, extra_names, labels, value in self.samples():
+            lines.append(f"{self.name}{suffix}{_format_labels(self.labelnames + tuple(extra_names), labels)} {_format_value(value)}")
+        return lines
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, labels: tuple = (), amount: float = 1) -> None:
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def inc(self, labels: tuple = (), amount: float = 1) -> None:
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def dec(self, labels: tuple = (), amount: float = 1) -> None:
+        self.values[labels] = self.values.get(labels, 0) - amount
+
+    def set(self, labels: tuple, value: float) -> None:
+        self.values[labels] = value
+
+class Histogram(Metric):
+    """
+    Bucketed observations. Each series keeps one count per bucket plus the
+    sum; the cumulative le buckets Prometheus expects are built when rendered.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, labels: tuple, value: float) -> None:
+        series = self.values.get(labels)
+        if series is None:
+            # One slot per bucket, one for +Inf, then the sum
+            series = self.values[labels] = [0] * (len(self.buckets) + 2)
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def samples(self):
+        bounds = [_format_value(bound) for bound in self.buckets] + ["+Inf"]
+        for labels, series in list(self.values.items()):
+            cumulative = 0
+            for bound, count in zip(bounds, series):
+                cumulative += count
+                yield "_bucket", ("le",), labels + (bound,), cumulative
+            yield "_sum", (), labels, series[-1]
+            yield "_count", (), labels, cumulative
+
+class CollectedMetric(Metric):
+    """Metric whose series are read from collect() at scrape time"""
+
+    def __init__(self, name: str, kind: str, documentation: str, labelnames: Sequence[str], collect: Callable[[], Iterable[Tuple[tuple, float]]]):
+        super().__init__(name, documentation, labelnames)
+        self.kind = kind
+        self.collect = collect
+
+    def samples(self):
+        for labels, value in self.collect():
+            if value is not None:
+                yield "", (), labels, value
+
+# Every metric of the process, in registration order
+REGISTRY: List[Metric] = []
+
+def render_metrics() -> str:
+    """All metrics of this process in the text exposition format"""
+    lines = []
+    for metric in REGISTRY:
+        lines += metric.render()
+    return "\n".join(lines) + "\n"
@@ -7,6 +7,7 @@ from util.database import get_async_db  # Use async session
 from sqlalchemy import func
 from typing import Optional
 from api.models import *
+from api.services.query_builder import taxonomy_search
 # from api.models import (
 #     BusinessEventsMetadata,
 #     CompaniesMetadata,
@@ -44,8 +45,8 @@ async def paginate_query(stmt, page: int, limit: int, db: AsyncSession):
 async def fetch_metadata_data(metadata_model, field: str, value: Optional[str] | None, page: int, limit: int, db: AsyncSession):
     stmt = select(metadata_model)
     
-    if value:  # Apply filtering if a value is provided
-        stmt = stmt.filter(getattr(metadata_model, field).ilike(f"%{value}%"))
+    if value:  # Apply filtering if a value is provided, best matches first
+        stmt = taxonomy_search(stmt, getattr(metadata_model, field), value)
 
     return await paginate_query(stmt, page, limit, db)
 
@@ -54,8 +55,8 @@ async def fetch_all_metadata_data(metadata_model, field: str, value: Optional[st
     stmt = select(metadata_model)
     
     try:
-        if value:  # Apply filtering if a value is provided
-            stmt = stmt.filter(getattr(metadata_model, field).ilike(f"%{value}%"))
+        if value:  # Apply filtering if a value is provided, best matches first
+            stmt = taxonomy_search(stmt, getattr(metadata_model, field), value)
     except AttributeError:
         logger.error(f"Field '{field}' does not exist in the model '{metadata_model.__tablename__}'.")
         raise HTTPException(status_code=400, detail=f"Invalid value for Business Activity: {value}")
@@ -0,0 +1,75 @@
+# api/middleware/metrics.py
+import time
+from typing import Dict, Tuple
+from starlette.routing import Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from api.core.metrics import SIZE_BUCKETS, Counter, Gauge, Histogram
+
+REQUESTS = Counter("http_requests_total", "Requests handled", ("method", "route", "status"))
+REQUEST_DURATION = Histogram("http_request_duration_seconds", "Time until the last body byte was sent", ("method", "route"))
+IN_PROGRESS = Gauge("http_requests_in_progress", "Requests being handled", ("method", "route"))
+RESPONSE_SIZE = Histogram("http_response_size_bytes", "Response body bytes, as sent", ("method", "route"), buckets=SIZE_BUCKETS)
+
+# Paths that match no route share one label, so scanners cannot create new series
+UNMATCHED = "unmatched"
+
+class MetricsMiddleware:
+    """
+    Record latency, status, response size and concurrency per route template.
+
+    Plain ASGI rather than BaseHTTPMiddleware: it only wraps send, so
+    streamed responses pass through untouched and a request costs a few
+    dict updates. The route is resolved once per method and path.
+    """
+
+    # Resolved (method, path) pairs kept before the table is reset
+    MAX_RESOLVED = 2048
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self._routes: Dict[Tuple[str, str], str] = {}
+
+    def _route(self, scope: Scope) -> str:
+        key = (scope["method"], scope["path"])
+        route = self._routes.get(key)
+        if route is None:
+            route = UNMATCHED
+            for candidate in scope["app"].router.routes:
+                match, _ = candidate.matches(scope)
+                if match is Match.FULL:
+                    route = getattr(candidate, "path", UNMATCHED)
+                    break
+                if match is Match.PARTIAL and route is UNMATCHED:
+                    route = getattr(candidate, "path", UNMATCHED)
+            if len(self._routes) >= self.MAX_RESOLVED:
+                self._routes.clear()
+            self._routes[key] = route
+        return route
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        labels = (method, self._route(scope))
+        status = 500
+        size = 0
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        IN_PROGRESS.inc(labels)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            REQUEST_DURATION.observe(labels, time.perf_counter() - started)
+            IN_PROGRESS.dec(labels)
+            REQUESTS.inc(labels + (status,))
+            RESPONSE_SIZE.observe(labels, size)
@@ -1,6 +1,7 @@
 from sqlalchemy import Column, String, Integer
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.ext.declarative import declarative_base
+from .search_indexes import trigram_index
 import uuid
 
 Base = declarative_base()
@@ -11,3 +12,8 @@ class CompaniesTaxonomy(Base):
     company_id = Column(Integer, primary_key=True, nullable=False)
     company_name = Column(String, nullable=False, unique=True)
     company_url = Column(String, nullable=False, unique=True)
+
+    __table_args__ = (
+        trigram_index('companies_taxonomy', 'company_name'),
+        trigram_index('companies_taxonomy', 'company_url'),
+    )
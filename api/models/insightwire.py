@@ -1,7 +1,8 @@
-from sqlalchemy import Column, String, DateTime, Text, Integer, ARRAY, ForeignKey, Index, PrimaryKeyConstraint
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, String, DateTime, Text, Integer, ARRAY, ForeignKey, Index, PrimaryKeyConstraint, DDL, event
+from sqlalchemy.dialects.postgresql import UUID, TSVECTOR
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, deferred
+from api.core.metadata_config import SEARCH_CONFIG
 import uuid
 
 Base = declarative_base()
@@ -23,6 +24,13 @@ class InsightWire(Base):
     image_url = Column(Text)
     business_activities = Column(Text)
     industries = Column(Text)
+    # Full-text search document, maintained by insightwire_search_vector_trigger;
+    # deferred so it is never loaded with the row
+    search_vector = deferred(Column(TSVECTOR))
+
+    __table_args__ = (
+        Index('idx_insightwire_search_vector', 'search_vector', postgresql_using='gin'),
+    )
     
     # Relationships
     # business_activities = relationship("BusinessActivityMapping", back_populates="insightwire", cascade="all, delete-orphan")
@@ -31,3 +39,31 @@ class InsightWire(Base):
     # content_types = relationship("ContentTypeMapping", back_populates="insightwire", cascade="all, delete-orphan")
     # source_types = relationship("SourceTypeMapping", back_populates="insightwire", cascade="all, delete-orphan")
     # sentiment_types = relationship("SentimentTypeMapping", back_populates="insightwire", cascade="all, delete-orphan")
+
+def search_document(row: str = "") -> str:
+    """SQL of the weighted search document of a row: title (A), lead paragraph (B), story (C)"""
+    return " || ".join(
+        f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce({row}{column}, '')), '{weight}')"
+        for column, weight in (('title', 'A'), ('lead_paragraph', 'B'), ('story', 'C'))
+    )
+
+# Keep search_vector in step with the text columns on every insert and update
+SEARCH_VECTOR_TRIGGER_DDL = [
+    f"""
+    CREATE OR REPLACE FUNCTION insightwire_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector := {search_document('NEW.')};
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    "DROP TRIGGER IF EXISTS insightwire_search_vector_trigger ON insightwire",
+    """
+    CREATE TRIGGER insightwire_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF title, lead_paragraph, story ON insightwire
+    FOR EACH ROW EXECUTE FUNCTION insightwire_search_vector_update()
+    """,
+]
+
+for statement in SEARCH_VECTOR_TRIGGER_DDL:
+    event.listen(InsightWire.__table__, 'after_create', DDL(statement).execute_if(dialect='postgresql'))
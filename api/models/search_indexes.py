@@ -0,0 +1,54 @@
+# api/models/search_indexes.py
+import logging
+from typing import Dict, List, Tuple
+from sqlalchemy import DDL, Index, event, text
+
+logger = logging.getLogger(__name__)
+
+CREATE_TRIGRAM_EXTENSION = "CREATE EXTENSION IF NOT EXISTS pg_trgm"
+
+# Trigram indexes declared on the taxonomy models: index name -> (table, column)
+TRIGRAM_INDEXES: Dict[str, Tuple[str, str]] = {}
+
+def trigram_index(table: str, column: str) -> Index:
+    """
+    GIN trigram index on a text column. It serves ilike '%value%' as well as
+    similarity() and % searches, which a btree index cannot.
+    """
+    name = f"idx_{table}_{column}_trgm"
+    TRIGRAM_INDEXES[name] = (table, column)
+    index = Index(name, column, postgresql_using="gin", postgresql_ops={column: "gin_trgm_ops"})
+
+    @event.listens_for(index, "after_parent_attach")
+    def require_extension(index, parent):
+        # gin_trgm_ops comes with pg_trgm, so create_all installs it before the table
+        event.listen(parent, "before_create", DDL(CREATE_TRIGRAM_EXTENSION).execute_if(dialect="postgresql"))
+
+    return index
+
+def trigram_index_ddl(name: str) -> str:
+    """Statement building a trigram index on a live table without blocking writes"""
+    table, column = TRIGRAM_INDEXES[name]
+    return f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} USING gin ({column} gin_trgm_ops)"
+
+async def check_search_indexes(session) -> List[str]:
+    """Warn about every trigram index (or the pg_trgm extension) missing from the database; returns their names"""
+    missing = []
+    extension = await session.scalar(text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'"))
+    if extension is None:
+        missing.append("pg_trgm")
+    present = set((await session.execute(
+        text("SELECT indexname FROM pg_indexes WHERE indexname = ANY(:names)"),
+        {"names": list(TRIGRAM_INDEXES)}
+    )).scalars())
+    missing += sorted(name for name in TRIGRAM_INDEXES if name not in present)
+
+    for name in missing:
+        if name == "pg_trgm":
+            logger.warning("The pg_trgm extension is not installed; taxonomy searches will scan whole tables")
+        else:
+            table, column = TRIGRAM_INDEXES[name]
+            logger.warning(f"Trigram index {name} on {table}.{column} is missing; searches on it will scan the whole table")
+    if missing:
+        logger.warning("Run python util/create_trigram_indexes.py to create the missing search indexes")
+    return missing
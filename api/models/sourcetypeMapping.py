@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, Text, Integer, ARRAY, ForeignKey, Index, PrimaryKeyConstraint
+from sqlalchemy import Column, String, DateTime, Text, Integer, ARRAY, ForeignKey, Index, PrimaryKeyConstraint, func
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from .base import Base
@@ -9,10 +9,14 @@ class SourceTypeMapping(Base):
     insightwire_uuid = Column(Text, ForeignKey('insightwire.uuid'), nullable=False)
     source_type_id = Column(Integer, nullable=False)
     system_timestamp = Column(DateTime)
+    # When the row was written, as opposed to the event time in system_timestamp
+    ingested_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
 
     insightwire = relationship("InsightWire", back_populates="source_types")
 
     __table_args__ = (
         PrimaryKeyConstraint('insightwire_uuid', 'source_type_id'),
         Index('idx_source_type_mapping', 'source_type_id', 'insightwire_uuid'),
+        Index('idx_source_type_mapping_seek', 'source_type_id', 'system_timestamp', 'insightwire_uuid'),
+        Index('idx_source_type_mapping_ingested', 'ingested_at'),
     )
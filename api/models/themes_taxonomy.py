@@ -1,6 +1,7 @@
 from sqlalchemy import Column, String, Integer
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.ext.declarative import declarative_base
+from .search_indexes import trigram_index
 import uuid
 
 Base = declarative_base()
@@ -10,3 +11,7 @@ class ThemesTaxonomy(Base):
 
     theme_id = Column(Integer, primary_key=True, nullable=False)
     theme = Column(String, nullable=False, unique=True)
+
+    __table_args__ = (
+        trigram_index('themes_taxonomy', 'theme'),
+    )
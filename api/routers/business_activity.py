@@ -1,26 +1,26 @@
 # api/routers/business_events.py
-from fastapi import APIRouter, HTTPException, Depends
-from typing import Dict, Any
+from fastapi import APIRouter, HTTPException, Depends, Request
+from fastapi.responses import Response
 from util.taxonomy_reader import taxonomy_reader
 from api.core.security import verify_api_key
+from api.core.http_cache import prerendered_response
 
 router = APIRouter(prefix="/business-events", tags=["Business Events"])
 
 @router.get("/")
 async def get_business_events(
+    request: Request,
     api_key: str = Depends(verify_api_key)
-) -> Dict[str, Any]:
+) -> Response:
     """Get all business events taxonomy data"""
     try:
-        results = taxonomy_reader.search_taxonomy(
+        snapshot = taxonomy_reader.snapshot('business_events')
+        return await prerendered_response(
+            request,
             'business_events',
-            search_term=None,
-            field=None
+            snapshot.etag,
+            lambda: {"total_count": len(snapshot.data), "data": snapshot.data}
         )
-        return {
-            "total_count": len(results),
-            "data": results
-        }
     except KeyError:
         raise HTTPException(
             status_code=404,
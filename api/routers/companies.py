@@ -15,13 +15,19 @@ class CompanyRequest(BaseModel):
 async def search_companies(
     name: Optional[str] = Query(None, description="Search by company name"),
     url: Optional[str] = Query(None, description="Search by company URL"),
+    page: int = Query(1, ge=1, description="Page number"),
+    limit: int = Query(20, ge=1, le=100, description="Results per page"),
+    fuzzy: bool = Query(True, description="When no name contains the search term, return similar names with a similarity score"),
     api_key: str = Depends(verify_api_key)
 ) -> Dict[str, Any]:
     """
     Search companies by name or URL. 
     - name: searches in company_name field
-    - url: searches in company_url field
+    - url: searches in company_url field, compared by domain
     At least one parameter (name or URL) must be provided.
+    Results are ranked exact match, prefix, word prefix, then substring.
+    If no name contains the search term, similarly spelled names are returned
+    with match_type "fuzzy" and a similarity score between 0 and 1.
     """
     # Check if both parameters are empty
     if not name and not url:
@@ -31,10 +37,20 @@ async def search_companies(
         )
 
     try:
-        results = taxonomy_reader.search_companies(name=name, url=url)
+        total_count, results = taxonomy_reader.search_companies_page(name=name, url=url, page=page, limit=limit)
         
+        # Fall back to typo-tolerant matching when nothing contains the name
+        if total_count == 0 and name and fuzzy:
+            results = taxonomy_reader.fuzzy_search_companies(name, limit)
+            if results:
+                return {
+                    "total_count": len(results),
+                    "match_type": "fuzzy",
+                    "data": results
+                }
+
         # If search was performed but no results found
-        if len(results) == 0:
+        if total_count == 0:
             search_term = name if name else url
             raise HTTPException(
                 status_code=404,
@@ -44,6 +60,33 @@ async def search_companies(
                 }
             )
 
+        return {
+            "total_count": total_count,
+            "page": page,
+            "limit": limit,
+            "next_page": page + 1 if page * limit < total_count else None,
+            "match_type": "exact",
+            "data": results
+        }
+    except KeyError:
+        raise HTTPException(
+            status_code=404,
+            detail="Companies taxonomy not found"
+        )
+
+@router.get("/suggest")
+async def suggest_companies(
+    q: str = Query(..., min_length=1, description="Beginning of a company name, alias or domain"),
+    limit: int = Query(10, ge=1, le=50, description="Maximum number of suggestions"),
+    api_key: str = Depends(verify_api_key)
+) -> Dict[str, Any]:
+    """
+    Typeahead suggestions for the company picker.
+    Matches the start of company names, names without legal suffix (Ltd, Inc, ...)
+    and domains; shorter names are suggested first.
+    """
+    try:
+        results = taxonomy_reader.suggest_companies(q, limit)
         return {
             "total_count": len(results),
             "data": results
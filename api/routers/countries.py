@@ -1,26 +1,26 @@
 # api/routers/business_events.py
-from fastapi import APIRouter, HTTPException, Depends
-from typing import Dict, Any
+from fastapi import APIRouter, HTTPException, Depends, Request
+from fastapi.responses import Response
 from util.taxonomy_reader import taxonomy_reader
 from api.core.security import verify_api_key
+from api.core.http_cache import prerendered_response
 
 router = APIRouter(prefix="/countries", tags=["Countries"])
 
 @router.get("/")
 async def get_countries(
+    request: Request,
     api_key: str = Depends(verify_api_key)
-) -> Dict[str, Any]:
+) -> Response:
     """Get all countries taxonomy data"""
     try:
-        results = taxonomy_reader.search_taxonomy(
+        snapshot = taxonomy_reader.snapshot('countries')
+        return await prerendered_response(
+            request,
             'countries',
-            search_term=None,
-            field=None
+            snapshot.etag,
+            lambda: {"total_count": len(snapshot.data), "data": snapshot.data}
         )
-        return {
-            "total_count": len(results),
-            "data": results
-        }
     except KeyError:
         raise HTTPException(
             status_code=404,
@@ -1,16 +1,55 @@
 # api/routers/news.py
-from fastapi import APIRouter, Depends, Query
+import anyio
+from fastapi import APIRouter, Body, Depends, Query, Request
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import Optional
+from typing import Optional, List
+from pydantic import BaseModel, ConfigDict, Field
 from datetime import datetime, timedelta
 from api.core.security import verify_api_key
+from api.core.config import settings
+from api.core.http_cache import cached_json_response, INSIGHT_MAX_AGE
+from api.core.metadata_config import MAX_BATCH_QUERIES, MAX_SEARCH_LENGTH
 from api.services.metadata_service import MetadataService
-from util.database import get_async_db
+from util.database import get_read_db, read_session
 
 router = APIRouter(prefix="/insight", tags=["Insight"])
 
+class InsightQuery(BaseModel):
+    """One filter set of POST /insight/batch; the same parameters as GET /insight"""
+    model_config = ConfigDict(extra="forbid")
+
+    business_activity_id: Optional[List[int]] = None
+    industry_type_id: Optional[List[int]] = None
+    content_type_id: Optional[List[int]] = None
+    source_type_id: Optional[List[int]] = None
+    sentiment_type_id: Optional[List[int]] = None
+    location_ids: Optional[List[int]] = None
+    company_ids: Optional[List[int]] = None
+    start_date: Optional[str] = None
+    end_date: Optional[str] = None
+    page: int = 1
+    limit: int = 20
+    cursor: Optional[str] = None
+    match: str = Field("any", pattern="^(any|all)$")
+    count: str = Field("exact", pattern="^(exact|estimate|none)$")
+    fields: Optional[List[str]] = None
+    q: Optional[str] = Field(None, max_length=MAX_SEARCH_LENGTH)
+
+def _default_date_window(start_date: Optional[str], end_date: Optional[str]) -> tuple:
+    """Default to the 30 days ending at end_date (today when not given)"""
+    if not start_date and not end_date:
+        end_date = datetime.now().strftime("%Y-%m-%d")
+        start_date = (datetime.now() - timedelta(days=30)).strftime("%Y-%m-%d")
+    elif not start_date:
+        start_date = (datetime.strptime(end_date, "%Y-%m-%d") - timedelta(days=30)).strftime("%Y-%m-%d")
+    elif not end_date:
+        end_date = datetime.now().strftime("%Y-%m-%d")
+    return start_date, end_date
+
 @router.get("/")
 async def news_insight(
+    request: Request,
     # uuid: Optional[str] = None, 
     # lead_paragraph: Optional[str] = None,
     # news_url: Optional[str] = None,
@@ -27,31 +66,29 @@ async def news_insight(
     # locations: Optional[str] = None,
     # content_languages: Optional[str] = None,
     # image_url: Optional[str] = None,
-    business_activity_id: Optional[int] = None,
-    industry_type_id: Optional[int] = None,
-    content_type_id: Optional[int] = None,
-    source_type_id: Optional[int] = None,
-    sentiment_type_id: Optional[int] = None,
-    location_ids: Optional[int] = None,
-    company_ids: Optional[int] = None,
+    business_activity_id: Optional[List[int]] = Query(None, description="One or more business activity ids"),
+    industry_type_id: Optional[List[int]] = Query(None, description="One or more industry ids"),
+    content_type_id: Optional[List[int]] = Query(None, description="One or more content type ids"),
+    source_type_id: Optional[List[int]] = Query(None, description="One or more source type ids"),
+    sentiment_type_id: Optional[List[int]] = Query(None, description="One or more sentiment ids"),
+    location_ids: Optional[List[int]] = Query(None, description="One or more location ids"),
+    company_ids: Optional[List[int]] = Query(None, description="One or more company ids, e.g. company_ids=10000001&company_ids=10000002"),
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
     page: int = 1,
     limit: int = 20,
-    db: AsyncSession = Depends(get_async_db),
+    cursor: Optional[str] = Query(None, description="Opaque next_cursor from a previous response. Send an empty value to start cursor pagination; page is ignored in cursor mode"),
+    match: str = Query("any", pattern="^(any|all)$", description="With several ids for one filter, match articles with any of them or with all of them"),
+    count: str = Query("exact", pattern="^(exact|estimate|none)$", description="total_count mode: exact, estimate (cached exact count or planner estimate) or none"),
+    q: Optional[str] = Query(None, max_length=MAX_SEARCH_LENGTH, description='Full-text search over title, lead paragraph and story, ranked by relevance. Words must all match; "quoted words" match a phrase, word* a prefix, -word excludes and OR matches either term'),
+    fields: Optional[str] = Query(None, description="Comma-separated response fields, e.g. fields=title,published_date,news_url, or * for all of them. story_id is always returned; story only when requested"),
+    db: AsyncSession = Depends(get_read_db),
     api_key: str = Depends(verify_api_key)
 ):
-    # Set default date range if not provided
-    if not start_date and not end_date:
-        end_date = datetime.now().strftime("%Y-%m-%d")
-        start_date = (datetime.now() - timedelta(days=30)).strftime("%Y-%m-%d")
-    elif not start_date:
-        start_date = (datetime.strptime(end_date, "%Y-%m-%d") - timedelta(days=30)).strftime("%Y-%m-%d")
-    elif not end_date:
-        end_date = datetime.now().strftime("%Y-%m-%d")
+    start_date, end_date = _default_date_window(start_date, end_date)
 
     service = MetadataService(db)
-    return await service.get_news_insights(
+    result = await service.get_news_insights(
         # uuid=uuid,  
         # lead_paragraph=lead_paragraph,
         # news_url=news_url,
@@ -78,5 +115,128 @@ async def news_insight(
         start_date=start_date,
         end_date=end_date,
         page=page,
-        limit=limit
-    )
\ No newline at end of file
+        limit=limit,
+        cursor=cursor,
+        count=count,
+        match=match,
+        q=q,
+        fields=fields.split(",") if fields else None
+    )
+    return cached_json_response(request, result, max_age=INSIGHT_MAX_AGE)
+
+@router.post("/batch")
+async def news_insight_batch(
+    queries: List[InsightQuery] = Body(..., min_length=1, max_length=MAX_BATCH_QUERIES, description="Filter sets, each with the parameters of GET /insight"),
+    api_key: str = Depends(verify_api_key)
+):
+    """
+    Run several /insight queries in one call.
+
+    Results come back in the order of the request, each with its own status
+    (200, 400 for invalid filters, 500 for a failed query) and the response
+    GET /insight would have returned. Identical filter sets run once.
+    """
+    filter_sets = []
+    for query in queries:
+        filters = query.model_dump()
+        try:
+            filters['start_date'], filters['end_date'] = _default_date_window(filters['start_date'], filters['end_date'])
+        except ValueError:
+            pass  # Reported as a 400 for this filter set
+        filter_sets.append(filters)
+
+    results = await MetadataService.get_news_insights_batch(
+        filter_sets,
+        read_session,
+        concurrency=settings.INSIGHT_BATCH_CONCURRENCY
+    )
+    return {"total_count": len(results), "results": results}
+
+@router.get("/facets")
+async def news_insight_facets(
+    request: Request,
+    business_activity_id: Optional[List[int]] = Query(None, description="One or more business activity ids"),
+    industry_type_id: Optional[List[int]] = Query(None, description="One or more industry ids"),
+    content_type_id: Optional[List[int]] = Query(None, description="One or more content type ids"),
+    source_type_id: Optional[List[int]] = Query(None, description="One or more source type ids"),
+    sentiment_type_id: Optional[List[int]] = Query(None, description="One or more sentiment ids"),
+    location_ids: Optional[List[int]] = Query(None, description="One or more location ids"),
+    company_ids: Optional[List[int]] = Query(None, description="One or more company ids"),
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    match: str = Query("any", pattern="^(any|all)$", description="With several ids for one filter, match articles with any of them or with all of them"),
+    top_n: int = Query(10, ge=1, le=100, description="Maximum number of values returned per facet, most frequent first"),
+    db: AsyncSession = Depends(get_read_db),
+    api_key: str = Depends(verify_api_key)
+):
+    """Article counts per industry, business activity, sentiment, source type and location for the given filters"""
+    start_date, end_date = _default_date_window(start_date, end_date)
+
+    service = MetadataService(db)
+    result = await service.get_insight_facets(
+        top_n=top_n,
+        business_activity_id=business_activity_id,
+        industry_type_id=industry_type_id,
+        content_type_id=content_type_id,
+        source_type_id=source_type_id,
+        sentiment_type_id=sentiment_type_id,
+        location_ids=location_ids,
+        company_ids=company_ids,
+        start_date=start_date,
+        end_date=end_date,
+        match=match
+    )
+    return cached_json_response(request, result, max_age=INSIGHT_MAX_AGE)
+
+@router.get("/export")
+async def export_news_insight(
+    business_activity_id: Optional[List[int]] = Query(None, description="One or more business activity ids"),
+    industry_type_id: Optional[List[int]] = Query(None, description="One or more industry ids"),
+    content_type_id: Optional[List[int]] = Query(None, description="One or more content type ids"),
+    source_type_id: Optional[List[int]] = Query(None, description="One or more source type ids"),
+    sentiment_type_id: Optional[List[int]] = Query(None, description="One or more sentiment ids"),
+    location_ids: Optional[List[int]] = Query(None, description="One or more location ids"),
+    company_ids: Optional[List[int]] = Query(None, description="One or more company ids"),
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    match: str = Query("any", pattern="^(any|all)$", description="With several ids for one filter, match articles with any of them or with all of them"),
+    export_format: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$", description="ndjson (one JSON object per line) or csv"),
+    db: AsyncSession = Depends(get_read_db),
+    api_key: str = Depends(verify_api_key)
+):
+    """Stream every insight matching the filters, newest first, without pagination"""
+    start_date, end_date = _default_date_window(start_date, end_date)
+
+    stmt = await MetadataService(db).build_export_query(
+        business_activity_id=business_activity_id,
+        industry_type_id=industry_type_id,
+        content_type_id=content_type_id,
+        source_type_id=source_type_id,
+        sentiment_type_id=sentiment_type_id,
+        location_ids=location_ids,
+        company_ids=company_ids,
+        start_date=start_date,
+        end_date=end_date,
+        match=match
+    )
+    if isinstance(stmt, dict):  # Error response
+        return JSONResponse(stmt, status_code=400)
+
+    async def rows():
+        # The request's session is closed before a streamed body is sent,
+        # so the export holds its own for as long as it streams
+        session = read_session()
+        try:
+            async for chunk in MetadataService(session).stream_export(stmt, export_format):
+                yield chunk
+        finally:
+            # A client disconnect cancels the stream; the connection must still go back to the pool
+            with anyio.CancelScope(shield=True):
+                await session.close()
+
+    media_type = "text/csv" if export_format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        rows(),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="insights.{export_format}"'}
+    )
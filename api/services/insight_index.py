@@ -0,0 +1,269 @@
+# api/services/insight_index.py
+import asyncio
+import logging
+import time
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import func, select, text, union_all
+from api.services.query_builder import DIMENSION_MODELS
+
+try:
+    from pyroaring import BitMap
+except ImportError:  # pragma: no cover - the index is optional
+    BitMap = None
+
+logger = logging.getLogger(__name__)
+
+# Sort key used for articles without any mapping timestamp
+_NO_TIMESTAMP = datetime.min
+
+class InsightIndex:
+    """
+    In-process inverted index over the insight mapping tables.
+
+    Every article gets a dense integer id, assigned in (system_timestamp, uuid)
+    order, so a time window is a contiguous id range and "newest first" is
+    descending id order. Each (dimension, id) pair keeps a compressed Roaring
+    bitmap of article ids, so AND/OR filters and counts are bitmap
+    intersections and unions; only the uuids of the final page are fetched
+    from the database.
+
+    An article's place in time is its newest mapping timestamp, while SQL
+    filters and orders on the timestamp of the driver mapping table. The two
+    agree whenever all mapping rows of an article share one timestamp, which
+    is how articles are ingested. Articles whose rows differ are tracked, and
+    a query matching any of them is left to SQL (see agrees_with_sql).
+
+    The index is built from the database at startup and refreshed afterwards
+    with the mapping rows written since, by their ingested_at marker rather
+    than their event timestamp, so late and back-dated rows are picked up too.
+    Rows are re-read over an overlap window, which covers ingest transactions
+    that commit after a refresh but stamped ingested_at before it. A refresh
+    adding an article older than the newest indexed one would break the
+    id/time order and rebuilds the index instead. Refreshes only add:
+    deleted articles and removed mapping rows disappear at the next full
+    rebuild, every rebuild_interval seconds.
+    """
+
+    def __init__(self):
+        self.ready = False
+        self._uuids: List[str] = []
+        self._keys: List[Tuple[datetime, str]] = []
+        self._ids: Dict[str, int] = {}
+        self._bitmaps: Dict[str, Dict[int, "BitMap"]] = {}
+        # Articles whose mapping rows carry different timestamps
+        self._divergent: Optional["BitMap"] = None
+        self._loaded_at = 0.0
+        # Database time at the start of the last load or refresh
+        self._marker: Optional[datetime] = None
+        self.overlap = timedelta(seconds=600)
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def available(self) -> bool:
+        return BitMap is not None
+
+    def __len__(self) -> int:
+        return len(self._uuids)
+
+    # Mapping tables are read through their Core columns: selecting model
+    # attributes would configure the mapping models, whose InsightWire
+    # relationship cannot resolve
+
+    @staticmethod
+    def _timestamps_query(ingested_since: Optional[datetime] = None):
+        """Oldest and newest mapping timestamp per article, optionally only over rows ingested since then"""
+        selects = []
+        for model in DIMENSION_MODELS.values():
+            table = model.__table__
+            stmt = select(table.c.insightwire_uuid.label("uuid"), table.c.system_timestamp.label("ts"))
+            if ingested_since is not None:
+                stmt = stmt.where(table.c.ingested_at >= ingested_since)
+            selects.append(stmt)
+        rows = union_all(*selects).subquery()
+        return select(rows.c.uuid, func.min(rows.c.ts), func.max(rows.c.ts)).group_by(rows.c.uuid)
+
+    async def load(self, session) -> None:
+        """Build the index from scratch and swap it in"""
+        if not self.available:
+            logger.warning("pyroaring is not installed; the insight index is disabled")
+            return
+        async with self._lock:
+            started = datetime.now()
+            for model in DIMENSION_MODELS.values():
+                if not await self._has_ingest_marker(session, model.__tablename__):
+                    raise RuntimeError(
+                        f"{model.__tablename__}.ingested_at is missing; run python -m util.add_ingest_markers"
+                    )
+            marker = await session.scalar(select(func.now()))
+            articles = (await session.execute(self._timestamps_query())).all()
+            keys = sorted((ts or _NO_TIMESTAMP, str(uuid)) for uuid, _, ts in articles)
+            ids = {uuid: dense_id for dense_id, (_, uuid) in enumerate(keys)}
+            divergent = BitMap(ids[str(uuid)] for uuid, oldest, newest in articles if oldest != newest)
+
+            bitmaps: Dict[str, Dict[int, BitMap]] = {}
+            for name, model in DIMENSION_MODELS.items():
+                postings: Dict[int, List[int]] = {}
+                table = model.__table__
+                result = await session.stream(select(table.c.insightwire_uuid, table.c[name]))
+                async for uuid, dimension_id in result:
+                    dense_id = ids.get(str(uuid))
+                    if dense_id is not None:
+                        postings.setdefault(dimension_id, []).append(dense_id)
+                bitmaps[name] = {dimension_id: BitMap(values) for dimension_id, values in postings.items()}
+                for bitmap in bitmaps[name].values():
+                    bitmap.run_optimize()
+
+            self._keys, self._ids, self._bitmaps, self._divergent = keys, ids, bitmaps, divergent
+            self._uuids = [uuid for _, uuid in keys]
+            self._loaded_at = time.monotonic()
+            self._marker = marker
+            self.ready = True
+            logger.info(
+                f"Insight index loaded: {len(keys)} articles ({len(divergent)} with differing mapping timestamps) "
+                f"in {(datetime.now() - started).total_seconds():.1f}s"
+            )
+
+    @staticmethod
+    async def _has_ingest_marker(session, table: str) -> bool:
+        return await session.scalar(
+            text("SELECT 1 FROM information_schema.columns WHERE table_name = :table AND column_name = 'ingested_at'"),
+            {"table": table}
+        ) is not None
+
+    async def refresh(self, session) -> None:
+        """Add mapping rows ingested since the last load or refresh, whatever their event timestamp"""
+        if not self.ready or not self._keys:
+            return await self.load(session)
+        marker = await session.scalar(select(func.now()))
+        since = self._marker - self.overlap
+        articles = (await session.execute(self._timestamps_query(since))).all()
+        new_articles = [(str(uuid), oldest, newest) for uuid, oldest, newest in articles if str(uuid) not in self._ids]
+        new_keys = sorted((newest or _NO_TIMESTAMP, uuid) for uuid, _, newest in new_articles)
+        if new_keys and self._keys and new_keys[0] < self._keys[-1]:
+            logger.info("Insight index refresh is out of time order, rebuilding")
+            return await self.load(session)
+
+        rows = {}
+        for name, model in DIMENSION_MODELS.items():
+            table = model.__table__
+            stmt = (
+                select(table.c.insightwire_uuid, table.c[name], table.c.system_timestamp)
+                .where(table.c.ingested_at >= since)
+            )
+            rows[name] = (await session.execute(stmt)).all()
+
+        # Applied without awaiting in between, so no request sees a half-applied refresh
+        async with self._lock:
+            for key in new_keys:
+                self._ids[key[1]] = len(self._uuids)
+                self._uuids.append(key[1])
+                self._keys.append(key)
+            for uuid, oldest, newest in new_articles:
+                if oldest != newest:
+                    self._divergent.add(self._ids[uuid])
+            for name, mapped in rows.items():
+                for uuid, dimension_id, timestamp in mapped:
+                    dense_id = self._ids.get(str(uuid))
+                    if dense_id is not None:
+                        self._bitmaps[name].setdefault(dimension_id, BitMap()).add(dense_id)
+                        # A mapping added later to an already indexed article
+                        if (timestamp or _NO_TIMESTAMP) != self._keys[dense_id][0]:
+                            self._divergent.add(dense_id)
+            self._marker = marker
+        if new_keys:
+            logger.info(f"Insight index refreshed: {len(new_keys)} new articles")
+
+    def match(self, dimension_filters: Dict[str, List[int]], match_all: bool = False) -> "BitMap":
+        """Dense ids of articles matching every dimension (any or all of its ids), at any time"""
+        result = None
+        for name, ids in dimension_filters.items():
+            postings = [self._bitmaps.get(name, {}).get(dimension_id, BitMap()) for dimension_id in ids]
+            matched = BitMap.intersection(*postings) if match_all else BitMap.union(*postings)
+            result = matched if result is None else result & matched
+        if result is None:
+            result = BitMap(range(len(self._uuids)))
+        return result
+
+    def agrees_with_sql(self, dimension_filters: Dict[str, List[int]], match_all: bool = False) -> bool:
+        """Whether windows and order of these filters are the same by any mapping table's timestamp"""
+        return not self._divergent or not self._divergent.intersect(self.match(dimension_filters, match_all))
+
+    def search(
+        self,
+        dimension_filters: Dict[str, List[int]],
+        match_all: bool = False,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None
+    ) -> "BitMap":
+        """Dense ids of articles matching every dimension (any or all of its ids) within the window"""
+        result = self.match(dimension_filters, match_all)
+        if start_date is not None or end_date is not None:
+            low = bisect_left(self._keys, (start_date,)) if start_date else 0
+            high = bisect_right(self._keys, (end_date, chr(0x10FFFF))) if end_date else len(self._keys)
+            result = result & BitMap(range(low, high))
+        return result
+
+    def page(self, result: "BitMap", offset: int, limit: int) -> List[int]:
+        """Dense ids of one page, newest first"""
+        total = len(result)
+        return [result[total - 1 - position] for position in range(offset, min(offset + limit, total))]
+
+    def page_after(self, result: "BitMap", cursor_key: Optional[Tuple[datetime, str]], limit: int) -> List[int]:
+        """Dense ids of the page after cursor_key, newest first, plus one extra id when more follow"""
+        end = len(result)
+        if cursor_key is not None:
+            position = bisect_left(self._keys, cursor_key)
+            end = result.rank(position - 1) if position > 0 else 0
+        return [result[index] for index in range(end - 1, max(end - limit - 2, -1), -1)]
+
+    def facet_counts(self, result: "BitMap", name: str, top_n: int) -> List[Tuple[int, int]]:
+        """(id, article count) of the top_n ids of a dimension within result, most frequent first"""
+        counts = [
+            (dimension_id, result.intersection_cardinality(bitmap))
+            for dimension_id, bitmap in self._bitmaps.get(name, {}).items()
+        ]
+        counts = [(dimension_id, count) for dimension_id, count in counts if count]
+        counts.sort(key=lambda item: (-item[1], item[0]))
+        return counts[:top_n]
+
+    def key(self, dense_id: int) -> Tuple[Optional[datetime], str]:
+        """(system_timestamp, uuid) sort key of an article"""
+        timestamp, uuid = self._keys[dense_id]
+        return (None if timestamp == _NO_TIMESTAMP else timestamp), uuid
+
+    def uuid(self, dense_id: int) -> str:
+        return self._uuids[dense_id]
+
+    async def _run(self, session_factory, interval: int, rebuild_interval: int) -> None:
+        """Load the index, then refresh it every interval seconds and rebuild it every rebuild_interval seconds"""
+        while True:
+            try:
+                async with session_factory() as session:
+                    if self.ready and rebuild_interval > 0 and time.monotonic() - self._loaded_at >= rebuild_interval:
+                        await self.load(session)
+                    else:
+                        await self.refresh(session)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Insight index refresh failed: {str(e)}", exc_info=True)
+            await asyncio.sleep(interval)
+
+    def start(self, session_factory, interval: int, rebuild_interval: int = 0, overlap: int = 600) -> None:
+        """Start loading, refreshing and rebuilding the index in the background"""
+        self.overlap = timedelta(seconds=overlap)
+        if self._task is None and self.available:
+            self._task = asyncio.create_task(self._run(session_factory, interval, rebuild_interval))
+
+    async def stop(self) -> None:
+        """Cancel the background refresh"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+# Create a singleton instance
+insight_index = InsightIndex()
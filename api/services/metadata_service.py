@@ -1,10 +1,20 @@
 # api/services/metadata_service.py
+import asyncio
 import logging
+import anyio
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import func
-from typing import Optional, Type, Any, Dict, List
-from api.core.cache import cache_response
+from sqlalchemy import func, tuple_, text, literal, null, union_all
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import load_only
+from typing import Optional, Type, Any, Dict, List, AsyncIterator
+from api.core.cache import cache_response, caches, build_cache_key
+from api.core.cache_backends import MISSING
+from api.services.query_builder import (
+    InsightQueryBuilder, DIMENSION_MODELS, parse_search_query, search_predicate, search_rank, taxonomy_search
+)
+from api.services.insight_index import insight_index
+from api.core.config import settings
 from api.models import (
     InsightWire, IndustryMapping, BusinessActivityMapping, 
     CompanyMapping, ContentTypeMapping, LocationMapping, 
@@ -13,12 +23,16 @@ from api.models import (
 from sqlalchemy import String, Integer
 from datetime import datetime
 import json
-from functools import lru_cache
 import hashlib
+import base64
+import csv
+import io
+from uuid import UUID
 from pydantic import BaseModel, Field
 from api.core.metadata_config import (
     VALID_VALUES, FILTER_NAME_MAPPING, VALID_FILTERS,
-    PAGINATION_PARAMS, CACHE_CONFIG, RESPONSE_SCHEMA_FIELDS
+    PAGINATION_PARAMS, CACHE_CONFIG, RESPONSE_SCHEMA_FIELDS, MAX_FILTER_IDS,
+    FACET_DIMENSIONS, EXPORT_CHUNK_SIZE, EXPORT_FIELDS, DEFAULT_INSIGHT_FIELDS
 )
 
 # Configure logging
@@ -43,6 +57,10 @@ class ResponseSchema(BaseModel):
     content_languages: Optional[str]
     sentiment: Optional[str]
 
+def _is_cacheable_response(result: Any) -> bool:
+    """Do not cache error responses, so a transient DB failure is not served for a whole TTL"""
+    return not (isinstance(result, dict) and result.get("error"))
+
 class MetadataService:
     def __init__(self, db: AsyncSession):
         self.db = db
@@ -60,13 +78,6 @@ class MetadataService:
             'source_type': (SourceTypeMapping, 'source_type_id')
         }
 
-    @lru_cache(maxsize=CACHE_CONFIG['max_size'])
-    def _generate_cache_key(self, **kwargs) -> str:
-        """Generate a unique cache key based on filter parameters"""
-        sorted_kwargs = sorted(kwargs.items())
-        key_string = json.dumps(sorted_kwargs)
-        return f"{CACHE_CONFIG['version']}:{hashlib.md5(key_string.encode()).hexdigest()}"
-
     def validate_filter_value(self, filter_name: str, value: Any) -> tuple[bool, str]:
         """Validate if the filter value is valid for the given filter type."""
         actual_filter_name = FILTER_NAME_MAPPING.get(filter_name, filter_name)
@@ -87,75 +98,304 @@ class MetadataService:
         except ValueError:
             return False, f"Invalid {filter_name}. Must be a valid integer."
 
-    def _standardize_response_schema(self, data: List[Any]) -> List[Dict[str, Any]]:
-        """Standardize the order of fields in the response data"""
+    def _standardize_response_schema(self, data: List[Any], fields: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Standardize the order of fields in the response data, keeping only fields when given"""
+        # Response field and model attribute, in response order
+        attributes = [(field, "uuid" if field == "story_id" else field) for field in (fields or EXPORT_FIELDS)]
         standardized_data = []
         for item in data:
-            # Define the order of fields
-            standardized_item = {
-                "story_id": getattr(item, "uuid", None),
-                "title": getattr(item, "title", None),
-                "lead_paragraph": getattr(item, "lead_paragraph", None),
-                "story": getattr(item, "story", None),
-                "published_date": getattr(item, "published_date", None),
-                "news_url": getattr(item, "news_url", None),
-                "image_url": getattr(item, "image_url", None),
-                "type_of_content": getattr(item, "type_of_content", None),
-                "type_of_source": getattr(item, "type_of_source", None),
-                "sources": getattr(item, "sources", None),
-                "business_activities": getattr(item, "business_activities", None),
-                "industries": getattr(item, "industries", None),
-                "locations": getattr(item, "locations", None),
-                "content_languages": getattr(item, "content_languages", None),
-                "sentiment": getattr(item, "sentiment", None)
-            }
-            # Remove None values
-            standardized_item = {k: v for k, v in standardized_item.items() if v is not None}
+            standardized_item = {}
+            for field, attribute in attributes:
+                value = getattr(item, attribute, None)
+                # Remove None values
+                if value is not None:
+                    standardized_item[field] = value
             standardized_data.append(standardized_item)
         return standardized_data
 
-    async def paginate_query(self, stmt, page: int, limit: int):
+    def _resolve_fields(self, fields: Optional[Any]) -> tuple[List[str], str]:
+        """Response fields of a fields= projection in response order, and an error message ("" when valid)"""
+        requested = fields.split(",") if isinstance(fields, str) else (fields or [])
+        requested = {field.strip() for field in requested if field and field.strip()}
+        if not requested:
+            return list(DEFAULT_INSIGHT_FIELDS), ""
+        if "*" in requested:
+            return list(EXPORT_FIELDS), ""
+        unknown = requested - set(EXPORT_FIELDS)
+        if unknown:
+            return [], f"Invalid fields: {', '.join(sorted(unknown))}. Valid fields are: {', '.join(EXPORT_FIELDS)}"
+        # Every item keeps its id
+        requested.add("story_id")
+        return [field for field in EXPORT_FIELDS if field in requested], ""
+
+    def _load_only(self, fields: List[str]):
+        """Loader option fetching only the insightwire columns behind fields"""
+        return load_only(*[getattr(InsightWire, "uuid" if field == "story_id" else field) for field in fields])
+
+    async def paginate_query(self, stmt, page: int, limit: int, order_by: Optional[tuple] = None, count: str = "exact", fields: Optional[List[str]] = None):
         """Handle pagination for database queries with performance optimization"""
         page = max(1, page)
         limit = max(1, min(100, limit))
+        count_type = count
         
         try:
-            # Use a single query for count and data
-            count_stmt = select(func.count()).select_from(stmt.subquery())
-            total_count = await self.db.scalar(count_stmt)
+            total_count, count_type = await self._count_query(stmt, count)
             
-            if total_count == 0:
-                return self._create_empty_response(page, limit, "No records found matching the specified criteria")
+            if total_count == 0 and count_type == "exact":
+                return self._create_empty_response(page, limit, "No records found matching the specified criteria", count_type=count_type)
             
             offset = (page - 1) * limit
-            if offset >= total_count:
-                return self._create_empty_response(page, limit, "No records found for the specified page", total_count)
+            if count_type == "exact" and offset >= total_count:
+                return self._create_empty_response(page, limit, "No records found for the specified page", total_count, count_type)
             
             # Optimize query with proper indexing hints
-            offset_stmt = stmt.offset(offset).limit(limit)
+            if order_by:
+                stmt = stmt.order_by(*order_by)
+            if fields:
+                stmt = stmt.options(self._load_only(fields))
+            # Fetch one extra row so next_page does not depend on an exact count
+            offset_stmt = stmt.offset(offset).limit(limit + 1)
             results = await self.db.scalars(offset_stmt)
             records = results.all()
+            has_more = len(records) > limit
+            records = records[:limit]
             
             # Log performance metrics
-            logger.info(f"Query executed successfully. Total records: {total_count}, Page: {page}, Limit: {limit}")
+            logger.info(f"Query executed successfully. Total records: {total_count} ({count_type}), Page: {page}, Limit: {limit}")
             
             return {
                 "total_count": total_count,
+                "count_type": count_type,
                 "page": page,
                 "limit": limit,
                 "prev_page": page - 1 if page > 1 else None,
-                "next_page": page + 1 if (page * limit) < total_count else None,
-                "data": self._standardize_response_schema(records),
-                "message": f"Found {total_count} records"
+                "next_page": page + 1 if has_more else None,
+                "data": self._standardize_response_schema(records, fields),
+                "message": self._count_message(total_count, count_type)
             }
         except Exception as e:
             logger.error(f"Error in paginate_query: {str(e)}", exc_info=True)
-            return self._create_empty_response(page, limit, f"Error retrieving records: {str(e)}")
+            return self._create_empty_response(page, limit, f"Error retrieving records: {str(e)}", count_type=count_type, error=True)
+
+    async def paginate_keyset(self, stmt, cursor: Optional[str], limit: int, sort_columns: tuple, count: str = "exact", fields: Optional[List[str]] = None):
+        """Handle keyset (cursor) pagination, seeking past the last row of the previous page"""
+        limit = max(1, min(100, limit))
+        count_type = count
+
+        try:
+            timestamp_column, uuid_column = sort_columns
+            total_count, count_type = await self._count_query(stmt, count)
+
+            if total_count == 0 and count_type == "exact":
+                return self._create_empty_cursor_response(limit, "No records found matching the specified criteria", count_type=count_type)
+
+            if cursor:
+                try:
+                    last_timestamp, last_uuid = self._decode_cursor(cursor)
+                except ValueError:
+                    return self._create_empty_cursor_response(limit, "Invalid cursor. Please use the next_cursor value from a previous response.", total_count, count_type)
+                if (timestamp_column is None) != (last_timestamp is None):
+                    return self._create_empty_cursor_response(limit, "Cursor does not match the specified filters", total_count, count_type)
+                if timestamp_column is None:
+                    stmt = stmt.filter(uuid_column < UUID(last_uuid))
+                else:
+                    stmt = stmt.filter(tuple_(timestamp_column, uuid_column) < tuple_(last_timestamp, last_uuid))
+
+            # Fetch one extra row to know whether another page exists
+            order_by = self._sort_order(sort_columns)
+            page_stmt = stmt.add_columns(*[column for column in sort_columns if column is not None])
+            page_stmt = page_stmt.order_by(*order_by).limit(limit + 1)
+            if fields:
+                page_stmt = page_stmt.options(self._load_only(fields))
+            rows = (await self.db.execute(page_stmt)).all()
+
+            has_more = len(rows) > limit
+            rows = rows[:limit]
+            next_cursor = None
+            if has_more:
+                last_row = rows[-1]
+                if timestamp_column is None:
+                    next_cursor = self._encode_cursor(None, last_row[1])
+                else:
+                    next_cursor = self._encode_cursor(last_row[1], last_row[2])
+
+            logger.info(f"Keyset query executed successfully. Total records: {total_count} ({count_type}), Limit: {limit}, Has more: {has_more}")
+
+            return {
+                "total_count": total_count,
+                "count_type": count_type,
+                "limit": limit,
+                "cursor": cursor or None,
+                "next_cursor": next_cursor,
+                "data": self._standardize_response_schema([row[0] for row in rows], fields),
+                "message": self._count_message(total_count, count_type)
+            }
+        except Exception as e:
+            logger.error(f"Error in paginate_keyset: {str(e)}", exc_info=True)
+            return self._create_empty_cursor_response(limit, f"Error retrieving records: {str(e)}", count_type=count_type, error=True)
+
+    async def paginate_index(self, builder: InsightQueryBuilder, window: tuple, page: int, limit: int, cursor: Optional[str], count: str = "exact", fields: Optional[List[str]] = None):
+        """Answer filters and counts from the in-memory insight index, fetching only the page's rows"""
+        limit = max(1, min(100, limit))
+        # The bitmap cardinality is an exact count
+        count_type = "none" if count == "none" else "exact"
+
+        def empty(message: str, total_count: Optional[int] = 0, error: bool = False) -> dict:
+            if cursor is not None:
+                return self._create_empty_cursor_response(limit, message, total_count, count_type, error)
+            return self._create_empty_response(page, limit, message, total_count, count_type, error)
+
+        try:
+            matched = insight_index.search(builder.dimension_filters, builder.match_all, *window)
+            total_count = None if count_type == "none" else len(matched)
 
-    def _create_empty_response(self, page: int, limit: int, message: str, total_count: int = 0) -> dict:
-        """Create a standardized empty response."""
-        return {
+            if cursor is not None:
+                cursor_key = None
+                if cursor:
+                    try:
+                        last_timestamp, last_uuid = self._decode_cursor(cursor)
+                    except ValueError:
+                        return empty("Invalid cursor. Please use the next_cursor value from a previous response.", total_count)
+                    cursor_key = (last_timestamp or datetime.min, last_uuid)
+                dense_ids = insight_index.page_after(matched, cursor_key, limit)
+            else:
+                dense_ids = insight_index.page(matched, (page - 1) * limit, limit + 1)
+
+            has_more = len(dense_ids) > limit
+            dense_ids = dense_ids[:limit]
+            if not dense_ids:
+                return empty("No records found matching the specified criteria", total_count)
+
+            uuids = [insight_index.uuid(dense_id) for dense_id in dense_ids]
+            stmt = select(InsightWire).where(InsightWire.uuid.in_([UUID(u) for u in uuids]))
+            if fields:
+                stmt = stmt.options(self._load_only(fields))
+            records = (await self.db.scalars(stmt)).all()
+            by_uuid = {str(record.uuid): record for record in records}
+            data = self._standardize_response_schema([by_uuid[u] for u in uuids if u in by_uuid], fields)
+
+            logger.info(f"Index query executed successfully. Total records: {total_count} ({count_type}), Limit: {limit}, Has more: {has_more}")
+
+            result = {
+                "total_count": total_count,
+                "count_type": count_type,
+                "limit": limit,
+                "data": data,
+                "message": self._count_message(total_count, count_type)
+            }
+            if cursor is not None:
+                result["cursor"] = cursor or None
+                result["next_cursor"] = self._encode_cursor(*insight_index.key(dense_ids[-1])) if has_more else None
+            else:
+                result["page"] = page
+                result["prev_page"] = page - 1 if page > 1 else None
+                result["next_page"] = page + 1 if has_more else None
+            return result
+        except Exception as e:
+            logger.error(f"Error in paginate_index: {str(e)}", exc_info=True)
+            return empty(f"Error retrieving records: {str(e)}", error=True)
+
+    def _index_can_answer(self, builder: InsightQueryBuilder, kwargs: dict) -> bool:
+        """
+        The index covers dimension filters and date windows, but not insightwire
+        column filters or text search. It also declines filters matching an
+        article whose mapping timestamps differ, where its windows and order
+        would not follow the driver table's timestamp like SQL does.
+        """
+        return (
+            settings.INSIGHT_INDEX_ENABLED and insight_index.ready
+            and builder.driver() is not None
+            and not kwargs.get('q')
+            and not any(value is not None and hasattr(InsightWire, field) for field, value in kwargs.items())
+            and insight_index.agrees_with_sql(builder.dimension_filters, builder.match_all)
+        )
+
+    async def _count_query(self, stmt, count: str = "exact") -> tuple[Optional[int], str]:
+        """Count the rows matched by stmt according to the requested count mode.
+
+        Returns the count and the kind of count actually produced:
+        'exact', 'cached' (an exact count still within the count cache TTL),
+        'estimate' (planner row estimate) or 'none' (count skipped).
+        """
+        if count == "none":
+            return None, "none"
+
+        # Ordering does not change a count, so it is dropped from the subquery
+        count_stmt = select(func.count()).select_from(stmt.order_by(None).subquery())
+        key = self._count_cache_key(count_stmt)
+
+        if count == "estimate":
+            cached_count = await caches['count'].get(key)
+            if cached_count is not MISSING:
+                return cached_count, "cached"
+            return await self._estimate_count(stmt), "estimate"
+
+        total_count = await self.db.scalar(count_stmt)
+        await caches['count'].set(key, total_count)
+        return total_count, "exact"
+
+    async def _estimate_count(self, stmt) -> int:
+        """Read the planner's row estimate for stmt without executing it"""
+        compiled = stmt.compile(
+            dialect=postgresql.dialect(paramstyle="named"),
+            compile_kwargs={"render_postcompile": True}
+        )
+        plan = await self.db.scalar(text(f"EXPLAIN (FORMAT JSON) {compiled}"), compiled.params)
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+
+    def _count_cache_key(self, count_stmt) -> str:
+        """Build a cache key from the count SQL and its bound parameters"""
+        compiled = count_stmt.compile(dialect=postgresql.dialect())
+        key_string = f"{compiled}:{json.dumps(compiled.params, sort_keys=True, default=str)}"
+        return f"{CACHE_CONFIG['version']}:{hashlib.md5(key_string.encode()).hexdigest()}"
+
+    def _count_message(self, total_count: Optional[int], count_type: str) -> str:
+        """Describe the result size according to the kind of count returned"""
+        if count_type == "none":
+            return "Records found successfully"
+        if count_type == "estimate":
+            return f"Found approximately {total_count} records"
+        return f"Found {total_count} records"
+
+    def _sort_columns(self, joined_tables: set) -> tuple:
+        """Pick the deterministic (system_timestamp, uuid) sort key for an insight query.
+
+        The timestamp lives on the mapping tables, so the first joined mapping table
+        drives the order. Without any mapping join the uuid alone is used. The
+        columns are the table's: selecting mapping model attributes would make
+        SQLAlchemy configure the mapping models, whose InsightWire relationship
+        cannot resolve.
+        """
+        for filter_type, (model, _) in self.filter_mappings.items():
+            if f'{filter_type}_mapping' in joined_tables:
+                return model.__table__.c.system_timestamp, model.__table__.c.insightwire_uuid
+        return None, InsightWire.uuid
+
+    def _sort_order(self, sort_columns: tuple) -> tuple:
+        """Newest first, uuid as tie-breaker"""
+        return tuple(column.desc() for column in sort_columns if column is not None)
+
+    def _encode_cursor(self, timestamp: Optional[datetime], uuid: Any) -> str:
+        """Encode the sort key of the last returned row as an opaque cursor token"""
+        payload = json.dumps([timestamp.isoformat() if timestamp else None, str(uuid)])
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+    def _decode_cursor(self, cursor: str) -> tuple[Optional[datetime], str]:
+        """Decode a cursor token; raises ValueError when the token is malformed"""
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            timestamp, uuid = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            return (datetime.fromisoformat(timestamp) if timestamp else None), str(UUID(str(uuid)))
+        except (TypeError, ValueError, UnicodeDecodeError) as e:
+            raise ValueError(f"Invalid cursor: {cursor}") from e
+
+    def _create_empty_response(self, page: int, limit: int, message: str, total_count: Optional[int] = 0, count_type: str = "exact", error: bool = False) -> dict:
+        """Create a standardized empty response; error marks a failure rather than an empty result."""
+        response = {
             "total_count": total_count,
+            "count_type": count_type,
             "page": page,
             "limit": limit,
             "prev_page": page - 1 if page > 1 else None,
@@ -163,22 +403,39 @@ class MetadataService:
             "data": [],
             "message": message
         }
+        if error:
+            response["error"] = True
+        return response
+
+    def _create_empty_cursor_response(self, limit: int, message: str, total_count: Optional[int] = 0, count_type: str = "exact", error: bool = False) -> dict:
+        """Create a standardized empty response for cursor pagination."""
+        response = {
+            "total_count": total_count,
+            "count_type": count_type,
+            "limit": limit,
+            "next_cursor": None,
+            "data": [],
+            "message": message
+        }
+        if error:
+            response["error"] = True
+        return response
 
-    @cache_response(cache_type='long')
+    @cache_response(cache_type='long', cache_if=_is_cacheable_response)
     async def get_metadata(self, model: Type[Any], field: str, value: Optional[str], page: int = 1, limit: int = 20):
-        """Get metadata with pagination."""
+        """Get metadata with pagination, best matches first."""
         stmt = select(model)
         if value:
-            stmt = stmt.filter(getattr(model, field).ilike(f"%{value}%"))
+            stmt = taxonomy_search(stmt, getattr(model, field), value)
         return await self.paginate_query(stmt, page, limit)
 
-    @cache_response(cache_type='long')
+    @cache_response(cache_type='long', cache_if=_is_cacheable_response)
     async def get_all_metadata(self, model: Type[Any], field: str, value: Optional[str]):
-        """Get all metadata without pagination."""
+        """Get all metadata without pagination, best matches first."""
         try:
             stmt = select(model)
             if value:
-                stmt = stmt.filter(getattr(model, field).ilike(f"%{value}%"))
+                stmt = taxonomy_search(stmt, getattr(model, field), value)
             results = await self.db.scalars(stmt)
             records = results.all()
             
@@ -191,30 +448,32 @@ class MetadataService:
                 "message": "Records found successfully"
             }
         except Exception as e:
-            return self._create_empty_response(1, 0, f"Error retrieving records: {str(e)}")
+            return self._create_empty_response(1, 0, f"Error retrieving records: {str(e)}", error=True)
 
-    @cache_response(cache_type='medium')
+    @cache_response(cache_type='medium', cache_if=_is_cacheable_response)
     async def get_news_insights(self, **kwargs):
         """Get news insights with filtering and pagination"""
         try:
-            # Generate cache key
-            cache_key = self._generate_cache_key(**kwargs)
-            
-            if not any(kwargs.get(key) for key in VALID_FILTERS - PAGINATION_PARAMS):
-                return self._create_empty_response(
-                    kwargs.get('page', 1),
-                    kwargs.get('limit', 20),
-                    "At least one filter parameter is required. Valid filters are: company_id(s), business_activity_id(s), content_type_id(s), industry_type_id(s), location_id(s), source_type_id(s), sentiment_type_id(s), start_date, end_date"
-                )
-
-            # Validate filter values
-            for key, value in kwargs.items():
-                if value is not None and key not in PAGINATION_PARAMS:
-                    actual_key = FILTER_NAME_MAPPING.get(key, key)
-                    if actual_key in VALID_VALUES:
-                        is_valid, error_message = self.validate_filter_value(key, value)
-                        if not is_valid:
-                            return self._create_empty_response(kwargs.get('page', 1), kwargs.get('limit', 20), error_message)
+            error_message = self._validate_filters(kwargs)
+            if error_message:
+                return self._create_empty_response(kwargs.get('page', 1), kwargs.get('limit', 20), error_message)
+
+            fields, error_message = self._resolve_fields(kwargs.get('fields'))
+            if error_message:
+                return self._create_empty_response(kwargs.get('page', 1), kwargs.get('limit', 20), error_message)
+
+            # Pagination with optimized parameters
+            page = max(1, kwargs.get('page', 1))
+            limit = max(1, min(100, kwargs.get('limit', 20)))
+            count = kwargs.get('count') or 'exact'
+
+            builder = InsightQueryBuilder(kwargs)
+            if self._index_can_answer(builder, kwargs):
+                window = self._parse_date_window(kwargs.get('start_date'), kwargs.get('end_date'))
+                if isinstance(window, dict):  # Error response
+                    return window
+                result = await self.paginate_index(builder, window, page, limit, kwargs.get('cursor'), count, fields)
+                return self._with_no_records_message(result, kwargs)
 
             stmt = select(InsightWire)
             joined_tables = set()
@@ -224,50 +483,247 @@ class MetadataService:
             if isinstance(stmt, dict):  # Error response
                 return stmt
 
-            # Pagination with optimized parameters
-            page = max(1, kwargs.get('page', 1))
-            limit = max(1, min(100, kwargs.get('limit', 20)))
-            
-            result = await self.paginate_query(stmt, page, limit)
+            sort_columns = self._sort_columns(joined_tables)
+
+            if kwargs.get('q'):
+                if kwargs.get('cursor') is not None:
+                    return self._create_empty_cursor_response(limit, "Cursor pagination is not available with q; results are ranked by relevance, use page instead.")
+                # Most relevant first, newest first among equally relevant articles
+                order_by = (search_rank(kwargs['q']).desc(),) + self._sort_order(sort_columns)
+                result = await self.paginate_query(stmt, page, limit, order_by, count, fields)
+            elif kwargs.get('cursor') is not None:
+                result = await self.paginate_keyset(stmt, kwargs['cursor'], limit, sort_columns, count, fields)
+            else:
+                result = await self.paginate_query(stmt, page, limit, self._sort_order(sort_columns), count, fields)
             
-            if result["total_count"] == 0:
-                filters = [f"{key}={value}" for key, value in kwargs.items() 
-                         if value is not None and key not in PAGINATION_PARAMS]
-                result["message"] = (f"No records found matching the following criteria: {', '.join(filters)}" 
-                                   if filters else "No records found in the database")
-            
-            return result
+            return self._with_no_records_message(result, kwargs)
             
         except Exception as e:
             logger.error(f"Error in get_news_insights: {str(e)}", exc_info=True)
-            return self._create_empty_response(kwargs.get('page', 1), kwargs.get('limit', 20), f"Error retrieving records: {str(e)}")
+            return self._create_empty_response(kwargs.get('page', 1), kwargs.get('limit', 20), f"Error retrieving records: {str(e)}", error=True)
+
+    @classmethod
+    async def get_news_insights_batch(cls, queries: List[Dict[str, Any]], session_factory, concurrency: int = 4) -> List[Dict[str, Any]]:
+        """
+        Run several news insight queries concurrently; results keep the order of queries.
+
+        Each distinct query runs once through get_news_insights (and so through
+        its cache) on a session of its own, with at most concurrency sessions
+        checked out at a time. Queries with the same cache key share one run.
+        Every result carries its own status: 200, 400 for invalid filters or
+        500 when the query failed.
+        """
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+        validator = cls(None)
+
+        async def run(filters: Dict[str, Any]) -> Dict[str, Any]:
+            error_message = validator._validate_filters(filters) or validator._resolve_fields(filters.get('fields'))[1]
+            if not error_message and isinstance(validator._parse_date_window(filters.get('start_date'), filters.get('end_date')), dict):
+                error_message = "Invalid date format. Please use YYYY-MM-DD format."
+            if error_message:
+                return {"status": 400, "result": validator._create_empty_response(filters.get('page', 1), filters.get('limit', 20), error_message)}
+            try:
+                async with semaphore:
+                    async with session_factory() as session:
+                        result = await cls(session).get_news_insights(**filters)
+            except Exception as e:
+                logger.error(f"Error in get_news_insights_batch: {str(e)}", exc_info=True)
+                result = validator._create_empty_response(filters.get('page', 1), filters.get('limit', 20), f"Error retrieving records: {str(e)}", error=True)
+            return {"status": 500 if result.get("error") else 200, "result": result}
+
+        runs: Dict[str, asyncio.Task] = {}
+        tasks = []
+        for filters in queries:
+            key = build_cache_key(cls.get_news_insights, (None,), filters)
+            if key not in runs:
+                runs[key] = asyncio.ensure_future(run(filters))
+            tasks.append(runs[key])
+        await asyncio.gather(*runs.values())
+        return [{"index": index, **task.result()} for index, task in enumerate(tasks)]
+
+    async def build_export_query(self, **kwargs):
+        """Validate the filters and build the ordered export query, or return an error response"""
+        error_message = self._validate_filters(kwargs)
+        if error_message:
+            return self._create_empty_response(1, 0, error_message)
+        joined_tables = set()
+        stmt = await self._apply_filters(select(InsightWire), kwargs, joined_tables)
+        if isinstance(stmt, dict):  # Error response
+            return stmt
+        return stmt.order_by(*self._sort_order(self._sort_columns(joined_tables)))
+
+    async def stream_export(self, stmt, export_format: str = "ndjson", chunk_size: int = EXPORT_CHUNK_SIZE) -> AsyncIterator[bytes]:
+        """
+        Stream the rows of stmt as NDJSON or CSV.
+
+        Rows come from a server-side cursor chunk_size at a time and each chunk
+        is written as one piece, so memory stays flat whatever the result size.
+        Cancelling the iteration (e.g. when the client disconnects) closes the
+        cursor and ends the query; the close is shielded, so it completes
+        inside the cancelled scope.
+        """
+        result = await self.db.stream_scalars(stmt.execution_options(yield_per=chunk_size))
+        try:
+            if export_format == "csv":
+                buffer = io.StringIO()
+                writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS, restval="", extrasaction="ignore")
+                writer.writeheader()
+                yield buffer.getvalue().encode("utf-8")
+                async for records in result.partitions(chunk_size):
+                    buffer.seek(0)
+                    buffer.truncate()
+                    writer.writerows(self._standardize_response_schema(records))
+                    yield buffer.getvalue().encode("utf-8")
+            else:
+                async for records in result.partitions(chunk_size):
+                    yield "".join(
+                        json.dumps(item, default=str, ensure_ascii=False) + "\n"
+                        for item in self._standardize_response_schema(records)
+                    ).encode("utf-8")
+        finally:
+            with anyio.CancelScope(shield=True):
+                await result.close()
+
+    def _validate_filters(self, kwargs: dict) -> Optional[str]:
+        """Check that at least one filter is given and every id is valid; returns an error message or None"""
+        if not any(kwargs.get(key) for key in VALID_FILTERS - PAGINATION_PARAMS):
+            return "At least one filter parameter is required. Valid filters are: company_id(s), business_activity_id(s), content_type_id(s), industry_type_id(s), location_id(s), source_type_id(s), sentiment_type_id(s), start_date, end_date, q"
+
+        if kwargs.get('q') and not parse_search_query(kwargs['q']):
+            return "Invalid q. The search must contain at least one word."
+
+        for key, value in kwargs.items():
+            if value is not None and key not in PAGINATION_PARAMS:
+                actual_key = FILTER_NAME_MAPPING.get(key, key)
+                if actual_key in VALID_VALUES:
+                    values = value if isinstance(value, (list, tuple, set)) else [value]
+                    if len(values) > MAX_FILTER_IDS:
+                        return f"Too many values for {key}. At most {MAX_FILTER_IDS} ids are allowed."
+                    for item in values:
+                        is_valid, error_message = self.validate_filter_value(key, item)
+                        if not is_valid:
+                            return error_message
+        return None
+
+    @cache_response(cache_type='medium', cache_if=_is_cacheable_response)
+    async def get_insight_facets(self, top_n: int = 10, **kwargs):
+        """Count matching articles per industry, business activity, sentiment, source type and location"""
+        top_n = max(1, min(100, top_n))
+        try:
+            error_message = self._validate_filters(kwargs)
+            if error_message:
+                return self._create_empty_facets_response(top_n, error_message)
+
+            builder = InsightQueryBuilder(kwargs)
+            if self._index_can_answer(builder, kwargs):
+                window = self._parse_date_window(kwargs.get('start_date'), kwargs.get('end_date'))
+                if isinstance(window, dict):  # Error response
+                    return self._create_empty_facets_response(top_n, window["message"])
+                matched = insight_index.search(builder.dimension_filters, builder.match_all, *window)
+                total_count = len(matched)
+                facets = {
+                    facet: [{"id": dimension_id, "count": count} for dimension_id, count in insight_index.facet_counts(matched, column, top_n)]
+                    for facet, column in FACET_DIMENSIONS.items()
+                }
+            else:
+                stmt = await self._apply_filters(select(InsightWire.uuid), kwargs, set())
+                if isinstance(stmt, dict):  # Error response
+                    return self._create_empty_facets_response(top_n, stmt["message"], stmt.get("error", False))
+                total_count, facets = await self._facet_counts(stmt, top_n)
+
+            return {
+                "total_count": total_count,
+                "top_n": top_n,
+                "facets": facets,
+                "message": f"Found {total_count} records" if total_count else self._no_records_message(kwargs)
+            }
+        except Exception as e:
+            logger.error(f"Error in get_insight_facets: {str(e)}", exc_info=True)
+            return self._create_empty_facets_response(top_n, f"Error retrieving facets: {str(e)}", error=True)
+
+    async def _facet_counts(self, stmt, top_n: int) -> tuple[int, Dict[str, List[Dict[str, int]]]]:
+        """
+        Count the articles matched by stmt (selecting insightwire uuids) per facet value.
+
+        All facets and the total are computed in a single statement: one grouped
+        aggregate per mapping table over the matched uuids, combined with UNION ALL
+        and cut to the top_n values of each facet with a window function.
+        """
+        matched = stmt.cte("matched")
+        matched_uuids = select(matched.c.uuid)
+        branches = [select(literal("total").label("facet"), null().label("id"), func.count().label("count")).select_from(matched)]
+        for facet, column in FACET_DIMENSIONS.items():
+            # Table columns: selecting model attributes would configure the mapping models
+            table = DIMENSION_MODELS[column].__table__
+            dimension = table.c[column]
+            branches.append(
+                select(literal(facet).label("facet"), dimension.label("id"), func.count().label("count"))
+                .where(table.c.insightwire_uuid.in_(matched_uuids))
+                .group_by(dimension)
+            )
+        counts = union_all(*branches).subquery("counts")
+        ranked = select(
+            counts,
+            func.row_number().over(partition_by=counts.c.facet, order_by=(counts.c.count.desc(), counts.c.id)).label("position")
+        ).subquery("ranked")
+        rows = (await self.db.execute(
+            select(ranked.c.facet, ranked.c.id, ranked.c.count)
+            .where(ranked.c.position <= top_n)
+            .order_by(ranked.c.facet, ranked.c.position)
+        )).all()
+
+        total_count = 0
+        facets = {facet: [] for facet in FACET_DIMENSIONS}
+        for facet, dimension_id, count in rows:
+            if facet == "total":
+                total_count = count
+            else:
+                facets[facet].append({"id": dimension_id, "count": count})
+        return total_count, facets
+
+    def _create_empty_facets_response(self, top_n: int, message: str, error: bool = False) -> dict:
+        """Create a standardized empty facets response."""
+        response = {
+            "total_count": 0,
+            "top_n": top_n,
+            "facets": {facet: [] for facet in FACET_DIMENSIONS},
+            "message": message
+        }
+        if error:
+            response["error"] = True
+        return response
+
+    def _with_no_records_message(self, result: dict, kwargs: dict) -> dict:
+        """Replace the message of an empty result with the criteria that matched nothing; errors keep theirs"""
+        if result.get("error"):
+            return result
+        if result["total_count"] == 0 or (result.get("count_type") == "none" and not result["data"]):
+            result["message"] = self._no_records_message(kwargs)
+        return result
+
+    def _no_records_message(self, kwargs: dict) -> str:
+        """Describe the criteria that matched nothing"""
+        filters = [f"{key}={value}" for key, value in kwargs.items() 
+                 if value is not None and key not in PAGINATION_PARAMS]
+        return (f"No records found matching the following criteria: {', '.join(filters)}" 
+                if filters else "No records found in the database")
 
     async def _apply_filters(self, stmt, kwargs: dict, joined_tables: set):
-        """Apply filters to the query with optimization"""
-        start_date = kwargs.get('start_date')
-        end_date = kwargs.get('end_date')
-        
+        """Apply filters to the query as semi-joins driven by the most selective dimension"""
         try:
-            # Apply filters using the pre-defined mappings
-            for filter_type, (model, id_field) in self.filter_mappings.items():
-                filter_key = f'{filter_type}_id'
-                filter_key_plural = f'{filter_type}_ids'
-                
-                if kwargs.get(filter_key) or kwargs.get(filter_key_plural):
-                    value = kwargs.get(filter_key) or kwargs.get(filter_key_plural)
-                    table_name = f'{filter_type}_mapping'
-                    
-                    if table_name not in joined_tables:
-                        stmt = stmt.join(model, InsightWire.uuid == getattr(model, 'insightwire_uuid'))
-                        joined_tables.add(table_name)
-                    
-                    stmt = stmt.filter(getattr(model, id_field) == value)
-                    
-                    # Apply date filters with optimization
-                    if start_date or end_date:
-                        stmt = await self._apply_date_filters(stmt, model, start_date, end_date)
-                        if isinstance(stmt, dict):  # Error response
-                            return stmt
+            window = self._parse_date_window(kwargs.get('start_date'), kwargs.get('end_date'))
+            if isinstance(window, dict):  # Error response
+                return window
+
+            builder = InsightQueryBuilder(kwargs)
+            stmt, driver = builder.build(stmt, *window)
+            for filter_type, (model, _) in self.filter_mappings.items():
+                if model is driver:
+                    joined_tables.add(f'{filter_type}_mapping')
+
+            # Full-text search, served by the GIN index on insightwire.search_vector
+            if kwargs.get('q'):
+                stmt = stmt.where(search_predicate(kwargs['q']))
 
             # Apply other InsightWire table filters with optimization
             for field, value in kwargs.items():
@@ -294,22 +750,18 @@ class MetadataService:
             return self._create_empty_response(
                 kwargs.get('page', 1),
                 kwargs.get('limit', 20),
-                f"Error applying filters: {str(e)}"
+                f"Error applying filters: {str(e)}",
+                error=True
             )
 
-    async def _apply_date_filters(self, stmt, model, start_date: Optional[str], end_date: Optional[str]):
-        """Apply date filters to the query with optimization"""
+    def _parse_date_window(self, start_date: Optional[str], end_date: Optional[str]):
+        """Parse the YYYY-MM-DD date window; the end date is inclusive"""
         try:
-            if start_date:
-                start_date = datetime.strptime(start_date, "%Y-%m-%d")
-                stmt = stmt.filter(getattr(model, 'system_timestamp') >= start_date)
-            
+            start = datetime.strptime(start_date, "%Y-%m-%d") if start_date else None
+            end = None
             if end_date:
-                end_date = datetime.strptime(end_date, "%Y-%m-%d")
-                end_date = end_date.replace(hour=23, minute=59, second=59)
-                stmt = stmt.filter(getattr(model, 'system_timestamp') <= end_date)
-            
-            return stmt
+                end = datetime.strptime(end_date, "%Y-%m-%d").replace(hour=23, minute=59, second=59)
+            return start, end
         except ValueError as e:
             logger.error(f"Invalid date format: {str(e)}", exc_info=True)
             return self._create_empty_response(
@@ -0,0 +1,209 @@
+# api/services/query_builder.py
+import re
+import shlex
+from typing import Any, Dict, List, Optional
+from sqlalchemy import Integer, any_, exists, func, literal, literal_column, select
+from sqlalchemy.dialects.postgresql import ARRAY
+from api.models import (
+    InsightWire, IndustryMapping, BusinessActivityMapping,
+    CompanyMapping, ContentTypeMapping, LocationMapping,
+    SentimentMapping, SourceTypeMapping
+)
+from api.core.metadata_config import VALID_VALUES, FILTER_NAME_MAPPING, SEARCH_CONFIG
+
+# Mapping table per filter dimension, keyed by the singular filter name, which
+# is also the id column of the mapping table
+DIMENSION_MODELS = {
+    'company_id': CompanyMapping,
+    'business_activity_id': BusinessActivityMapping,
+    'content_type_id': ContentTypeMapping,
+    'industry_type_id': IndustryMapping,
+    'location_id': LocationMapping,
+    'sentiment_type_id': SentimentMapping,
+    'source_type_id': SourceTypeMapping,
+}
+
+class InsightQueryBuilder:
+    """
+    Build insight queries as semi-joins over the mapping tables.
+
+    The most selective dimension drives the query: its mapping table is joined
+    to insightwire and carries the time window, which is applied once. Every
+    other dimension becomes an EXISTS probe on the driver's insightwire_uuid,
+    served by the (insightwire_uuid, <dimension>_id) primary key, so rows are
+    never multiplied by additional joins.
+
+    Several ids for one dimension match any of them (`= ANY(:ids)`) by default,
+    or all of them with match='all'. Dimensions are always combined with AND.
+    """
+
+    def __init__(self, filters: Dict[str, Any]):
+        self.dimension_filters = self._collect_dimension_filters(filters)
+        self.match_all = filters.get('match') == 'all'
+
+    @staticmethod
+    def _collect_dimension_filters(filters: Dict[str, Any]) -> Dict[str, List[int]]:
+        """Fold singular and plural filter names into one id list per dimension"""
+        dimension_filters: Dict[str, List[int]] = {}
+        for key, value in filters.items():
+            name = FILTER_NAME_MAPPING.get(key, key)
+            if name not in DIMENSION_MODELS or value is None or value == []:
+                continue
+            values = value if isinstance(value, (list, tuple, set)) else [value]
+            ids = dimension_filters.setdefault(name, [])
+            for v in values:
+                if int(v) not in ids:
+                    ids.append(int(v))
+        return dimension_filters
+
+    def selectivity(self, name: str) -> float:
+        """Estimated fraction of mapping rows matched, assuming ids are evenly used"""
+        cardinality = len(VALID_VALUES.get(name, ())) or 1
+        count = len(self.dimension_filters[name])
+        if self.match_all:
+            return (1 / cardinality) ** count
+        return min(1.0, count / cardinality)
+
+    def driver(self) -> Optional[str]:
+        """The most selective filtered dimension, or None without dimension filters"""
+        if not self.dimension_filters:
+            return None
+        return min(self.dimension_filters, key=self.selectivity)
+
+    def id_predicate(self, name: str, model: Any, ids: Optional[List[int]] = None):
+        """Predicate matching any of the given ids (all requested ids by default) on a mapping model or table alias"""
+        column = model.c[name] if hasattr(model, 'c') else getattr(model, name)
+        ids = self.dimension_filters[name] if ids is None else ids
+        if len(ids) == 1:
+            return column == ids[0]
+        return column == any_(literal(ids, ARRAY(Integer)))
+
+    def _probe(self, name: str, driver: Any, ids: List[int]):
+        """EXISTS probe for a mapping row of the driver's article with one of ids"""
+        # Aliased so probes on the driver's own table do not correlate with themselves.
+        # A Core table alias: ORM aliases would configure the mapping models'
+        # relationships, which cannot resolve InsightWire on its separate Base
+        table = DIMENSION_MODELS[name].__table__.alias()
+        return exists().where(
+            table.c.insightwire_uuid == driver.insightwire_uuid,
+            self.id_predicate(name, table, ids)
+        )
+
+    def build(self, stmt=None, start_date=None, end_date=None):
+        """
+        Apply the dimension filters and time window to stmt (select(InsightWire) by default).
+
+        Returns the statement and the driving mapping model, or None when no
+        dimension is filtered (insightwire has no timestamp of its own, so the
+        window cannot be applied then).
+        """
+        if stmt is None:
+            stmt = select(InsightWire)
+        driver_name = self.driver()
+        if driver_name is None:
+            return stmt, None
+
+        driver = DIMENSION_MODELS[driver_name]
+        driver_ids = self.dimension_filters[driver_name]
+        stmt = stmt.join(driver, InsightWire.uuid == driver.insightwire_uuid)
+        if self.match_all:
+            # Drive on the first id, probe for the remaining ones
+            stmt = stmt.where(self.id_predicate(driver_name, driver, driver_ids[:1]))
+            for driver_id in driver_ids[1:]:
+                stmt = stmt.where(self._probe(driver_name, driver, [driver_id]))
+        else:
+            stmt = stmt.where(self.id_predicate(driver_name, driver))
+            if len(driver_ids) > 1:
+                # Keep one driver row per article: the one with its lowest matching id
+                alias = driver.__table__.alias()
+                stmt = stmt.where(~exists().where(
+                    alias.c.insightwire_uuid == driver.insightwire_uuid,
+                    self.id_predicate(driver_name, alias),
+                    alias.c[driver_name] < getattr(driver, driver_name)
+                ))
+        if start_date is not None:
+            stmt = stmt.where(driver.system_timestamp >= start_date)
+        if end_date is not None:
+            stmt = stmt.where(driver.system_timestamp <= end_date)
+
+        for name, ids in self.dimension_filters.items():
+            if name == driver_name:
+                continue
+            if self.match_all:
+                for dimension_id in ids:
+                    stmt = stmt.where(self._probe(name, driver, [dimension_id]))
+            else:
+                stmt = stmt.where(self._probe(name, driver, ids))
+        return stmt, driver
+
+_WORD = re.compile(r"\w+")
+
+def parse_search_query(q: str) -> str:
+    """
+    Translate a q= search into to_tsquery syntax.
+
+    Words are ANDed; "quoted words" must appear as a phrase, a trailing *
+    matches any word with that prefix (auto* -> auto:*), a leading - excludes
+    a word or phrase and OR between two terms matches either. Punctuation
+    inside a term splits it into a phrase ("e-commerce" -> e <-> commerce).
+    Returns "" when q holds no words.
+    """
+    lexer = shlex.shlex(q, posix=True)
+    lexer.whitespace_split = True
+    lexer.quotes = '"'  # Apostrophes stay part of their word
+    try:
+        tokens = list(lexer)
+    except ValueError:  # Unbalanced quotes
+        tokens = q.replace('"', " ").split()
+
+    terms: List[str] = []
+    pending_or = False
+    for token in tokens:
+        if token == "OR":
+            pending_or = bool(terms)
+            continue
+        negate = token.startswith("-")
+        prefix = token.endswith("*")
+        words = _WORD.findall(token.lower())
+        if not words:
+            continue
+        if prefix:
+            words[-1] += ":*"
+        term = " <-> ".join(words)
+        if len(words) > 1:
+            term = f"({term})"
+        if negate:
+            term = f"!{term}"
+        if pending_or:
+            terms[-1] = f"{terms[-1]} | {term}"
+        else:
+            terms.append(term)
+        pending_or = False
+    return " & ".join(f"({term})" if " | " in term else term for term in terms)
+
+def search_tsquery(q: str):
+    """to_tsquery expression of a q= search (see parse_search_query)"""
+    return func.to_tsquery(literal_column(f"'{SEARCH_CONFIG}'::regconfig"), parse_search_query(q))
+
+def search_predicate(q: str):
+    """Match articles whose search document satisfies q"""
+    return InsightWire.search_vector.op("@@")(search_tsquery(q))
+
+def search_rank(q: str):
+    """ts_rank relevance of an article for q; title matches weigh most, then lead paragraph, then story"""
+    return func.ts_rank(InsightWire.search_vector, search_tsquery(q))
+
+def contains_pattern(value: str) -> str:
+    """ilike pattern matching value anywhere, with its own % and _ taken literally"""
+    escaped = value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+def taxonomy_search(stmt, column, value: str):
+    """
+    Filter stmt to rows whose column contains value, case-insensitively, most
+    similar first. The ilike is served by the column's trigram index; shorter
+    names, i.e. closer matches, get a higher trigram similarity.
+    """
+    return stmt.where(column.ilike(contains_pattern(value), escape="\\")).order_by(
+        func.similarity(column, value).desc(), column
+    )
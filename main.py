@@ -1,4 +1,5 @@
 # main.py
+import logging
 from fastapi import FastAPI
 from fastapi.openapi.docs import (
     get_swagger_ui_html,
@@ -6,8 +7,15 @@ from fastapi.openapi.docs import (
 )
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, Response
 from api.core.config import settings
+from api.core.cache import close_caches
+from api.core.metrics import CONTENT_TYPE, render_metrics
+from api.middleware.metrics import MetricsMiddleware
+from api.services.insight_index import insight_index
+from api.models.search_indexes import check_search_indexes
+from util.database import AsyncSessionLocal, read_session, replica_router
+from util.taxonomy_reader import taxonomy_reader
 from api.routers import (
     news_router,
     business_activity_router,
@@ -23,6 +31,8 @@ from api.routers import (
     sentiments_router
 )
 
+logger = logging.getLogger(__name__)
+
 description = """
 # InsightWires News Analytics API
 
@@ -61,11 +71,51 @@ app = FastAPI(
 # Mount static files
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
+@app.on_event("startup")
+async def check_indexes():
+    # Only warns: a missing index makes searches slow, not wrong
+    try:
+        async with AsyncSessionLocal() as session:
+            await check_search_indexes(session)
+    except Exception as e:
+        logger.warning(f"Search index self-check skipped: {str(e)}")
+
+@app.on_event("startup")
+async def start_replica_checks():
+    await replica_router.start(settings.DB_REPLICA_HEALTH_SECONDS)
+
+@app.on_event("startup")
+async def start_insight_index():
+    if settings.INSIGHT_INDEX_ENABLED:
+        insight_index.start(
+            read_session,
+            settings.INSIGHT_INDEX_REFRESH_SECONDS,
+            settings.INSIGHT_INDEX_REBUILD_SECONDS,
+            settings.INSIGHT_INDEX_INGEST_OVERLAP_SECONDS
+        )
+
+@app.on_event("startup")
+async def start_taxonomy_reload():
+    # Preloads even with hot reload disabled, so no request builds the company index
+    taxonomy_reader.start_watching(settings.TAXONOMY_RELOAD_SECONDS)
+
+@app.on_event("shutdown")
+async def shutdown_caches():
+    await taxonomy_reader.stop_watching()
+    await insight_index.stop()
+    await close_caches()
+    await replica_router.stop()
+
 # Add health check endpoint
 @app.get("/health")
 async def health_check():
     return {"status": "healthy"}
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Request, database, connection pool and cache metrics of this worker process, for Prometheus"""
+    return Response(render_metrics(), media_type=CONTENT_TYPE)
+
 @app.get("/docs", include_in_schema=False)
 async def custom_swagger_ui_html():
     html_content = f"""
@@ -230,6 +280,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Outermost, so latency includes every other middleware
+app.add_middleware(MetricsMiddleware)
+
 # Include routers
 app.include_router(news_router, prefix=settings.API_V1_STR)
 app.include_router(business_activity_router, prefix=settings.API_V1_STR)
@@ -0,0 +1,248 @@
+"""Test suite for the response cache"""
+
+import asyncio
+import pytest
+from api.core import cache as cache_module
+from api.core.cache import cache_response, build_cache_key, get_cache_stats
+from api.core.cache_backends import MISSING, MemoryBackend, SQLiteBackend, RedisBackend
+from api.services.metadata_service import MetadataService
+
+
+class Service:
+    def __init__(self):
+        self.calls = 0
+
+    @cache_response(cache_type='short')
+    async def lookup(self, value=None, page: int = 1, limit: int = 20, **kwargs):
+        self.calls += 1
+        return {"value": value, "calls": self.calls}
+
+
+def test_build_cache_key_ignores_self_and_defaults():
+    """Test that keys do not depend on the service instance or explicit defaults"""
+    func = Service.lookup.__wrapped__
+    key = build_cache_key(func, (Service(), "x"), {})
+    assert key == build_cache_key(func, (Service(), "x", 1, 20), {})
+    assert key == build_cache_key(func, (Service(),), {"value": "x", "limit": 20})
+    assert key != build_cache_key(func, (Service(), "y"), {})
+
+
+def test_build_cache_key_normalizes_filters():
+    """Test id list, plural filter name and date window normalization"""
+    func = MetadataService.get_news_insights.__wrapped__
+    key = build_cache_key(func, (MetadataService(None),), {
+        "company_ids": [3, 1, 3], "start_date": "2024-1-5", "end_date": None
+    })
+    assert key == build_cache_key(func, (MetadataService(None),), {
+        "company_id": [1, 3], "start_date": "2024-01-05"
+    })
+
+
+@pytest.mark.asyncio
+async def test_cache_response_counts_hits_and_misses():
+    """Test that separate service instances share cache entries"""
+    await cache_module.caches['short'].clear()
+    before = get_cache_stats()['short']
+
+    first = await Service().lookup("x")
+    second = await Service().lookup(value="x")
+
+    stats = get_cache_stats()['short']
+    assert first is second
+    assert stats['misses'] - before['misses'] == 1
+    assert stats['hits'] - before['hits'] == 1
+
+
+async def _exercise_backend(backend):
+    assert await backend.get("key") is MISSING
+    await backend.set("key", {"total_count": 2, "data": [{"story_id": "a"}]})
+    assert await backend.get("key") == {"total_count": 2, "data": [{"story_id": "a"}]}
+    await backend.delete("key")
+    assert await backend.get("key") is MISSING
+    await backend.set("other", 1)
+    await backend.clear()
+    assert await backend.get("other") is MISSING
+
+
+@pytest.mark.asyncio
+async def test_memory_backend():
+    """Test the in-process backend"""
+    await _exercise_backend(MemoryBackend("test", 60, 10))
+
+
+@pytest.mark.asyncio
+async def test_sqlite_backend_is_shared(tmp_path):
+    """Test that two SQLite backends on the same file see each other's entries"""
+    path = str(tmp_path / "cache.sqlite3")
+    first, second = SQLiteBackend("test", 60, 10, path), SQLiteBackend("test", 60, 10, path)
+    await _exercise_backend(first)
+    await first.set("shared", [1, 2])
+    assert await second.get("shared") == [1, 2]
+    await first.close()
+    await second.close()
+
+
+@pytest.mark.asyncio
+async def test_sqlite_backend_does_not_block_the_event_loop(tmp_path):
+    """Test that a busy connection delays only the cache call, and that failures are misses"""
+    backend = SQLiteBackend("test", 60, 10, str(tmp_path / "cache.sqlite3"))
+    await backend.set("key", 1)
+    backend._lock.acquire()
+    try:
+        pending = asyncio.create_task(backend.get("key"))
+        await asyncio.sleep(0.05)
+        assert not pending.done()
+        assert backend.size() is None
+    finally:
+        backend._lock.release()
+    assert await pending == 1
+
+    await backend.close()
+    assert await backend.get("key") is MISSING
+    await backend.delete("key")
+    await backend.clear()
+    assert backend.size() is None
+
+
+async def _redis_stand_in(reader, writer):
+    """Minimal RESP server supporting the commands used by RedisBackend"""
+    store = _redis_stand_in.store
+    while True:
+        header = await reader.readline()
+        if not header:
+            break
+        parts = []
+        for _ in range(int(header[1:-2])):
+            length = int((await reader.readline())[1:-2])
+            parts.append((await reader.readexactly(length + 2))[:-2])
+        command = parts[0].upper()
+        if command == b"GET":
+            await asyncio.sleep(getattr(_redis_stand_in, "delay", 0))
+            value = store.get(parts[1])
+            writer.write(b"$-1\r\n" if value is None else b"$%d\r\n%s\r\n" % (len(value), value))
+        elif command == b"SET":
+            store[parts[1]] = parts[2]
+            writer.write(b"+OK\r\n")
+        elif command == b"DEL":
+            removed = sum(store.pop(key, None) is not None for key in parts[1:])
+            writer.write(b":%d\r\n" % removed)
+        elif command == b"SCAN":
+            prefix = parts[3].rstrip(b"*")
+            keys = [key for key in store if key.startswith(prefix)]
+            writer.write(b"*2\r\n$1\r\n0\r\n*%d\r\n" % len(keys))
+            for key in keys:
+                writer.write(b"$%d\r\n%s\r\n" % (len(key), key))
+        try:
+            await writer.drain()
+        except ConnectionError:
+            break
+    writer.close()
+
+
+@pytest.mark.asyncio
+async def test_redis_backend_against_stand_in():
+    """Test the RESP client against a local stand-in server"""
+    _redis_stand_in.store = {}
+    server = await asyncio.start_server(_redis_stand_in, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    backend = RedisBackend("test", 60, 10, f"redis://127.0.0.1:{port}/0")
+    try:
+        await _exercise_backend(backend)
+        await backend.set("key", "value")
+        assert b"insightwires:test:key" in _redis_stand_in.store
+    finally:
+        await backend.close()
+        server.close()
+        await server.wait_closed()
+
+
+@pytest.mark.asyncio
+async def test_redis_backend_cancelled_command_drops_connection():
+    """Test that a GET cancelled before its reply never answers the next GET"""
+    _redis_stand_in.store = {}
+    server = await asyncio.start_server(_redis_stand_in, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    backend = RedisBackend("test", 60, 10, f"redis://127.0.0.1:{port}/0")
+    try:
+        await backend.set("a", "value of a")
+        await backend.set("b", "value of b")
+        _redis_stand_in.delay = 0.1
+        pending = asyncio.create_task(backend.get("a"))
+        await asyncio.sleep(0.02)
+        pending.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await pending
+        _redis_stand_in.delay = 0
+        assert await backend.get("b") == "value of b"
+    finally:
+        _redis_stand_in.delay = 0
+        await backend.close()
+        server.close()
+        await server.wait_closed()
+
+
+@pytest.mark.asyncio
+async def test_redis_backend_unreachable_is_a_miss():
+    """Test that an unreachable server degrades to cache misses"""
+    backend = RedisBackend("test", 60, 10, "redis://127.0.0.1:1/0")
+    assert await backend.get("key") is MISSING
+    await backend.set("key", 1)
+
+
+class SlowService:
+    calls = 0
+
+    @cache_response(cache_type='short')
+    async def lookup(self, value=None):
+        SlowService.calls += 1
+        await asyncio.sleep(0.05)
+        if value == "boom":
+            raise RuntimeError("query failed")
+        return {"value": value}
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_are_coalesced():
+    """Test that concurrent misses for one key run a single query"""
+    await cache_module.caches['short'].clear()
+    SlowService.calls = 0
+    before = get_cache_stats()['short']['coalesced']
+
+    results = await asyncio.gather(*[SlowService().lookup("x") for _ in range(5)])
+
+    assert SlowService.calls == 1
+    assert all(result == {"value": "x"} for result in results)
+    assert get_cache_stats()['short']['coalesced'] - before == 4
+
+
+@pytest.mark.asyncio
+async def test_coalesced_errors_propagate():
+    """Test that the leader's exception is raised in every waiting caller"""
+    SlowService.calls = 0
+    results = await asyncio.gather(*[SlowService().lookup("boom") for _ in range(3)], return_exceptions=True)
+
+    assert SlowService.calls == 1
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+@pytest.mark.asyncio
+async def test_stale_entries_are_served_and_refreshed(monkeypatch):
+    """Test stale-while-revalidate with a rate-limited background refresh"""
+    from api.core.config import settings
+    await cache_module.caches['short'].clear()
+    cache_module._last_refresh.clear()
+    monkeypatch.setitem(settings.CACHE_CONFIG, 'short_ttl', 0)
+    monkeypatch.setitem(settings.CACHE_CONFIG, 'short_stale_ttl', 60)
+    service = Service()
+
+    assert (await service.lookup("swr"))["calls"] == 1
+    # Stale hit: the old value is returned and a refresh runs in the background
+    assert (await service.lookup("swr"))["calls"] == 1
+    await asyncio.sleep(0.01)
+    assert service.calls == 2
+    assert (await service.lookup("swr"))["calls"] == 2
+
+    # The refresh for this entry is rate-limited
+    await asyncio.sleep(0.01)
+    assert service.calls == 2
+    assert get_cache_stats()['short']['stale_hits'] >= 2
@@ -0,0 +1,84 @@
+"""Test suite for the company taxonomy search index"""
+
+from util.company_index import CompanyIndex, normalize_domain, normalize_name
+
+COMPANIES = [
+    {"company_id": 10000001, "company_name": "Tablespace Technologies Ltd", "company_url": "https://www.tablespace.com"},
+    {"company_id": 10000002, "company_name": "Tablespace", "company_url": "tablespace.io"},
+    {"company_id": 10000003, "company_name": "Open Tablespace Group", "company_url": "http://opentablespace.org/about"},
+    {"company_id": 10000004, "company_name": "Société Générale", "company_url": "https://www.societegenerale.com"},
+    {"company_id": 10000005, "company_name": "Alphabet Inc.", "company_url": "https://abc.xyz"},
+]
+
+
+def test_normalization():
+    """Test that names and URLs are normalized once, independent of case, accents and punctuation"""
+    assert normalize_name("  Société  Générale, S.A. ") == "societe generale s a"
+    assert normalize_domain("HTTPS://www.Example.com:443/path?q=1") == "example.com"
+    assert normalize_domain("example.com/about") == "example.com"
+
+
+def test_search_ranks_exact_prefix_word_then_substring():
+    """Test ranking of name matches and pagination"""
+    index = CompanyIndex(COMPANIES)
+    total, page = index.search_page(name="tablespace", limit=2)
+    assert total == 3
+    assert [company["company_id"] for company in page] == [10000002, 10000001]
+
+    total, page = index.search_page(name="tablespace", page=2, limit=2)
+    assert [company["company_id"] for company in page] == [10000003]
+
+    assert [c["company_id"] for c in index.search_page(name="SOCIETE")[1]] == [10000004]
+    assert index.search_page(name="nothing like it")[0] == 0
+
+
+def test_one_character_queries_match_substrings():
+    """Test that a single character matches anywhere in names and domains, prefixes first"""
+    index = CompanyIndex(COMPANIES)
+    total, page = index.search_page(name="g")
+    assert total == 3
+    assert [company["company_id"] for company in page] == [10000004, 10000003, 10000001]
+    assert [c["company_id"] for c in index.search_page(name="T")[1]] == [10000002, 10000001, 10000003, 10000005, 10000004]
+    assert index.search_page(name="q")[0] == 0
+
+    total, page = index.search_page(url="x")
+    assert total == 1
+    assert page[0]["company_id"] == 10000005
+    assert [index.companies[position]["company_id"] for position in index.search(name="g")] == [10000004, 10000003, 10000001]
+
+
+def test_search_by_domain():
+    """Test that URL searches compare normalized domains"""
+    index = CompanyIndex(COMPANIES)
+    total, page = index.search_page(url="https://tablespace.com/careers")
+    assert total == 1
+    assert page[0]["company_id"] == 10000001
+
+    positions = index.search(name="alphabet", url="tablespace")
+    assert [index.companies[position]["company_id"] for position in positions] == [10000002, 10000005, 10000001, 10000003]
+
+
+def test_suggest_prefixes_of_names_and_aliases():
+    """Test typeahead over names, names without legal suffix and domains"""
+    index = CompanyIndex(COMPANIES + [
+        {"company_id": 10000006, "company_name": "Google LLC", "company_url": "https://google.com", "aliases": ["Alphabet"]}
+    ])
+    assert [c["company_id"] for c in index.suggest("Table")] == [10000002, 10000001]
+    assert [c["company_id"] for c in index.suggest("alpha")] == [10000006, 10000005]
+    assert [c["company_id"] for c in index.suggest("opentable")] == [10000003]
+    assert [c["company_id"] for c in index.suggest("t", limit=1)] == [10000002]
+    assert index.suggest("   ") == []
+
+
+def test_fuzzy_matches_misspelled_names():
+    """Test trigram similarity matching of misspelled names"""
+    from util.company_index import similarity
+    index = CompanyIndex(COMPANIES)
+    assert similarity("tablespace", "tablespace") == 1.0
+    assert index.search_page(name="tablspace")[0] == 0
+
+    matches = index.fuzzy("Tablspace", limit=2)
+    assert [company["company_id"] for company, _ in matches] == [10000002, 10000003]
+    assert matches[0][1] == round(similarity("tablspace", "tablespace"), 3)
+    assert 0.3 <= matches[1][1] < matches[0][1] < 1
+    assert index.fuzzy("zzzz qqqq") == []
@@ -0,0 +1,69 @@
+"""Test suite for the columnar insight export"""
+
+from types import SimpleNamespace
+import pytest
+
+pa = pytest.importorskip("pyarrow")
+import pyarrow.parquet as pq
+from util.export_insights import BatchWriter, build_schema, fetch_mapping_ids, to_record_batch
+
+
+def _rows():
+    return [
+        SimpleNamespace(uuid=f"uuid-{i}", title=f"Title {i}", lead_paragraph=None, news_url=None, image_url=None,
+                        locations=None, business_activities=None, industries=None, published_date="2024-01-01",
+                        sentiment="positive" if i % 2 else "negative", type_of_source="news", type_of_content=None,
+                        sources="wire", content_languages="en")
+        for i in range(4)
+    ]
+
+
+def test_record_batch_has_dictionary_dimensions_and_mapping_lists():
+    """Test that text dimensions are dictionary-encoded and mapping ids become list columns"""
+    schema = build_schema()
+    batch = to_record_batch(_rows(), {'company_id': {'uuid-1': [10000002, 10000001]}}, schema)
+
+    assert batch.num_rows == 4
+    assert pa.types.is_dictionary(batch.schema.field('sentiment').type)
+    assert batch.column('sentiment').dictionary.to_pylist() == ['negative', 'positive']
+    assert batch.column('company_ids').to_pylist() == [[], [10000001, 10000002], [], []]
+    assert 'story' not in batch.schema.names
+
+
+@pytest.mark.parametrize("export_format", ["parquet", "arrow"])
+def test_batches_are_written_as_row_groups(tmp_path, export_format):
+    """Test that every batch is written as its own row group / record batch"""
+    schema = build_schema(with_story=False)
+    path = str(tmp_path / f"insights.{export_format}")
+    writer = BatchWriter(path, schema, export_format)
+    for _ in range(2):
+        writer.write(to_record_batch(_rows(), {}, schema))
+    writer.close()
+
+    if export_format == "parquet":
+        parquet_file = pq.ParquetFile(path)
+        assert parquet_file.num_row_groups == 2
+        assert parquet_file.read().num_rows == 8
+    else:
+        with pa.ipc.open_stream(path) as reader:
+            assert sum(batch.num_rows for batch in reader) == 8
+
+
+def test_fetch_mapping_ids_per_dimension():
+    """Test that mapping ids are read per dimension with one array parameter and grouped by article"""
+    import asyncio
+    from sqlalchemy.dialects import postgresql
+
+    statements = []
+
+    async def execute(stmt):
+        compiled = stmt.compile(dialect=postgresql.dialect())
+        statements.append(" ".join(str(compiled).split()))
+        return [("uuid-1", 7), ("uuid-1", 3), ("uuid-2", 7)]
+
+    mapping_ids = asyncio.run(fetch_mapping_ids(SimpleNamespace(execute=execute), ["uuid-1", "uuid-2"]))
+    assert mapping_ids["company_id"] == {"uuid-1": [7, 3], "uuid-2": [7]}
+    assert statements[0] == (
+        "SELECT company_mapping.insightwire_uuid, company_mapping.company_id FROM company_mapping "
+        "WHERE company_mapping.insightwire_uuid = ANY (%(param_1)s::TEXT[])"
+    )
@@ -0,0 +1,88 @@
+"""Test suite for ETag / If-None-Match handling"""
+
+import threading
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+from api.core.http_cache import cached_json_response, prerendered_response
+from api.core.security import verify_api_key
+from api.routers import sentiments_router
+
+app = FastAPI()
+app.include_router(sentiments_router)
+app.dependency_overrides[verify_api_key] = lambda: "test"
+
+
+@app.get("/payload")
+async def payload(request: Request, value: int = 1):
+    return cached_json_response(request, {"value": value}, max_age=60)
+
+
+renders = []
+
+
+@app.get("/rendered")
+async def rendered(request: Request, version: str = "1"):
+    def build_payload():
+        renders.append(threading.get_ident())
+        return {"version": version}
+    response = await prerendered_response(request, "test", f'"{version}"', build_payload)
+    return {"loop": threading.get_ident(), "response": response.body.decode()}
+
+
+client = TestClient(app)
+
+
+def test_taxonomy_etag_and_304():
+    """Test that an unchanged taxonomy costs a 304 without a body"""
+    response = client.get("/sentiments/")
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+    assert response.headers["cache-control"] == "private, max-age=300"
+    assert response.json()["total_count"] == len(response.json()["data"])
+
+    not_modified = client.get("/sentiments/", headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+    assert not_modified.headers["etag"] == etag
+
+    assert client.get("/sentiments/", headers={"If-None-Match": '"stale"'}).status_code == 200
+
+
+def test_etag_from_response_hash():
+    """Test that responses without a known version get an ETag from their body"""
+    first = client.get("/payload?value=1")
+    assert first.headers["cache-control"] == "private, max-age=60"
+    assert client.get("/payload?value=1", headers={"If-None-Match": f'"x", W/{first.headers["etag"]}'}).status_code == 304
+    assert client.get("/payload?value=2", headers={"If-None-Match": first.headers["etag"]}).status_code == 200
+
+
+def test_taxonomy_served_from_precompressed_variants():
+    """Test that taxonomies are served pre-compressed according to Accept-Encoding"""
+    from api.core.http_cache import brotli
+    plain = client.get("/sentiments/", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+    assert plain.headers["vary"] == "Accept-Encoding"
+
+    zipped = client.get("/sentiments/", headers={"Accept-Encoding": "br;q=0, gzip;q=0.5"})
+    assert zipped.headers["content-encoding"] == "gzip"
+    assert zipped.json() == plain.json()
+    assert zipped.headers["etag"] != plain.headers["etag"]
+    # Each encoding is its own representation, so the identity ETag does not validate it
+    assert client.get("/sentiments/", headers={"Accept-Encoding": "gzip", "If-None-Match": plain.headers["etag"]}).status_code == 200
+
+    if brotli is not None:
+        preferred = client.get("/sentiments/", headers={"Accept-Encoding": "gzip, br"})
+        assert preferred.headers["content-encoding"] == "br"
+        assert preferred.json() == plain.json()
+
+
+def test_prerendered_variants_render_off_the_event_loop():
+    """Test that a new version is rendered once, in a worker thread rather than on the event loop"""
+    first = client.get("/rendered?version=1", headers={"Accept-Encoding": "identity"}).json()
+    again = client.get("/rendered?version=1", headers={"Accept-Encoding": "identity"}).json()
+    assert first["response"] == again["response"] == '{"version":"1"}'
+    assert len(renders) == 1
+    assert renders[0] != first["loop"]
+
+    assert client.get("/rendered?version=2", headers={"Accept-Encoding": "identity"}).json()["response"] == '{"version":"2"}'
+    assert len(renders) == 2
@@ -86,6 +86,18 @@ async def test_standardize_response_schema(metadata_service):
     assert result[0]['content_languages'] == 'en'
     assert result[0]['sentiment'] == 'positive'
 
+def test_field_projection():
+    """Test that fields= selects response fields in response order and leaves out story by default"""
+    service = MetadataService(None)
+    fields, error = service._resolve_fields(None)
+    assert error == "" and "story" not in fields and fields[0] == "story_id"
+    assert service._resolve_fields("news_url, title")[0] == ["story_id", "title", "news_url"]
+    assert "story" in service._resolve_fields(["*"])[0]
+    assert service._resolve_fields("title,body")[1].startswith("Invalid fields: body.")
+
+    item = type('TestItem', (), {'uuid': 'test-uuid', 'title': 'Test Title', 'story': 'Test Story'})
+    assert service._standardize_response_schema([item], ["story_id", "title"]) == [{"story_id": "test-uuid", "title": "Test Title"}]
+
 @pytest.mark.asyncio
 async def test_paginate_query(metadata_service):
     """Test query pagination"""
@@ -116,4 +128,567 @@ async def test_paginate_query(metadata_service):
         metadata_service.db.query(),
         1, 101
     )
-    assert invalid_limit['limit'] == 100  # Should be normalized to 100 
\ No newline at end of file
+    assert invalid_limit['limit'] == 100  # Should be normalized to 100 
+
+def test_cursor_round_trip():
+    """Test keyset cursor encoding and decoding"""
+    from datetime import datetime
+    service = MetadataService(None)
+    timestamp = datetime(2024, 1, 1, 12, 30, 0)
+    uuid = '2f1c7e0a-5d3b-4a7e-9a61-0c8c1f4e2b11'
+
+    cursor = service._encode_cursor(timestamp, uuid)
+    assert service._decode_cursor(cursor) == (timestamp, uuid)
+    assert service._decode_cursor(service._encode_cursor(None, uuid)) == (None, uuid)
+
+    with pytest.raises(ValueError):
+        service._decode_cursor("not-a-cursor")
+
+
+@pytest.mark.asyncio
+async def test_keyset_seek_predicate_and_order():
+    """Test the compiled (system_timestamp, uuid) seek past the cursor, newest first with uuid as tie-breaker"""
+    from datetime import datetime
+    from types import SimpleNamespace
+    from sqlalchemy.dialects import postgresql
+    from api.core.cache import caches
+
+    executed = []
+    last = (datetime(2024, 1, 5, 12), "00000000-0000-0000-0000-000000000005")
+    rows = [
+        (SimpleNamespace(uuid="00000000-0000-0000-0000-000000000004", title="a"), last[0], "00000000-0000-0000-0000-000000000004"),
+        (SimpleNamespace(uuid="00000000-0000-0000-0000-000000000003", title="b"), last[0], "00000000-0000-0000-0000-000000000003"),
+        (SimpleNamespace(uuid="00000000-0000-0000-0000-000000000002", title="c"), datetime(2024, 1, 4), "00000000-0000-0000-0000-000000000002"),
+    ]
+
+    async def scalar(stmt, params=None):
+        return 10
+
+    async def execute(stmt):
+        executed.append(stmt.compile(dialect=postgresql.dialect()))
+        return SimpleNamespace(all=lambda: rows)
+
+    service = MetadataService(SimpleNamespace(scalar=scalar, execute=execute))
+    for cache in caches.values():
+        await cache.clear()
+    cursor = service._encode_cursor(*last)
+    result = await service.get_news_insights(company_ids=[10000001], cursor=cursor, limit=2, fields="title")
+
+    sql = " ".join(str(executed[0]).split())
+    assert "(company_mapping.system_timestamp, company_mapping.insightwire_uuid) < (%(param_1)s, %(param_2)s)" in sql
+    assert sql.endswith("ORDER BY company_mapping.system_timestamp DESC, company_mapping.insightwire_uuid DESC LIMIT %(param_3)s")
+    assert list(executed[0].params.values())[-3:] == [last[0], last[1], 3]
+    # Rows sharing a timestamp are paged by uuid, and the next cursor resumes after the last one returned
+    assert [row["title"] for row in result["data"]] == ["a", "b"]
+    assert service._decode_cursor(result["next_cursor"]) == (last[0], rows[1][2])
+    for cache in caches.values():
+        await cache.clear()
+
+
+def test_query_builder_picks_most_selective_driver():
+    """Test that the rarest dimension drives the query and the others become EXISTS probes"""
+    from api.services.query_builder import InsightQueryBuilder
+    builder = InsightQueryBuilder({
+        'sentiment_type_id': 1,
+        'company_ids': 10000001,
+        'industry_type_id': 301,
+        'page': 2
+    })
+    assert builder.dimension_filters == {
+        'sentiment_type_id': [1], 'company_id': [10000001], 'industry_type_id': [301]
+    }
+    assert builder.driver() == 'company_id'
+    assert InsightQueryBuilder({'start_date': '2024-01-01'}).driver() is None
+
+
+def test_query_builder_multi_value_filters():
+    """Test that id lists are collected and match=all narrows the driver estimate"""
+    from api.services.query_builder import InsightQueryBuilder
+    filters = {'company_ids': [10000001, 10000002, 10000001], 'sentiment_type_id': [1]}
+    any_builder = InsightQueryBuilder(filters)
+    all_builder = InsightQueryBuilder({**filters, 'match': 'all'})
+
+    assert any_builder.dimension_filters['company_id'] == [10000001, 10000002]
+    assert all_builder.selectivity('company_id') < any_builder.selectivity('company_id')
+    assert all_builder.driver() == 'company_id'
+
+
+@pytest.mark.asyncio
+async def test_multi_dimension_and_multi_id_filters_run():
+    """Test that statements with several dimensions or ids compile and run through every insight path"""
+    from types import SimpleNamespace
+    from sqlalchemy.dialects import postgresql
+    from api.core.cache import caches
+
+    compiled = []
+
+    def compile_statement(stmt):
+        compiled.append(" ".join(str(stmt.compile(dialect=postgresql.dialect())).split()))
+
+    async def scalar(stmt, params=None):
+        compile_statement(stmt)
+        return 1
+
+    async def scalars(stmt):
+        compile_statement(stmt)
+        return SimpleNamespace(all=lambda: [SimpleNamespace(uuid="uuid-1", title="Title")])
+
+    async def execute(stmt):
+        compile_statement(stmt)
+        return SimpleNamespace(all=lambda: [("total", None, 1)])
+
+    service = MetadataService(SimpleNamespace(scalar=scalar, scalars=scalars, execute=execute))
+    filter_sets = [
+        {'company_ids': [10000001, 10000002]},
+        {'company_ids': [10000001, 10000002], 'match': 'all'},
+        {'company_ids': [10000001], 'sentiment_type_ids': [-1, 1]},
+        {'company_ids': [10000001, 10000002], 'sentiment_type_ids': [1], 'match': 'all', 'start_date': '2024-01-01'},
+    ]
+    for cache in caches.values():
+        await cache.clear()
+    for filters in filter_sets:
+        result = await service.get_news_insights(fields="title", **filters)
+        assert result["data"] == [{"story_id": "uuid-1", "title": "Title"}], result["message"]
+        facets = await service.get_insight_facets(**filters)
+        assert facets["total_count"] == 1, facets["message"]
+        export = await service.build_export_query(**filters)
+        assert not isinstance(export, dict), export
+        compile_statement(export)
+
+    assert any("company_mapping AS company_mapping_1" in sql and "ANY (" in sql for sql in compiled)
+    assert any("EXISTS (SELECT * FROM sentiment_mapping AS sentiment_mapping_1" in sql for sql in compiled)
+    for cache in caches.values():
+        await cache.clear()
+
+
+def test_parse_search_query():
+    """Test that q= searches become to_tsquery expressions with phrases, prefixes, OR and negation"""
+    from api.services.query_builder import parse_search_query
+
+    assert parse_search_query("supply chain") == "supply & chain"
+    assert parse_search_query('"supply chain" auto*') == "(supply <-> chain) & auto:*"
+    assert parse_search_query("tesla OR ford -recall") == "(tesla | ford) & !recall"
+    assert parse_search_query("McDonald's e-commerce") == "(mcdonald <-> s) & (e <-> commerce)"
+    assert parse_search_query('"unbalanced quote') == "unbalanced & quote"
+    assert parse_search_query("!! OR ::") == ""
+
+
+def test_taxonomy_search_pattern_and_index_check(caplog):
+    """Test that taxonomy searches escape wildcards and that missing trigram indexes are reported"""
+    import asyncio
+    from types import SimpleNamespace
+    from api.services.query_builder import contains_pattern
+    from api.models.search_indexes import TRIGRAM_INDEXES, check_search_indexes
+
+    assert contains_pattern("acme") == "%acme%"
+    assert contains_pattern("50%_off") == "%50\\%\\_off%"
+
+    present = sorted(TRIGRAM_INDEXES)[1:]
+
+    async def execute(stmt, params):
+        return SimpleNamespace(scalars=lambda: iter(present))
+
+    session = SimpleNamespace(scalar=lambda stmt: _resolved(1), execute=execute)
+    assert "idx_companies_taxonomy_company_name_trgm" in TRIGRAM_INDEXES
+    assert asyncio.run(check_search_indexes(session)) == sorted(TRIGRAM_INDEXES)[:1]
+    assert "util/create_trigram_indexes.py" in caplog.text
+
+
+def test_insight_index_search_and_pages():
+    """Test bitmap filters, time windows and newest-first paging of the insight index"""
+    from datetime import datetime
+    from api.services.insight_index import InsightIndex, BitMap
+    if BitMap is None:
+        pytest.skip("pyroaring is not installed")
+
+    index = InsightIndex()
+    index._keys = [(datetime(2024, 1, day), f"uuid-{day}") for day in range(1, 7)]
+    index._uuids = [uuid for _, uuid in index._keys]
+    index._ids = {uuid: dense_id for dense_id, uuid in enumerate(index._uuids)}
+    index._bitmaps = {
+        'company_id': {10000001: BitMap([0, 1, 2, 4]), 10000002: BitMap([2, 3, 4])},
+        'sentiment_type_id': {1: BitMap([1, 2, 4, 5])},
+    }
+
+    assert list(index.search({'company_id': [10000001, 10000002]})) == [0, 1, 2, 3, 4]
+    assert list(index.search({'company_id': [10000001, 10000002]}, match_all=True)) == [2, 4]
+    matched = index.search({'company_id': [10000001], 'sentiment_type_id': [1]})
+    assert list(matched) == [1, 2, 4]
+    assert list(index.search({'company_id': [10000001]}, start_date=datetime(2024, 1, 2), end_date=datetime(2024, 1, 3))) == [1, 2]
+
+    assert index.page(matched, 0, 2) == [4, 2]
+    assert index.page(matched, 2, 2) == [1]
+    assert index.page_after(matched, None, 1) == [4, 2]
+    assert index.page_after(matched, index.key(2), 2) == [1]
+    assert index.facet_counts(matched, 'company_id', 1) == [(10000001, 3)]
+    assert index.facet_counts(matched, 'company_id', 5) == [(10000001, 3), (10000002, 2)]
+
+
+@pytest.mark.asyncio
+async def test_insight_index_leaves_differing_timestamps_to_sql():
+    """Test that articles whose mapping timestamps differ, including re-mapped ones, are left to SQL"""
+    from datetime import datetime
+    from types import SimpleNamespace
+    from api.services.insight_index import InsightIndex, BitMap
+    from api.services.query_builder import DIMENSION_MODELS
+    if BitMap is None:
+        pytest.skip("pyroaring is not installed")
+
+    index = InsightIndex()
+    index._keys = [(datetime(2024, 1, day), f"uuid-{day}") for day in range(1, 4)]
+    index._uuids = [uuid for _, uuid in index._keys]
+    index._ids = {uuid: dense_id for dense_id, uuid in enumerate(index._uuids)}
+    index._bitmaps = {name: {} for name in DIMENSION_MODELS}
+    index._bitmaps['company_id'] = {10000001: BitMap([0, 2]), 10000002: BitMap([1])}
+    index._divergent = BitMap([0])
+    index.ready = True
+    assert not index.agrees_with_sql({'company_id': [10000001]})
+    assert index.agrees_with_sql({'company_id': [10000002]})
+
+    # uuid-2 is mapped to a company a day after it was indexed
+    index._marker = datetime(2024, 1, 4)
+    results = [[("uuid-2", datetime(2024, 1, 2), datetime(2024, 1, 4))]]
+    results += [[("uuid-2", 10000003, datetime(2024, 1, 4))] if name == 'company_id' else [] for name in DIMENSION_MODELS]
+
+    async def execute(stmt):
+        return SimpleNamespace(all=lambda: results.pop(0))
+
+    await index.refresh(SimpleNamespace(execute=execute, scalar=lambda stmt: _resolved(datetime(2024, 1, 5))))
+    assert list(index.match({'company_id': [10000003]})) == [1]
+    assert not index.agrees_with_sql({'company_id': [10000002]})
+
+
+@pytest.mark.asyncio
+async def test_insight_index_refresh_picks_up_back_dated_rows(monkeypatch):
+    """Test that refreshes select rows by ingest time, so back-dated mappings and articles are indexed"""
+    from datetime import datetime
+    from types import SimpleNamespace
+    from sqlalchemy.dialects import postgresql
+    from api.services.insight_index import InsightIndex, BitMap
+    from api.services.query_builder import DIMENSION_MODELS
+    if BitMap is None:
+        pytest.skip("pyroaring is not installed")
+
+    index = InsightIndex()
+    index._keys = [(datetime(2024, 1, day), f"uuid-{day}") for day in range(1, 4)]
+    index._uuids = [uuid for _, uuid in index._keys]
+    index._ids = {uuid: dense_id for dense_id, uuid in enumerate(index._uuids)}
+    index._bitmaps = {name: {} for name in DIMENSION_MODELS}
+    index._divergent = BitMap()
+    index._marker = datetime(2024, 2, 1, 12)
+    index.ready = True
+
+    statements = []
+    # A mapping of uuid-1, back-dated to its own (old) event time and ingested after the last refresh
+    results = [[("uuid-1", datetime(2024, 1, 1), datetime(2024, 1, 1))]]
+    results += [[("uuid-1", 301, datetime(2024, 1, 1))] if name == 'industry_type_id' else [] for name in DIMENSION_MODELS]
+
+    async def execute(stmt):
+        statements.append(stmt.compile(dialect=postgresql.dialect()))
+        return SimpleNamespace(all=lambda: results.pop(0))
+
+    session = SimpleNamespace(execute=execute, scalar=lambda stmt: _resolved(datetime(2024, 2, 1, 13)))
+    await index.refresh(session)
+    assert list(index.match({'industry_type_id': [301]})) == [0]
+    assert index.agrees_with_sql({'industry_type_id': [301]})
+    assert index._marker == datetime(2024, 2, 1, 13)
+    for compiled in statements:
+        assert "ingested_at >= " in str(compiled)
+        assert "system_timestamp >=" not in str(compiled)
+        assert datetime(2024, 2, 1, 12) - index.overlap in compiled.params.values()
+
+    # A new article back-dated before the newest indexed one rebuilds the index
+    results[:] = [[("uuid-0", datetime(2023, 12, 31), datetime(2023, 12, 31))]]
+    rebuilt = []
+
+    async def load(session):
+        rebuilt.append(session)
+
+    monkeypatch.setattr(index, "load", load)
+    await index.refresh(session)
+    assert rebuilt == [session]
+
+
+@pytest.mark.asyncio
+async def test_facet_counts_statement():
+    """Test the SQL facet path: one grouped branch per facet, cut to top_n per facet, most frequent first"""
+    from types import SimpleNamespace
+    from sqlalchemy import select
+    from sqlalchemy.dialects import postgresql
+    from api.core.metadata_config import FACET_DIMENSIONS
+    from api.models import InsightWire
+    from api.services.query_builder import DIMENSION_MODELS
+
+    executed = []
+
+    async def execute(stmt):
+        executed.append(stmt)
+        return SimpleNamespace(all=lambda: [
+            ("industries", 301, 7), ("industries", 302, 2), ("total", None, 9), ("sentiments", 1, 9)
+        ])
+
+    service = MetadataService(SimpleNamespace(execute=execute))
+    total_count, facets = await service._facet_counts(select(InsightWire.uuid).where(InsightWire.title == "x"), top_n=3)
+
+    assert total_count == 9
+    assert facets["industries"] == [{"id": 301, "count": 7}, {"id": 302, "count": 2}]
+    assert facets["sentiments"] == [{"id": 1, "count": 9}]
+    assert facets["locations"] == []
+
+    sql = " ".join(str(executed[0].compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True})).split())
+    assert sql.startswith("WITH matched AS (SELECT insightwire.uuid AS uuid FROM insightwire WHERE insightwire.title = 'x')")
+    assert sql.count("UNION ALL") == len(FACET_DIMENSIONS)
+    for facet, column in FACET_DIMENSIONS.items():
+        table = DIMENSION_MODELS[column].__tablename__
+        branch = sql.split(f"'{facet}' AS facet")[1].split("UNION ALL")[0]
+        assert f"WHERE {table}.insightwire_uuid IN (SELECT matched.uuid FROM matched) GROUP BY {table}.{column}" in branch
+    assert "row_number() OVER (PARTITION BY counts.facet ORDER BY counts.count DESC, counts.id)" in sql
+    assert sql.endswith("WHERE ranked.position <= 3 ORDER BY ranked.facet, ranked.position")
+
+
+@pytest.mark.asyncio
+async def test_stream_export_writes_bounded_chunks():
+    """Test that exports are written one chunk per cursor partition and close the cursor"""
+    from types import SimpleNamespace
+    from sqlalchemy import select
+    from api.models import InsightWire
+
+    class StreamedRows:
+        closed = False
+
+        async def partitions(self, size):
+            rows = [SimpleNamespace(uuid=f"uuid-{i}", title=f"Title, {i}") for i in range(5)]
+            for start in range(0, len(rows), size):
+                yield rows[start:start + size]
+
+        async def close(self):
+            self.closed = True
+
+    rows = StreamedRows()
+    service = MetadataService(SimpleNamespace(stream_scalars=lambda stmt: _resolved(rows)))
+
+    chunks = [chunk async for chunk in service.stream_export(select(InsightWire), "ndjson", chunk_size=2)]
+    assert [chunk.count(b"\n") for chunk in chunks] == [2, 2, 1]
+    assert rows.closed
+
+    chunks = [chunk async for chunk in service.stream_export(select(InsightWire), "csv", chunk_size=5)]
+    assert chunks[0].startswith(b"story_id,title,")
+    assert b'uuid-4,"Title, 4"' in chunks[1]
+
+
+@pytest.mark.asyncio
+async def test_export_closes_cursor_and_session_on_disconnect(monkeypatch):
+    """Test that a client disconnecting mid-export still closes the cursor and the session"""
+    import asyncio
+    from types import SimpleNamespace
+    from fastapi import FastAPI
+    from api.core.security import verify_api_key
+    from api.routers import news
+    from util.database import get_read_db
+
+    closed = []
+    first_chunk_sent = asyncio.Event()
+
+    class StreamedRows:
+        async def partitions(self, size):
+            yield [SimpleNamespace(uuid="uuid-1", title="Title")]
+            await asyncio.sleep(10)
+            yield []
+
+        async def close(self):
+            await asyncio.sleep(0)
+            closed.append("cursor")
+
+    class Session:
+        async def stream_scalars(self, stmt):
+            return StreamedRows()
+
+        async def close(self):
+            await asyncio.sleep(0)
+            closed.append("session")
+
+    app = FastAPI()
+    app.include_router(news.router)
+    app.dependency_overrides[get_read_db] = lambda: None
+    app.dependency_overrides[verify_api_key] = lambda: "key"
+    monkeypatch.setattr(news, "read_session", Session)
+
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+        if message["type"] == "http.response.body" and message.get("body"):
+            first_chunk_sent.set()
+
+    requests = iter([{"type": "http.request", "body": b"", "more_body": False}])
+
+    async def receive():
+        try:
+            return next(requests)
+        except StopIteration:
+            await first_chunk_sent.wait()
+            return {"type": "http.disconnect"}
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+        "path": "/insight/export", "raw_path": b"/insight/export", "root_path": "",
+        "query_string": b"company_ids=10000001&format=csv", "headers": [], "client": ("test", 1), "server": ("test", 80)
+    }
+    await asyncio.wait_for(app(scope, receive, send), 5)
+
+    assert sent[0]["status"] == 200
+    assert (b"content-type", b"text/csv; charset=utf-8") in sent[0]["headers"]
+    assert closed == ["cursor", "session"]
+
+
+@pytest.mark.asyncio
+async def test_news_insights_batch(monkeypatch):
+    """Test that batches keep their order, run identical queries once and bound concurrency"""
+    import asyncio
+    from contextlib import asynccontextmanager
+
+    calls = []
+    running = {"now": 0, "max": 0}
+
+    async def fake_get_news_insights(self, **kwargs):
+        calls.append(kwargs)
+        running["now"] += 1
+        running["max"] = max(running["max"], running["now"])
+        await asyncio.sleep(0.01)
+        running["now"] -= 1
+        if kwargs.get("company_ids") == [10000002]:
+            return {"data": [], "message": "Error retrieving records: boom", "error": True}
+        return {"data": [kwargs["company_ids"]], "message": None}
+
+    @asynccontextmanager
+    async def session_factory():
+        yield None
+
+    monkeypatch.setattr(MetadataService, "get_news_insights", fake_get_news_insights)
+    queries = [{"company_ids": [10000000 + i % 4]} for i in range(8)]
+    queries.append({"company_ids": [1]})
+    results = await MetadataService.get_news_insights_batch(queries, session_factory, concurrency=2)
+
+    assert [result["index"] for result in results] == list(range(9))
+    assert len(calls) == 4
+    assert running["max"] == 2
+    assert results[0] == {"index": 0, "status": 200, "result": {"data": [[10000000]], "message": None}}
+    assert results[6] == {**results[2], "index": 6}
+    assert [result["status"] for result in results[:4]] == [200, 200, 500, 200]
+    assert results[8]["status"] == 400
+    assert results[8]["result"]["message"].startswith("Invalid company_ids")
+
+
+@pytest.mark.asyncio
+async def test_news_insights_batch_reports_database_failures():
+    """Test that a query failing in the database is reported as 500, not as an empty 200"""
+    from contextlib import asynccontextmanager
+    from types import SimpleNamespace
+    from api.core.cache import caches
+
+    async def scalar(stmt, params=None):
+        raise ConnectionError("connection reset")
+
+    @asynccontextmanager
+    async def session_factory():
+        yield SimpleNamespace(scalar=scalar)
+
+    @asynccontextmanager
+    async def unavailable_factory():
+        raise ConnectionError("pool exhausted")
+        yield
+
+    for cache in caches.values():
+        await cache.clear()
+    queries = [{"company_ids": [10000001]}]
+    [failed] = await MetadataService.get_news_insights_batch(queries, session_factory)
+    assert failed["status"] == 500
+    assert failed["result"]["message"] == "Error retrieving records: connection reset"
+
+    [unavailable] = await MetadataService.get_news_insights_batch(queries, unavailable_factory)
+    assert unavailable["status"] == 500
+    assert unavailable["result"]["message"] == "Error retrieving records: pool exhausted"
+    for cache in caches.values():
+        await cache.clear()
+
+
+async def _resolved(value):
+    return value
+
+
+@pytest.mark.asyncio
+async def test_count_modes():
+    """Test count=none, count=estimate from the count cache and the EXPLAIN row estimate"""
+    from types import SimpleNamespace
+    from sqlalchemy import select
+    from api.core.cache import caches
+    from api.models import InsightWire
+
+    executed = []
+
+    async def scalar(stmt, params=None):
+        executed.append((str(stmt), params))
+        if str(stmt).startswith("EXPLAIN"):
+            return '[{"Plan": {"Plan Rows": 1234}}]'
+        return 42
+
+    async def scalars(stmt):
+        return SimpleNamespace(all=lambda: [SimpleNamespace(uuid=f"uuid-{i}") for i in range(3)])
+
+    service = MetadataService(SimpleNamespace(scalar=scalar, scalars=scalars))
+    stmt = select(InsightWire).where(InsightWire.title == "count modes")
+    await caches['count'].clear()
+
+    # No count query at all, but next_page still comes from the extra row
+    result = await service.paginate_query(stmt, page=1, limit=2, count="none", fields=["story_id"])
+    assert executed == []
+    assert (result["total_count"], result["count_type"], result["next_page"]) == (None, "none", 2)
+    assert [row["story_id"] for row in result["data"]] == ["uuid-0", "uuid-1"]
+
+    # Without a cached count, the planner estimate of the statement itself
+    assert await service._count_query(stmt, "estimate") == (1234, "estimate")
+    sql, params = executed.pop()
+    assert sql.startswith("EXPLAIN (FORMAT JSON) SELECT")
+    assert "count modes" in params.values()
+    assert service._count_message(1234, "estimate") == "Found approximately 1234 records"
+
+    # An exact count is cached and then served to count=estimate without a query
+    assert await service._count_query(stmt.order_by(InsightWire.uuid), "exact") == (42, "exact")
+    executed.clear()
+    assert await service._count_query(stmt, "estimate") == (42, "cached")
+    assert executed == []
+    await caches['count'].clear()
+
+
+@pytest.mark.asyncio
+async def test_failed_queries_are_not_cached():
+    """Test that a database failure is flagged as an error and the next call queries again"""
+    from types import SimpleNamespace
+    from api.core.cache import caches
+
+    calls = []
+
+    async def scalar(stmt, params=None):
+        calls.append(stmt)
+        if len(calls) == 1:
+            raise ConnectionError("connection reset")
+        return 0
+
+    service = MetadataService(SimpleNamespace(scalar=scalar))
+    for cache in caches.values():
+        await cache.clear()
+
+    failed = await service.get_news_insights(company_ids=[10000001])
+    assert failed["error"] is True
+    assert failed["message"] == "Error retrieving records: connection reset"
+
+    empty = await service.get_news_insights(company_ids=[10000001])
+    assert len(calls) == 2
+    assert "error" not in empty
+    assert empty["message"].startswith("No records found matching the following criteria")
+
+    # The empty result is cached like any other
+    await service.get_news_insights(company_ids=[10000001])
+    assert len(calls) == 2
+    for cache in caches.values():
+        await cache.clear()
@@ -0,0 +1,126 @@
+"""Test suite for the Prometheus metrics"""
+
+import asyncio
+from types import SimpleNamespace
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from api.core.cache import caches
+from api.core.cache_backends import MemoryBackend
+from api.core.metrics import Histogram, REGISTRY, render_metrics
+from api.middleware.metrics import IN_PROGRESS, REQUESTS, RESPONSE_SIZE, MetricsMiddleware
+from util import database
+
+app = FastAPI()
+app.add_middleware(MetricsMiddleware)
+
+
+@app.get("/items/{item_id}")
+async def item(item_id: int):
+    return {"id": item_id}
+
+
+client = TestClient(app)
+
+
+def test_request_metrics_per_route_template():
+    """Test that requests are labelled by route template, with unknown paths folded together"""
+    for item_id in (1, 2, 3):
+        assert client.get(f"/items/{item_id}").status_code == 200
+    assert client.get("/items/x").status_code == 422
+    assert client.get("/nothing/here").status_code == 404
+
+    assert REQUESTS.values[("GET", "/items/{item_id}", 200)] == 3
+    assert REQUESTS.values[("GET", "/items/{item_id}", 422)] == 1
+    assert REQUESTS.values[("GET", "unmatched", 404)] == 1
+    assert IN_PROGRESS.values[("GET", "/items/{item_id}")] == 0
+    assert RESPONSE_SIZE.values[("GET", "/items/{item_id}")][-1] >= 3 * len('{"id":1}')
+
+    text = render_metrics()
+    assert 'http_request_duration_seconds_count{method="GET",route="/items/{item_id}"} 4' in text
+    assert "# TYPE cache_evictions_total counter" in text
+    assert all(f'cache_evictions_total{{tier="{name}"}} ' in text for name in caches)
+    assert 'db_pool_checked_out{pool="primary"} 0' in text
+
+
+def test_histogram_rendering():
+    """Test cumulative buckets, sum and count, and label escaping"""
+    histogram = Histogram("test_latency_seconds", "Test", ("path",), buckets=(0.1, 1))
+    try:
+        for value in (0.05, 0.1, 0.5, 3):
+            histogram.observe(('a"b',), value)
+        lines = histogram.render()
+    finally:
+        REGISTRY.remove(histogram)
+    assert lines[2:] == [
+        'test_latency_seconds_bucket{path="a\\"b",le="0.1"} 2',
+        'test_latency_seconds_bucket{path="a\\"b",le="1"} 3',
+        'test_latency_seconds_bucket{path="a\\"b",le="+Inf"} 4',
+        'test_latency_seconds_sum{path="a\\"b"} 3.65',
+        'test_latency_seconds_count{path="a\\"b"} 4',
+    ]
+
+
+def test_memory_backend_counts_evictions():
+    """Test that entries dropped for max_size are counted, expired ones are not"""
+    backend = MemoryBackend("test", ttl=60, max_size=2)
+
+    async def fill():
+        for key in "abcd":
+            await backend.set(key, key)
+
+    asyncio.run(fill())
+    assert backend.evictions == 2
+    assert backend.size() == 2
+
+
+def test_query_metrics():
+    """Test that statements are timed per operation and their rows counted"""
+    def count(histogram, operation):
+        return sum(histogram.values.get((operation,), [0])[:-1])
+
+    conn = SimpleNamespace(info={})
+    selects = count(database.QUERY_DURATION, "select")
+    database._before_cursor_execute(conn, None, "\n    SELECT 1", None, None, False)
+    database._after_cursor_execute(conn, SimpleNamespace(rowcount=12), "\n    SELECT 1", None, None, False)
+    database._before_cursor_execute(conn, None, "VACUUM", None, None, False)
+    database._after_cursor_execute(conn, SimpleNamespace(rowcount=-1), "VACUUM", None, None, False)
+
+    assert conn.info == {}
+    assert count(database.QUERY_DURATION, "select") == selects + 1
+    assert count(database.QUERY_DURATION, "other") >= 1
+    assert database.QUERY_ROWS.values[("select",)][-1] >= 12
+    assert ("other",) not in database.QUERY_ROWS.values
+
+
+def test_middleware_gauge_status_and_route_memo():
+    """Test in-progress balance, the status of a failed request and the bounded route table"""
+    middleware = MetricsMiddleware(None)
+    middleware.MAX_RESOLVED = 2
+    labels = ("GET", "/items/{item_id}")
+    seen = []
+
+    async def endpoint(scope, receive, send):
+        seen.append(IN_PROGRESS.values[labels])
+        if scope["path"] == "/items/0":
+            raise RuntimeError("handler failed")
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"{}"})
+
+    async def send(message):
+        pass
+
+    async def run():
+        middleware.app = endpoint
+        for path in ("/items/1", "/items/2", "/items/3", "/items/0"):
+            try:
+                await middleware({"type": "http", "method": "GET", "path": path, "app": app}, None, send)
+            except RuntimeError:
+                pass
+
+    failures = REQUESTS.values.get(labels + (500,), 0)
+    asyncio.run(run())
+    assert [count - seen[0] for count in seen] == [0, 0, 0, 0]
+    assert IN_PROGRESS.values[labels] == seen[0] - 1
+    assert REQUESTS.values[labels + (500,)] == failures + 1
+    assert len(middleware._routes) <= 2
+    assert middleware._routes[("GET", "/items/0")] == "/items/{item_id}"
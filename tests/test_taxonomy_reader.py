@@ -0,0 +1,65 @@
+"""Test suite for taxonomy loading and hot reload"""
+
+import asyncio
+import json
+import os
+from util.taxonomy_reader import TaxonomyReader
+
+
+def _write(path, data, mtime_ns):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_reload_swaps_snapshot_atomically(tmp_path):
+    """Test that a changed file is reparsed into a new version while old snapshots stay intact"""
+    reader = TaxonomyReader()
+    reader._base_path = str(tmp_path)
+    path = tmp_path / 'company_taxonomy.json'
+    _write(path, [{"company_id": 1, "company_name": "Tablespace", "company_url": "tablespace.com"}], 1_000_000_000)
+
+    before = reader.snapshot('companies')
+    assert reader.reload_changed() == []
+
+    _write(path, [
+        {"company_id": 1, "company_name": "Tablespace", "company_url": "tablespace.com"},
+        {"company_id": 2, "company_name": "Tablecloth", "company_url": "tablecloth.com"},
+    ], 2_000_000_000)
+    assert reader.reload_changed() == ['companies']
+
+    after = reader.snapshot('companies')
+    assert after.version > before.version
+    assert [c["company_id"] for c in reader.suggest_companies("table")] == [1, 2]
+    # A request holding the old snapshot keeps its data and index
+    assert len(before.data) == 1 and len(before.index) == 1
+
+
+def test_reload_keeps_previous_snapshot_on_parse_error(tmp_path):
+    """Test that a half-written file does not replace a good snapshot"""
+    reader = TaxonomyReader()
+    reader._base_path = str(tmp_path)
+    path = tmp_path / 'industry.json'
+    _write(path, [{"industry_id": 300, "industry_name": "oil"}], 1_000_000_000)
+    version = reader.version('industries')
+
+    path.write_text('[{"industry_id": 3')
+    os.utime(path, ns=(2_000_000_000, 2_000_000_000))
+    assert reader.reload_changed() == []
+    assert reader.version('industries') == version
+    assert reader.load_taxonomy('industries') == [{"industry_id": 300, "industry_name": "oil"}]
+
+
+def test_preload_without_hot_reload(tmp_path):
+    """Test that taxonomies are preloaded in the background when hot reload is disabled"""
+    reader = TaxonomyReader()
+    reader._base_path = str(tmp_path)
+    _write(tmp_path / 'company_taxonomy.json', [{"company_id": 1, "company_name": "Tablespace", "company_url": "tablespace.com"}], 1_000_000_000)
+
+    async def start():
+        reader.start_watching(0)
+        await asyncio.wait_for(reader._watch_task, 5)
+        await reader.stop_watching()
+
+    asyncio.run(start())
+    assert len(reader._cache['companies'].index) == 1
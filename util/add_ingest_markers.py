@@ -0,0 +1,59 @@
+# util/add_ingest_markers.py
+"""
+Add the ingested_at column and index that the insight index refreshes from
+to the mapping tables of an existing database.
+
+    python -m util.add_ingest_markers
+
+Adding a column whose default is now() does not rewrite the table on
+PostgreSQL 11+: existing rows read the time of the ALTER. Indexes are built
+with CREATE INDEX CONCURRENTLY, so the tables stay writable. Both steps skip
+what already exists; the script is safe to re-run. New databases created
+with Base.metadata.create_all get the column and indexes from the models.
+"""
+import asyncio
+import logging
+import os
+from typing import List
+from dotenv import load_dotenv
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+from api.services.query_builder import DIMENSION_MODELS
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+
+def ingest_marker_ddl() -> List[str]:
+    """Statements adding the column, then building its index, for every mapping table"""
+    statements = [
+        f"ALTER TABLE {model.__tablename__} ADD COLUMN IF NOT EXISTS ingested_at timestamptz NOT NULL DEFAULT now()"
+        for model in DIMENSION_MODELS.values()
+    ]
+    for model in DIMENSION_MODELS.values():
+        for index in model.__table__.indexes:
+            if index.name.endswith("_ingested"):
+                statements.append(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {index.name} ON {index.table.name} (ingested_at)")
+    return statements
+
+async def add_ingest_markers() -> None:
+    database_url = os.getenv("DATABASE_URL")
+    if not database_url:
+        raise ValueError("DATABASE_URL environment variable is not set")
+
+    statements = ingest_marker_ddl()
+    engine = create_async_engine(database_url)
+    try:
+        # CONCURRENTLY cannot run inside a transaction block
+        async with engine.connect() as conn:
+            conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+            for statement in statements:
+                logger.info(f"{statement}...")
+                await conn.execute(text(statement))
+        logger.info(f"Ingest markers are in place on {len(DIMENSION_MODELS)} mapping tables")
+    finally:
+        await engine.dispose()
+
+if __name__ == "__main__":
+    asyncio.run(add_ingest_markers())
@@ -0,0 +1,151 @@
+# util/benchmark_filters.py
+"""
+Compare the legacy JOIN-per-dimension insight query with the EXISTS semi-join
+plan built by InsightQueryBuilder on a synthetic dataset.
+
+The dataset is generated in its own schema (insightwires_bench) of the
+database in DATABASE_URL, so existing tables are never touched:
+
+    python util/benchmark_filters.py --articles 200000 --repeat 5
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import statistics
+from datetime import datetime, timedelta
+from dotenv import load_dotenv
+from sqlalchemy import func, select, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import create_async_engine
+from api.models import InsightWire
+from api.services.query_builder import InsightQueryBuilder, DIMENSION_MODELS
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+
+SCHEMA = "insightwires_bench"
+
+# (first id, number of distinct ids, ids per article) generated for each dimension
+DIMENSIONS = {
+    'company_id': (10000000, 5000, 3),
+    'business_activity_id': (100, 35, 1),
+    'content_type_id': (401, 37, 1),
+    'industry_type_id': (300, 122, 2),
+    'location_id': (300, 138, 1),
+    'sentiment_type_id': (-1, 3, 1),
+    'source_type_id': (900, 7, 1),
+}
+
+SCENARIOS = {
+    'company': {'company_id': 10000003},
+    'company+sentiment+source': {'company_id': 10000003, 'sentiment_type_id': 1, 'source_type_id': 901},
+    'industry+activity+location+sentiment': {
+        'industry_type_id': 301, 'business_activity_id': 101, 'location_id': 301, 'sentiment_type_id': 0
+    },
+}
+
+async def create_dataset(conn, articles: int) -> None:
+    """Create the synthetic schema; ids are skewed so that low ids are popular"""
+    logger.info(f"Generating {articles} synthetic articles in schema {SCHEMA}...")
+    await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+    await conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+    await conn.execute(text(f"SET search_path TO {SCHEMA}"))
+    await conn.execute(text(
+        "CREATE TABLE bench_articles AS "
+        "SELECT md5(i::text)::uuid::text AS uuid, now() - random() * interval '365 days' AS ts "
+        "FROM generate_series(1, :articles) AS i"
+    ), {"articles": articles})
+    await conn.execute(text(
+        "CREATE TABLE insightwire (uuid text PRIMARY KEY, title text, lead_paragraph text, news_url text, "
+        "published_date text, sentiment text, type_of_source text, type_of_content text, sources text, "
+        "story text, locations text, content_languages text, image_url text, business_activities text, "
+        "industries text)"
+    ))
+    await conn.execute(text(
+        "INSERT INTO insightwire (uuid, title, lead_paragraph, story, published_date) "
+        "SELECT uuid, 'Title ' || uuid, repeat('lead ', 20), repeat('story ', 400), ts::date::text FROM bench_articles"
+    ))
+    for name, (first_id, distinct_ids, per_article) in DIMENSIONS.items():
+        table = DIMENSION_MODELS[name].__tablename__
+        await conn.execute(text(
+            f"CREATE TABLE {table} (insightwire_uuid text NOT NULL, {name} integer NOT NULL, "
+            f"system_timestamp timestamp, PRIMARY KEY (insightwire_uuid, {name}))"
+        ))
+        await conn.execute(text(
+            f"INSERT INTO {table} SELECT DISTINCT a.uuid, {first_id} + floor(power(random(), 3) * {distinct_ids})::int, a.ts "
+            f"FROM bench_articles a, generate_series(1, {per_article})"
+        ))
+        await conn.execute(text(f"CREATE INDEX ON {table} ({name}, insightwire_uuid)"))
+        await conn.execute(text(f"CREATE INDEX ON {table} ({name}, system_timestamp, insightwire_uuid)"))
+    await conn.execute(text("ANALYZE"))
+
+def build_join_query(filters: dict, start_date: datetime, end_date: datetime):
+    """The legacy plan: one inner JOIN per dimension, window repeated on every table"""
+    stmt = select(InsightWire)
+    for name, value in filters.items():
+        model = DIMENSION_MODELS[name]
+        stmt = stmt.join(model, InsightWire.uuid == model.insightwire_uuid)
+        stmt = stmt.filter(getattr(model, name) == value)
+        stmt = stmt.filter(model.system_timestamp >= start_date, model.system_timestamp <= end_date)
+    return stmt
+
+def build_semi_join_query(filters: dict, start_date: datetime, end_date: datetime):
+    """The planned query: most selective driver plus EXISTS probes, window applied once"""
+    stmt, _ = InsightQueryBuilder(filters).build(select(InsightWire), start_date, end_date)
+    return stmt
+
+async def explain(conn, stmt) -> float:
+    """Execution time in milliseconds reported by EXPLAIN ANALYZE"""
+    compiled = stmt.compile(dialect=postgresql.dialect(paramstyle="named"), compile_kwargs={"render_postcompile": True})
+    plan = (await conn.execute(text(f"EXPLAIN (ANALYZE, FORMAT JSON) {compiled}"), compiled.params)).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]["Execution Time"]
+
+async def run_benchmark(articles: int, repeat: int, keep: bool) -> None:
+    database_url = os.getenv("DATABASE_URL")
+    if not database_url:
+        raise ValueError("DATABASE_URL environment variable is not set")
+
+    engine = create_async_engine(database_url)
+    end_date = datetime.now()
+    start_date = end_date - timedelta(days=30)
+    try:
+        async with engine.begin() as conn:
+            await create_dataset(conn, articles)
+
+        async with engine.connect() as conn:
+            await conn.execute(text(f"SET search_path TO {SCHEMA}"))
+            print(f"{'scenario':<40}{'query':<8}{'join ms':>12}{'exists ms':>12}{'speedup':>10}")
+            for scenario, filters in SCENARIOS.items():
+                plans = {
+                    'join': build_join_query(filters, start_date, end_date),
+                    'exists': build_semi_join_query(filters, start_date, end_date),
+                }
+                for query in ('count', 'page'):
+                    timings = {}
+                    for plan, stmt in plans.items():
+                        if query == 'count':
+                            stmt = select(func.count()).select_from(stmt.subquery())
+                        else:
+                            stmt = stmt.limit(20)
+                        timings[plan] = statistics.median([await explain(conn, stmt) for _ in range(repeat)])
+                    speedup = timings['join'] / timings['exists'] if timings['exists'] else float('inf')
+                    print(f"{scenario:<40}{query:<8}{timings['join']:>12.2f}{timings['exists']:>12.2f}{speedup:>9.1f}x")
+    finally:
+        if not keep:
+            async with engine.begin() as conn:
+                await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        await engine.dispose()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--articles", type=int, default=200000, help="Number of synthetic articles")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per query; the median is reported")
+    parser.add_argument("--keep", action="store_true", help=f"Keep the {SCHEMA} schema afterwards")
+    args = parser.parse_args()
+    asyncio.run(run_benchmark(args.articles, args.repeat, args.keep))
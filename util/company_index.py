@@ -0,0 +1,291 @@
+# util/company_index.py
+import heapq
+import re
+import unicodedata
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import Counter, defaultdict
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urlsplit
+
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+
+# Trailing words dropped from a normalized name to form its short alias
+LEGAL_SUFFIXES = {
+    'ag', 'bv', 'co', 'company', 'corp', 'corporation', 'gmbh', 'inc', 'incorporated',
+    'limited', 'llc', 'llp', 'lp', 'ltd', 'nv', 'plc', 'pte', 'pvt', 'sa', 'spa', 'srl'
+}
+
+def normalize_name(value: Any) -> str:
+    """Casefold, strip accents and collapse punctuation/whitespace to single spaces"""
+    text = unicodedata.normalize("NFKD", str(value or ""))
+    text = "".join(ch for ch in text if not unicodedata.combining(ch)).casefold()
+    return _NON_ALNUM.sub(" ", text).strip()
+
+def normalize_domain(value: Any) -> str:
+    """Reduce a URL to its lowercase host without scheme, www., port or path"""
+    text = str(value or "").strip().lower()
+    if not text:
+        return ""
+    host = urlsplit(text if "://" in text else f"//{text}").hostname or ""
+    return host[4:] if host.startswith("www.") else host
+
+def strip_legal_suffix(name: str) -> str:
+    """Drop trailing legal-form words from a normalized name ('acme holdings ltd' -> 'acme holdings')"""
+    words = name.split()
+    while len(words) > 1 and words[-1] in LEGAL_SUFFIXES:
+        words.pop()
+    return " ".join(words)
+
+def _trigrams(value: str) -> set:
+    """Trigrams of a normalized string padded with a space on both sides, as in pg_trgm"""
+    padded = f" {value} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)} if value else set()
+
+def similarity(a: str, b: str) -> float:
+    """Trigram similarity of two normalized strings: shared trigrams over all trigrams"""
+    grams_a, grams_b = _trigrams(a), _trigrams(b)
+    if not grams_a or not grams_b:
+        return 0.0
+    shared = len(grams_a & grams_b)
+    return shared / (len(grams_a) + len(grams_b) - shared)
+
+def _match_rank(value: str, query: str) -> int:
+    """0 exact, 1 prefix, 2 word prefix, 3 anywhere else"""
+    if value == query:
+        return 0
+    if value.startswith(query):
+        return 1
+    if f" {query}" in value:
+        return 2
+    return 3
+
+class NgramIndex:
+    """
+    Substring index over a list of normalized strings.
+
+    Every character, bigram and trigram points to the ascending positions of
+    the strings that contain it. A query is answered from the shortest posting
+    list among its n-grams, verifying only those strings, so the cost depends
+    on the rarest n-gram of the query rather than on the number of strings.
+    Queries of up to three characters are exactly one posting list and need
+    no verification. Trigrams are taken from the space-padded string, so the
+    same postings also serve trigram similarity searches.
+
+    Positions are expected in preference order (the caller sorts the strings),
+    so every result list is already ordered within a match rank. The strings
+    never change after construction, so recent searches are memoized.
+    """
+
+    # Number of memoized searches per index
+    SEARCH_CACHE_SIZE = 1024
+    # Posting list positions counted and candidates scored per similarity search
+    SIMILAR_POSTINGS_BUDGET = 5000
+    SIMILAR_CANDIDATES = 100
+
+    def __init__(self, values: List[str]):
+        self.values = values
+        postings = defaultdict(list)
+        for position, value in enumerate(values):
+            grams = _trigrams(value)
+            grams.update(value[i:i + 2] for i in range(len(value) - 1))
+            grams.update(value)
+            for gram in grams:
+                postings[gram].append(position)
+        self._postings = {gram: array("I", positions) for gram, positions in postings.items()}
+        order = sorted(range(len(values)), key=values.__getitem__)
+        self._sorted_values = [values[position] for position in order]
+        self._sorted_positions = array("I", order)
+        self.search = lru_cache(maxsize=self.SEARCH_CACHE_SIZE)(self._search)
+
+    def _prefix_range(self, query: str) -> Tuple[int, int, int]:
+        """Bounds in the sorted strings of the exact matches [start, exact_end) and prefix matches [start, end)"""
+        start = bisect_left(self._sorted_values, query)
+        exact_end = bisect_right(self._sorted_values, query, start)
+        end = bisect_left(self._sorted_values, query + "\uffff", exact_end)
+        return start, exact_end, end
+
+    def _search(self, query: str) -> Sequence[int]:
+        """Ascending positions of the strings containing query"""
+        if not query:
+            return []
+        size = min(len(query), 3)
+        shortest = None
+        for i in range(len(query) - size + 1):
+            posting = self._postings.get(query[i:i + size])
+            if posting is None:
+                return []
+            if shortest is None or len(posting) < len(shortest):
+                shortest = posting
+        if len(query) == size:
+            return shortest
+        values = self.values
+        return [position for position in shortest if query in values[position]]
+
+    def ranked(self, query: str, offset: int, limit: int) -> Tuple[int, List[int]]:
+        """
+        Number of matches and one page of positions ranked exact, prefix, word
+        prefix, then anywhere. Ranks are resolved only as deep as the page needs.
+        """
+        needed = offset + limit
+        start, exact_end, end = self._prefix_range(query)
+        ordered = sorted(self._sorted_positions[start:exact_end])
+        ordered += heapq.nsmallest(needed, self._sorted_positions[exact_end:end])
+
+        matches = self.search(query)
+        if len(ordered) < needed:
+            # Fewer prefix matches than the page needs, so ordered holds all of them
+            seen = set(ordered)
+            word = f" {query}"
+            for position in matches:
+                if position not in seen and word in self.values[position]:
+                    ordered.append(position)
+                    if len(ordered) >= needed:
+                        break
+        if len(ordered) < needed:
+            seen = set(ordered)
+            for position in matches:
+                if position not in seen:
+                    ordered.append(position)
+                    if len(ordered) >= needed:
+                        break
+        return len(matches), ordered[offset:needed]
+
+    def similar(self, query: str, limit: int, threshold: float) -> List[Tuple[int, float]]:
+        """
+        Positions of the strings with trigram similarity of at least threshold
+        to query, most similar first.
+
+        Candidates are pre-filtered by counting shared trigrams over the
+        query's rarest posting lists, up to SIMILAR_POSTINGS_BUDGET positions,
+        so frequent trigrams such as 'inc' are skipped. Only the
+        SIMILAR_CANDIDATES strings sharing the most trigrams are scored.
+        """
+        grams = _trigrams(query)
+        if not grams:
+            return []
+        counts = Counter()
+        counted = 0
+        for posting in sorted((self._postings.get(gram, ()) for gram in grams), key=len):
+            if counts and counted + len(posting) > self.SIMILAR_POSTINGS_BUDGET:
+                break
+            counts.update(posting)
+            counted += len(posting)
+
+        scored = []
+        for position, _ in counts.most_common(self.SIMILAR_CANDIDATES):
+            value_grams = _trigrams(self.values[position])
+            shared = len(grams & value_grams)
+            score = shared / (len(grams) + len(value_grams) - shared)
+            if score >= threshold:
+                scored.append((position, score))
+        return heapq.nsmallest(limit, scored, key=lambda item: (-item[1], item[0]))
+
+class PrefixIndex:
+    """
+    Sorted (key, position) arrays for prefix lookups with bisect.
+
+    A position may appear under several keys (a name and its aliases). The
+    best k positions for a prefix are the k smallest in its range, since
+    positions are in preference order.
+    """
+
+    # Number of memoized suggestions per index
+    CACHE_SIZE = 4096
+
+    def __init__(self, entries: List[Tuple[str, int]]):
+        entries = sorted(set(entries))
+        self._keys = [key for key, _ in entries]
+        self._positions = array("I", [position for _, position in entries])
+        self.top = lru_cache(maxsize=self.CACHE_SIZE)(self._top)
+
+    def _top(self, query: str, k: int) -> Tuple[int, ...]:
+        """The k best distinct positions with a key starting with query"""
+        if not query:
+            return ()
+        start = bisect_left(self._keys, query)
+        end = bisect_left(self._keys, query + "\uffff", start)
+        return tuple(heapq.nsmallest(k, set(self._positions[start:end])))
+
+# Minimum trigram similarity of a fuzzy match, the pg_trgm default
+FUZZY_THRESHOLD = 0.3
+
+class CompanyIndex:
+    """
+    Search structures over the company taxonomy, built once per load.
+
+    Names are matched by substring on their normalized form and URLs by
+    substring on their normalized domain. Matches are ranked exact, prefix,
+    word prefix, then anywhere, and shorter names first within a rank.
+    """
+
+    def __init__(self, companies: List[Dict[str, Any]]):
+        names = [normalize_name(company.get("company_name")) for company in companies]
+        order = sorted(range(len(companies)), key=lambda position: (len(names[position]), position))
+        self.companies = [companies[position] for position in order]
+        self.names = [names[position] for position in order]
+        self.domains = [normalize_domain(company.get("company_url")) for company in self.companies]
+        self.name_index = NgramIndex(self.names)
+        self.domain_index = NgramIndex(self.domains)
+        self.prefix_index = PrefixIndex([
+            (key, position)
+            for position, company in enumerate(self.companies)
+            for key in self._aliases(self.names[position], self.domains[position], company)
+            if key
+        ])
+
+    def __len__(self) -> int:
+        return len(self.companies)
+
+    @staticmethod
+    def _aliases(name: str, domain: str, company: Dict[str, Any]) -> List[str]:
+        """Keys a company is suggested under: its name, the name without legal suffix, the
+        domain without TLD, and any names listed in the taxonomy's optional 'aliases' field"""
+        aliases = company.get("aliases") or []
+        if isinstance(aliases, str):
+            aliases = [aliases]
+        return [name, strip_legal_suffix(name), domain.rsplit(".", 1)[0]] + [normalize_name(alias) for alias in aliases]
+
+    def suggest(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Companies whose name or alias starts with query; shorter names first"""
+        return [self.companies[position] for position in self.prefix_index.top(normalize_name(query), limit)]
+
+    def fuzzy(self, name: str, limit: int = 10, threshold: float = FUZZY_THRESHOLD) -> List[Tuple[Dict[str, Any], float]]:
+        """Companies whose name is trigram-similar to name, with their similarity, best first"""
+        query = normalize_name(name)
+        return [
+            (self.companies[position], round(score, 3))
+            for position, score in self.name_index.similar(query, limit, threshold)
+        ]
+
+    def search(self, name: Optional[str] = None, url: Optional[str] = None) -> List[int]:
+        """Positions of all matching companies, best match first"""
+        ranks: Dict[int, int] = {}
+        query = normalize_name(name) if name else ""
+        if query:
+            for position in self.name_index.search(query):
+                ranks[position] = _match_rank(self.names[position], query)
+        domain = normalize_domain(url) if url else ""
+        if domain:
+            for position in self.domain_index.search(domain):
+                rank = _match_rank(self.domains[position], domain)
+                if rank < ranks.get(position, 4):
+                    ranks[position] = rank
+        return sorted(ranks, key=lambda position: (ranks[position], position))
+
+    def search_page(self, name: Optional[str] = None, url: Optional[str] = None, page: int = 1, limit: int = 20) -> Tuple[int, List[Dict[str, Any]]]:
+        """Total number of matches and the companies of one page"""
+        offset = (page - 1) * limit
+        query = normalize_name(name) if name else ""
+        domain = normalize_domain(url) if url else ""
+        if query and domain:
+            positions = self.search(name, url)
+            total, positions = len(positions), positions[offset:offset + limit]
+        elif query:
+            total, positions = self.name_index.ranked(query, offset, limit)
+        elif domain:
+            total, positions = self.domain_index.ranked(domain, offset, limit)
+        else:
+            return 0, []
+        return total, [self.companies[position] for position in positions]
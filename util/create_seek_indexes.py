@@ -0,0 +1,58 @@
+# util/create_seek_indexes.py
+"""
+Create the (dimension id, system_timestamp, insightwire_uuid) indexes that
+keyset pagination of /insight seeks on, on an existing database.
+
+    python -m util.create_seek_indexes
+
+Run it as a module from the project root, so the api package is importable.
+Indexes are built with CREATE INDEX CONCURRENTLY, so the mapping tables stay
+writable, and existing ones are skipped; the script is safe to re-run. New
+databases created with Base.metadata.create_all get the indexes from the models.
+"""
+import asyncio
+import logging
+import os
+from typing import List
+from dotenv import load_dotenv
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+from api.services.query_builder import DIMENSION_MODELS
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+
+def seek_index_ddl() -> List[str]:
+    """One statement per mapping table, built from the seek index declared on its model"""
+    statements = []
+    for model in DIMENSION_MODELS.values():
+        for index in model.__table__.indexes:
+            if index.name.endswith("_seek"):
+                columns = ", ".join(column.name for column in index.columns)
+                statements.append(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {index.name} ON {index.table.name} ({columns})")
+    return statements
+
+async def create_seek_indexes() -> None:
+    database_url = os.getenv("DATABASE_URL")
+    if not database_url:
+        raise ValueError("DATABASE_URL environment variable is not set")
+
+    statements = seek_index_ddl()
+    engine = create_async_engine(database_url)
+    try:
+        # CONCURRENTLY cannot run inside a transaction block
+        async with engine.connect() as conn:
+            conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+            for statement in statements:
+                logger.info(f"{statement}...")
+                await conn.execute(text(statement))
+            for model in DIMENSION_MODELS.values():
+                await conn.execute(text(f"ANALYZE {model.__tablename__}"))
+        logger.info(f"{len(statements)} seek indexes are in place")
+    finally:
+        await engine.dispose()
+
+if __name__ == "__main__":
+    asyncio.run(create_seek_indexes())
@@ -0,0 +1,48 @@
+# util/create_trigram_indexes.py
+"""
+Create the pg_trgm extension and the trigram indexes behind the taxonomy
+searches (ilike '%value%' ranked by similarity) on an existing database.
+
+    python -m util.create_trigram_indexes
+
+Run it as a module from the project root, so the api package is importable.
+Indexes are built with CREATE INDEX CONCURRENTLY, so the tables stay writable,
+and existing ones are skipped; the script is safe to re-run. New databases
+created with Base.metadata.create_all get the indexes from the models.
+"""
+import asyncio
+import logging
+import os
+from dotenv import load_dotenv
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+import api.models  # noqa: F401 - registers the trigram indexes of every taxonomy model
+from api.models.search_indexes import CREATE_TRIGRAM_EXTENSION, TRIGRAM_INDEXES, trigram_index_ddl
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+
+async def create_trigram_indexes() -> None:
+    database_url = os.getenv("DATABASE_URL")
+    if not database_url:
+        raise ValueError("DATABASE_URL environment variable is not set")
+
+    engine = create_async_engine(database_url)
+    try:
+        # CONCURRENTLY cannot run inside a transaction block
+        async with engine.connect() as conn:
+            conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+            await conn.execute(text(CREATE_TRIGRAM_EXTENSION))
+            for name, (table, column) in TRIGRAM_INDEXES.items():
+                logger.info(f"Creating {name} on {table}.{column}...")
+                await conn.execute(text(trigram_index_ddl(name)))
+            for table in sorted({table for table, _ in TRIGRAM_INDEXES.values()}):
+                await conn.execute(text(f"ANALYZE {table}"))
+        logger.info(f"{len(TRIGRAM_INDEXES)} trigram indexes are in place")
+    finally:
+        await engine.dispose()
+
+if __name__ == "__main__":
+    asyncio.run(create_trigram_indexes())
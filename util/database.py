@@ -1,8 +1,19 @@
 # util/database.py
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy import event, exc, text
 from dotenv import load_dotenv
+from typing import Any, Dict, List, Optional
+from api.core.config import settings
+from api.core.metrics import ROW_BUCKETS, CollectedMetric, Histogram
+import asyncio
+import itertools
+import logging
 import os
+import time
+
+logger = logging.getLogger(__name__)
 
 # Load environment variables
 load_dotenv()
@@ -13,12 +24,82 @@ DATABASE_URL = (
     f"@{os.getenv('POSTGRES_HOST')}:{os.getenv('POSTGRES_PORT')}/{os.getenv('POSTGRES_DB')}"
 )
 
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """
+    Queue pool that counts checkouts which had to wait for a connection.
+
+    A checkout waits when no connection is idle and max_overflow is reached;
+    it then blocks until a connection is returned or pool_timeout expires.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self.timeouts = 0
+
+    def _do_get(self):
+        if self._max_overflow < 0 or self.overflow() < self._max_overflow or self.checkedin() > 0:
+            return super()._do_get()
+        self.waits += 1
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            self.wait_seconds += time.perf_counter() - started
+
+    def recreate(self):
+        # Keep the counters when the pool is recreated after a disconnect
+        pool = super().recreate()
+        pool.waits, pool.wait_seconds, pool.timeouts = self.waits, self.wait_seconds, self.timeouts
+        return pool
+
+QUERY_DURATION = Histogram("db_query_duration_seconds", "Statement execution time, until the result is available", ("operation",))
+QUERY_ROWS = Histogram("db_query_rows", "Rows returned (or affected, for writes) per statement", ("operation",), buckets=ROW_BUCKETS)
+
+# First keyword of a statement -> operation label; anything else is 'other'
+OPERATIONS = {op: op for op in ("select", "insert", "update", "delete", "with", "explain")}
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    conn.info["query_started"] = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    elapsed = time.perf_counter() - conn.info.pop("query_started", time.perf_counter())
+    words = statement[:32].split(None, 1)
+    labels = (OPERATIONS.get(words[0].lower(), "other") if words else "other",)
+    QUERY_DURATION.observe(labels, elapsed)
+    # -1 for server-side cursors, whose rows are only known once fetched
+    if cursor.rowcount >= 0:
+        QUERY_ROWS.observe(labels, cursor.rowcount)
+
+def create_pooled_engine(url: str) -> AsyncEngine:
+    """Async engine with the pool and statement cache settings of Settings, timed per statement"""
+    pooled = create_async_engine(
+        url,
+        echo=settings.DB_ECHO,
+        future=True,
+        poolclass=InstrumentedPool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        connect_args={
+            # Prepared statements cached per connection, by asyncpg and by SQLAlchemy's
+            # asyncpg dialect; set DB_STATEMENT_CACHE_SIZE=0 behind pgbouncer in transaction mode
+            "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+            "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+        }
+    )
+    event.listen(pooled.sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(pooled.sync_engine, "after_cursor_execute", _after_cursor_execute)
+    return pooled
+
 # Create engine with basic authentication
-engine = create_async_engine(
-    DATABASE_URL,
-    echo=True,  # Set to False in production
-    future=True
-)
+engine = create_pooled_engine(DATABASE_URL)
 
 AsyncSessionLocal = sessionmaker(
     bind=engine,
@@ -26,7 +107,178 @@ AsyncSessionLocal = sessionmaker(
     expire_on_commit=False
 )
 
+# Seconds a standby is behind its primary: 0 for a primary or a standby that has
+# replayed everything it received, NULL while a standby has not replayed anything
+REPLICA_LAG_SQL = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+    END
+"""
+
+class ReplicaRouter:
+    """
+    Pick the engine of read-only sessions.
+
+    Reads go to the healthy replicas, in turn (round_robin) or to the one with
+    the fewest checked-out connections (least_connections), and to the primary
+    while no replica is healthy. A replica is healthy when its last health
+    check connected and, with max_lag set, it was at most max_lag seconds
+    behind the primary, so reads of recently ingested articles are never
+    staler than that. A replica whose connection fails is taken out of the
+    rotation immediately and comes back at the next successful check.
+    """
+
+    def __init__(self, primary: AsyncEngine, replicas: List[AsyncEngine], strategy: str = "round_robin", max_lag: float = 0):
+        self.primary = primary
+        self.replicas = {replica.url.render_as_string(hide_password=True): replica for replica in replicas}
+        self.strategy = strategy
+        self.max_lag = max_lag
+        self.healthy: Dict[str, bool] = {name: False for name in self.replicas}
+        self.lag: Dict[str, Optional[float]] = {name: None for name in self.replicas}
+        self._turn = itertools.count()
+        self._task: Optional[asyncio.Task] = None
+        for name, replica in self.replicas.items():
+            event.listen(replica.sync_engine, "handle_error", self._on_error(name))
+
+    def _on_error(self, name: str):
+        def handle_error(context) -> None:
+            if context.is_disconnect or context.connection is None:
+                self._set_health(name, False, "connection failed")
+        return handle_error
+
+    def _set_health(self, name: str, healthy: bool, reason: str = "") -> None:
+        if healthy != self.healthy[name]:
+            if healthy:
+                logger.info(f"Replica {name} is healthy, routing reads to it")
+            else:
+                logger.warning(f"Replica {name} is unavailable ({reason}), routing its reads elsewhere")
+        self.healthy[name] = healthy
+
+    def engine(self) -> AsyncEngine:
+        """Engine for the next read-only session"""
+        candidates = [replica for name, replica in self.replicas.items() if self.healthy[name]]
+        if not candidates:
+            return self.primary
+        if self.strategy == "least_connections":
+            return min(candidates, key=lambda replica: replica.sync_engine.pool.checkedout())
+        return candidates[next(self._turn) % len(candidates)]
+
+    async def _check(self, name: str, replica: AsyncEngine, timeout: float) -> None:
+        async def lag() -> Optional[float]:
+            async with replica.connect() as conn:
+                return await conn.scalar(text(REPLICA_LAG_SQL))
+
+        try:
+            value = await asyncio.wait_for(lag(), timeout)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.lag[name] = None
+            self._set_health(name, False, str(e) or type(e).__name__)
+            return
+        self.lag[name] = None if value is None else float(value)
+        if self.max_lag and (self.lag[name] is None or self.lag[name] > self.max_lag):
+            self._set_health(name, False, f"replication lag {self.lag[name]}s exceeds {self.max_lag}s")
+        else:
+            self._set_health(name, True)
+
+    async def check(self, timeout: float = 5.0) -> None:
+        """Check every replica's connectivity and replication lag"""
+        await asyncio.gather(*(self._check(name, replica, timeout) for name, replica in self.replicas.items()))
+
+    async def _run(self, interval: int) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            await self.check()
+
+    async def start(self, interval: int) -> None:
+        """Check the replicas once, then every interval seconds in the background"""
+        if self.replicas and self._task is None:
+            await self.check()
+            self._task = asyncio.create_task(self._run(interval))
+
+    async def stop(self) -> None:
+        """Cancel the health checks and close the replica pools"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        for replica in self.replicas.values():
+            await replica.dispose()
+
+replica_router = ReplicaRouter(
+    engine,
+    [create_pooled_engine(url.strip()) for url in settings.DATABASE_REPLICA_URLS.split(",") if url.strip()],
+    strategy=settings.DB_REPLICA_STRATEGY,
+    max_lag=settings.DB_REPLICA_MAX_LAG_SECONDS
+)
+
+def read_session() -> AsyncSession:
+    """Session for read-only work, on a replica when one is healthy"""
+    return AsyncSessionLocal(bind=replica_router.engine())
+
+def _pool_stats(pool) -> Dict[str, Any]:
+    return {
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": max(0, pool.overflow()),
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "timeout": settings.DB_POOL_TIMEOUT,
+        "waits": pool.waits,
+        "wait_seconds": round(pool.wait_seconds, 6),
+        "timeouts": pool.timeouts,
+    }
+
+def get_pool_stats() -> Dict[str, Any]:
+    """Connection pool occupancy and wait counters of this process, for the primary and every replica"""
+    stats = _pool_stats(engine.sync_engine.pool)
+    stats["replicas"] = [
+        {
+            "url": name,
+            "healthy": replica_router.healthy[name],
+            "lag_seconds": replica_router.lag[name],
+            **_pool_stats(replica.sync_engine.pool)
+        }
+        for name, replica in replica_router.replicas.items()
+    ]
+    return stats
+
+def _pool_samples(stat: str):
+    yield ("primary",), _pool_stats(engine.sync_engine.pool)[stat]
+    for name, replica in replica_router.replicas.items():
+        yield (name,), _pool_stats(replica.sync_engine.pool)[stat]
+
+# Prometheus series of every pool, read from get_pool_stats' counters when scraped
+for _stat, _kind, _documentation in (
+    ("size", "gauge", "Connections kept open by the pool"),
+    ("checked_out", "gauge", "Connections currently in use"),
+    ("overflow", "gauge", "Connections open beyond the pool size"),
+    ("waits", "counter", "Checkouts that waited for a free connection"),
+    ("wait_seconds", "counter", "Seconds spent waiting for a free connection"),
+    ("timeouts", "counter", "Checkouts that gave up after pool_timeout"),
+):
+    CollectedMetric(
+        f"db_pool_{_stat}" + ("_total" if _kind == "counter" else ""),
+        _kind, _documentation, ("pool",), lambda stat=_stat: _pool_samples(stat)
+    )
+CollectedMetric(
+    "db_replica_healthy", "gauge", "1 while the replica receives reads", ("pool",),
+    lambda: (((name,), int(healthy)) for name, healthy in replica_router.healthy.items())
+)
+CollectedMetric(
+    "db_replica_lag_seconds", "gauge", "Replication lag at the last health check", ("pool",),
+    lambda: (((name,), lag) for name, lag in replica_router.lag.items())
+)
+
 # Dependency for database session
 async def get_async_db():
     async with AsyncSessionLocal() as session:
-        yield session
\ No newline at end of file
+        yield session
+
+# Dependency for read-only routes
+async def get_read_db():
+    async with read_session() as session:
+        yield session
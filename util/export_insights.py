@@ -0,0 +1,192 @@
+# util/export_insights.py
+"""
+Export insightwire rows and their mapping ids as Parquet or Arrow IPC.
+
+Rows are read from a server-side cursor and written batch by batch, one
+Parquet row group (or Arrow record batch) per batch, so memory stays bounded
+by --batch-size. Low-cardinality text columns are dictionary-encoded and
+every mapping dimension becomes a list<int32> column:
+
+    python util/export_insights.py --output insights.parquet
+    python util/export_insights.py --format arrow --output insights.arrows \\
+        --start-date 2024-01-01 --end-date 2024-01-31 --industry-type-ids 301 302
+
+Filters are those of /insight/export. Without any filter every article is
+exported. Requires pyarrow (pip install pyarrow).
+"""
+import argparse
+import asyncio
+import logging
+import os
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+from dotenv import load_dotenv
+from sqlalchemy import Text, any_, literal, select
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from api.models import InsightWire
+from api.services.metadata_service import MetadataService
+from api.services.query_builder import DIMENSION_MODELS
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - only needed by this tool
+    pa = pq = None
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+
+# Text columns with few distinct values, stored dictionary-encoded
+DICTIONARY_COLUMNS = ['published_date', 'sentiment', 'type_of_source', 'type_of_content', 'sources', 'content_languages']
+
+# Other insightwire text columns, in output order; story is only exported with --with-story
+TEXT_COLUMNS = ['title', 'lead_paragraph', 'news_url', 'image_url', 'locations', 'business_activities', 'industries']
+
+def build_schema(with_story: bool = False) -> "pa.Schema":
+    """Arrow schema of the export"""
+    fields = [pa.field('uuid', pa.string(), nullable=False)]
+    fields += [pa.field(name, pa.string()) for name in TEXT_COLUMNS]
+    if with_story:
+        fields.append(pa.field('story', pa.string()))
+    fields += [pa.field(name, pa.dictionary(pa.int32(), pa.string())) for name in DICTIONARY_COLUMNS]
+    fields += [pa.field(f'{name}s', pa.list_(pa.int32())) for name in DIMENSION_MODELS]
+    return pa.schema(fields)
+
+def to_record_batch(rows: List[Any], mapping_ids: Dict[str, Dict[str, List[int]]], schema: "pa.Schema") -> "pa.RecordBatch":
+    """Convert insightwire rows plus their mapping ids (dimension -> uuid -> ids) into a record batch"""
+    uuids = [str(row.uuid) for row in rows]
+    columns = {'uuid': uuids}
+    for field in schema:
+        name = field.name
+        if name == 'uuid':
+            continue
+        if name[:-1] in DIMENSION_MODELS:
+            ids = mapping_ids.get(name[:-1], {})
+            columns[name] = [sorted(ids.get(uuid, [])) for uuid in uuids]
+        else:
+            columns[name] = [getattr(row, name) for row in rows]
+    arrays = []
+    for field in schema:
+        if pa.types.is_dictionary(field.type):
+            arrays.append(pa.array(columns[field.name], pa.string()).dictionary_encode().cast(field.type))
+        else:
+            arrays.append(pa.array(columns[field.name], field.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+async def fetch_mapping_ids(session: AsyncSession, uuids: List[str]) -> Dict[str, Dict[str, List[int]]]:
+    """Mapping ids of every dimension for a batch of articles"""
+    mapping_ids: Dict[str, Dict[str, List[int]]] = {}
+    for name, model in DIMENSION_MODELS.items():
+        ids = defaultdict(list)
+        # Table columns: selecting model attributes would configure the mapping models,
+        # whose InsightWire relationship cannot resolve
+        table = model.__table__
+        result = await session.execute(
+            # One array parameter instead of an IN list, which would exceed the bind limit
+            select(table.c.insightwire_uuid, table.c[name])
+            .where(table.c.insightwire_uuid == any_(literal(uuids, ARRAY(Text))))
+        )
+        for uuid, dimension_id in result:
+            ids[str(uuid)].append(dimension_id)
+        mapping_ids[name] = ids
+    return mapping_ids
+
+class BatchWriter:
+    """Write record batches as Parquet row groups or to an Arrow IPC stream"""
+
+    def __init__(self, path: str, schema: "pa.Schema", export_format: str):
+        self.export_format = export_format
+        if export_format == 'parquet':
+            self._writer = pq.ParquetWriter(path, schema, compression='zstd', use_dictionary=DICTIONARY_COLUMNS)
+        else:
+            # The stream format allows each batch to carry its own dictionaries
+            self._sink = pa.OSFile(path, 'wb')
+            self._writer = pa.ipc.new_stream(self._sink, schema)
+
+    def write(self, batch: "pa.RecordBatch") -> None:
+        if self.export_format == 'parquet':
+            self._writer.write_table(pa.Table.from_batches([batch]))
+        else:
+            self._writer.write_batch(batch)
+
+    def close(self) -> None:
+        self._writer.close()
+        if self.export_format != 'parquet':
+            self._sink.close()
+
+async def export_insights(output: str, export_format: str, batch_size: int, with_story: bool, filters: Dict[str, Any]) -> int:
+    """Export the matching articles to output; returns the number of rows written"""
+    if pa is None:
+        raise RuntimeError("pyarrow is required for columnar exports: pip install pyarrow")
+    database_url = os.getenv("DATABASE_URL")
+    if not database_url:
+        raise ValueError("DATABASE_URL environment variable is not set")
+
+    engine = create_async_engine(database_url)
+    async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    schema = build_schema(with_story)
+    columns = [getattr(InsightWire, field.name) for field in schema if hasattr(InsightWire, field.name)]
+    written = 0
+    try:
+        async with async_session() as session:
+            stmt = select(InsightWire)
+            if filters:
+                stmt = await MetadataService(session).build_export_query(**filters)
+                if isinstance(stmt, dict):  # Error response
+                    raise ValueError(stmt["message"])
+            stmt = stmt.with_only_columns(*columns)
+
+            writer = BatchWriter(output, schema, export_format)
+            try:
+                result = await session.stream(stmt.execution_options(yield_per=batch_size))
+                async with async_session() as mapping_session:
+                    async for rows in result.partitions(batch_size):
+                        mapping_ids = await fetch_mapping_ids(mapping_session, [str(row.uuid) for row in rows])
+                        writer.write(to_record_batch(rows, mapping_ids, schema))
+                        written += len(rows)
+                        logger.info(f"Exported {written} rows")
+            finally:
+                writer.close()
+    finally:
+        await engine.dispose()
+    return written
+
+def _filters_from_args(args: argparse.Namespace) -> Dict[str, Any]:
+    filters = {
+        'company_ids': args.company_ids,
+        'business_activity_ids': args.business_activity_ids,
+        'content_type_ids': args.content_type_ids,
+        'industry_type_ids': args.industry_type_ids,
+        'location_ids': args.location_ids,
+        'source_type_ids': args.source_type_ids,
+        'sentiment_type_ids': args.sentiment_type_ids,
+        'start_date': args.start_date,
+        'end_date': args.end_date,
+    }
+    filters = {key: value for key, value in filters.items() if value}
+    if filters:
+        filters['match'] = args.match
+    return filters
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", required=True, help="Output file")
+    parser.add_argument("--format", choices=["parquet", "arrow"], default="parquet", help="Parquet, or an Arrow IPC stream")
+    parser.add_argument("--batch-size", type=int, default=50000, help="Rows per row group / record batch")
+    parser.add_argument("--with-story", action="store_true", help="Include the full story text")
+    for name in DIMENSION_MODELS:
+        parser.add_argument(f"--{name.replace('_', '-')}s", dest=f"{name}s", type=int, nargs="+", help=f"Filter on {name}")
+    parser.add_argument("--start-date", help="YYYY-MM-DD")
+    parser.add_argument("--end-date", help="YYYY-MM-DD")
+    parser.add_argument("--match", choices=["any", "all"], default="any", help="Match any or all ids of a filter")
+    args = parser.parse_args(argv)
+
+    written = asyncio.run(export_insights(args.output, args.format, args.batch_size, args.with_story, _filters_from_args(args)))
+    logger.info(f"Wrote {written} rows to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+# util/migrate_search_vector.py
+"""
+Add the full-text search column of /insight?q= to an existing database.
+
+    python -m util.migrate_search_vector
+    python -m util.migrate_search_vector --batch-size 5000 --pause 0.5
+
+Run it as a module from the project root, so the api package is importable.
+
+Steps, each safe to re-run:
+  1. add insightwire.search_vector (tsvector, no table rewrite)
+  2. install the trigger that keeps it current for new and updated rows
+  3. backfill existing rows in batches of --batch-size, one transaction per
+     batch walking the primary key, so locks are short and progress survives
+     an interruption
+  4. build the GIN index with CREATE INDEX CONCURRENTLY and ANALYZE the table
+"""
+import argparse
+import asyncio
+import logging
+import os
+from dotenv import load_dotenv
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+from api.models.insightwire import SEARCH_VECTOR_TRIGGER_DDL, search_document
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+
+ADD_COLUMN = "ALTER TABLE insightwire ADD COLUMN IF NOT EXISTS search_vector tsvector"
+
+BACKFILL_BATCH = f"""
+    WITH batch AS (
+        SELECT uuid FROM insightwire
+        WHERE uuid > :last_uuid AND search_vector IS NULL
+        ORDER BY uuid
+        LIMIT :batch_size
+    )
+    UPDATE insightwire SET search_vector = {search_document('insightwire.')}
+    FROM batch
+    WHERE insightwire.uuid = batch.uuid
+    RETURNING insightwire.uuid
+"""
+
+CREATE_INDEX = (
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_insightwire_search_vector "
+    "ON insightwire USING GIN (search_vector)"
+)
+
+async def migrate(batch_size: int, pause: float) -> int:
+    """Run the migration; returns the number of rows backfilled"""
+    database_url = os.getenv("DATABASE_URL")
+    if not database_url:
+        raise ValueError("DATABASE_URL environment variable is not set")
+
+    engine = create_async_engine(database_url)
+    backfilled = 0
+    try:
+        async with engine.begin() as conn:
+            logger.info("Adding insightwire.search_vector and its trigger...")
+            await conn.execute(text(ADD_COLUMN))
+            for statement in SEARCH_VECTOR_TRIGGER_DDL:
+                await conn.execute(text(statement))
+
+        last_uuid = "00000000-0000-0000-0000-000000000000"
+        while True:
+            async with engine.begin() as conn:
+                uuids = (await conn.execute(
+                    text(BACKFILL_BATCH),
+                    {"last_uuid": last_uuid, "batch_size": batch_size}
+                )).scalars().all()
+            if not uuids:
+                break
+            backfilled += len(uuids)
+            last_uuid = str(max(uuids))
+            logger.info(f"Backfilled {backfilled} rows")
+            if pause:
+                await asyncio.sleep(pause)
+
+        # CONCURRENTLY cannot run inside a transaction block
+        async with engine.connect() as conn:
+            conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+            logger.info("Creating GIN index on insightwire.search_vector...")
+            await conn.execute(text(CREATE_INDEX))
+            await conn.execute(text("ANALYZE insightwire"))
+    finally:
+        await engine.dispose()
+    return backfilled
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m util.migrate_search_vector", description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=2000, help="Rows updated per transaction")
+    parser.add_argument("--pause", type=float, default=0.0, help="Seconds to sleep between batches")
+    args = parser.parse_args(argv)
+
+    backfilled = asyncio.run(migrate(args.batch_size, args.pause))
+    logger.info(f"Search vector migration completed: {backfilled} rows backfilled")
+
+if __name__ == "__main__":
+    main()
@@ -1,68 +1,180 @@
 # util/taxonomy_reader.py
+import asyncio
+import hashlib
+import itertools
 import json
+import logging
 import os
-from typing import List, Dict, Any, Optional
+import threading
+from typing import List, Dict, Any, NamedTuple, Optional, Tuple
 from datetime import datetime
+from util.company_index import CompanyIndex
+
+logger = logging.getLogger(__name__)
+
+class TaxonomySnapshot(NamedTuple):
+    """One parsed version of a taxonomy file, never modified after creation"""
+    data: List[Dict[str, Any]]
+    version: int
+    mtime_ns: int
+    # Hash of the file contents; identical on every worker that loaded the same file
+    etag: str
+    index: Optional[CompanyIndex] = None
 
 class TaxonomyReader:
+    FILE_MAPPING = {
+        'business_events': 'business_activity.json',
+        'companies': 'company_taxonomy.json',
+        'industries': 'industry.json',
+        'countries': 'country.json',
+        'content_type': 'content_type_taxonomy.json',
+        'sentiments': 'sentimate_taxonomy.json',
+        'source_type': 'source_type_taxonomy.json',
+        'languages': 'languages.json'
+    }
+
     def __init__(self):
-        self._cache = {}
+        self._cache: Dict[str, TaxonomySnapshot] = {}
         self._base_path = "taxonomies"
+        self._versions = itertools.count(1)
+        self._load_lock = threading.Lock()
+        self._watch_task: Optional[asyncio.Task] = None
 
     def _get_file_path(self, taxonomy_name: str) -> str:
         """Get the JSON file path for a taxonomy"""
-        file_mapping = {
-            'business_events': 'business_activity.json',
-            'companies': 'company_taxonomy.json',
-            'industries': 'industry.json',
-            'countries': 'country.json',
-            'content_type': 'content_type_taxonomy.json',
-            'sentiments': 'sentimate_taxonomy.json',
-            'source_type': 'source_type_taxonomy.json',
-            'languages': 'languages.json'
-        }
-        
-        if taxonomy_name not in file_mapping:
+        if taxonomy_name not in self.FILE_MAPPING:
             raise KeyError(f"Taxonomy {taxonomy_name} not found")
             
-        return os.path.join(self._base_path, file_mapping[taxonomy_name])
+        return os.path.join(self._base_path, self.FILE_MAPPING[taxonomy_name])
 
-    def load_taxonomy(self, taxonomy_name: str) -> List[Dict[str, Any]]:
-        """Load taxonomy data from JSON file"""
-        if taxonomy_name in self._cache:
-            return self._cache[taxonomy_name]
-            
+    def _read_snapshot(self, taxonomy_name: str) -> TaxonomySnapshot:
+        """Parse a taxonomy file and build its search index"""
         file_path = self._get_file_path(taxonomy_name)
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                self._cache[taxonomy_name] = data
-                return data
+            mtime_ns = os.stat(file_path).st_mtime_ns
+            with open(file_path, 'rb') as f:
+                raw = f.read()
         except FileNotFoundError:
             raise KeyError(f"Taxonomy file {file_path} not found")
+        data = json.loads(raw.decode('utf-8'))
+        etag = f'"{taxonomy_name}-{hashlib.sha256(raw).hexdigest()[:32]}"'
+        index = CompanyIndex(data) if taxonomy_name == 'companies' else None
+        return TaxonomySnapshot(data, next(self._versions), mtime_ns, etag, index)
+
+    def snapshot(self, taxonomy_name: str) -> TaxonomySnapshot:
+        """
+        Current snapshot of a taxonomy, loaded on first use.
+
+        Reloads replace the whole snapshot in one assignment, so callers that
+        hold on to a snapshot see a consistent version for as long as they need.
+        """
+        snapshot = self._cache.get(taxonomy_name)
+        if snapshot is None:
+            with self._load_lock:
+                snapshot = self._cache.get(taxonomy_name)
+                if snapshot is None:
+                    snapshot = self._cache[taxonomy_name] = self._read_snapshot(taxonomy_name)
+        return snapshot
+
+    def load_taxonomy(self, taxonomy_name: str) -> List[Dict[str, Any]]:
+        """Load taxonomy data from JSON file"""
+        return self.snapshot(taxonomy_name).data
+
+    def company_index(self) -> CompanyIndex:
+        """Search index over the company taxonomy, built with each load"""
+        return self.snapshot('companies').index
+
+    def version(self, taxonomy_name: str) -> int:
+        """Version of the loaded taxonomy; it changes on every reload"""
+        return self.snapshot(taxonomy_name).version
+
+    def reload_changed(self) -> List[str]:
+        """
+        Reparse every loaded taxonomy whose file changed and swap the new
+        snapshot in. Blocking; run it off the event loop. A file that fails to
+        parse keeps its previous snapshot.
+        """
+        reloaded = []
+        for taxonomy_name, current in list(self._cache.items()):
+            try:
+                if os.stat(self._get_file_path(taxonomy_name)).st_mtime_ns == current.mtime_ns:
+                    continue
+                snapshot = self._read_snapshot(taxonomy_name)
+            except (OSError, KeyError, ValueError) as e:
+                logger.error(f"Failed to reload taxonomy {taxonomy_name}: {str(e)}")
+                continue
+            with self._load_lock:
+                self._cache[taxonomy_name] = snapshot
+            reloaded.append(taxonomy_name)
+            logger.info(f"Reloaded taxonomy {taxonomy_name} as version {snapshot.version}")
+        return reloaded
+
+    def preload(self) -> None:
+        """Load every taxonomy file that exists, so no request pays for parsing and indexing"""
+        for taxonomy_name in self.FILE_MAPPING:
+            try:
+                self.snapshot(taxonomy_name)
+            except (KeyError, ValueError) as e:
+                logger.warning(f"Taxonomy {taxonomy_name} not preloaded: {str(e)}")
+
+    async def _watch(self, interval: float) -> None:
+        """Preload, then check the taxonomy files for changes every interval seconds, if positive"""
+        await asyncio.to_thread(self.preload)
+        while interval > 0:
+            await asyncio.sleep(interval)
+            try:
+                await asyncio.to_thread(self.reload_changed)
+            except Exception as e:
+                logger.error(f"Taxonomy reload failed: {str(e)}", exc_info=True)
+
+    def start_watching(self, interval: float) -> None:
+        """Start preloading taxonomies in a background thread, and hot-reloading them unless interval is 0"""
+        if self._watch_task is None:
+            self._watch_task = asyncio.create_task(self._watch(interval))
+
+    async def stop_watching(self) -> None:
+        """Cancel the background reload"""
+        if self._watch_task is not None:
+            self._watch_task.cancel()
+            await asyncio.gather(self._watch_task, return_exceptions=True)
+            self._watch_task = None
 
     def search_companies(
         self,
         name: Optional[str] = None,
         url: Optional[str] = None
     ) -> List[Dict[str, Any]]:
-        """Search companies by name or URL"""
-        data = self.load_taxonomy('companies')
-        
+        """Search companies by name or URL, best match first"""
         if not name and not url:
             return []
-            
-        results = []
-        for company in data:
-            company_name = str(company.get('company_name', ''))
-            company_url = str(company.get('company_url', ''))
-            
-            if name and name.lower() in company_name.lower():
-                results.append(company)
-            elif url and url.lower() in company_url.lower():
-                results.append(company)
-                
-        return results
+
+        index = self.company_index()
+        return [index.companies[position] for position in index.search(name, url)]
+
+    def search_companies_page(
+        self,
+        name: Optional[str] = None,
+        url: Optional[str] = None,
+        page: int = 1,
+        limit: int = 20
+    ) -> Tuple[int, List[Dict[str, Any]]]:
+        """Search companies by name or URL and return the total count and one page of results"""
+        if not name and not url:
+            return 0, []
+        return self.company_index().search_page(name, url, page, limit)
+
+    def suggest_companies(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Prefix suggestions over company names and aliases, for typeahead"""
+        return self.company_index().suggest(query, limit)
+
+    def fuzzy_search_companies(self, name: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Typo-tolerant company search by trigram similarity; each result carries its similarity"""
+        if not name:
+            return []
+        return [
+            {**company, "similarity": score}
+            for company, score in self.company_index().fuzzy(name, limit)
+        ]
 
     def search_taxonomy(
         self,